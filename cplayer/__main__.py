@@ -15,6 +15,9 @@ os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'
 # pylint: disable=wrong-import-order, wrong-import-position
 
 import logging
+import time
+from contextlib import nullcontext
+from functools import cached_property
 from pathlib import Path
 from typing import ClassVar
 
@@ -28,9 +31,22 @@ from textual.widgets import Footer, Header
 
 from cplayer import __version__
 from cplayer.src.elements import CONFIG
+from cplayer.src.elements.analysis import LibraryScanner
+from cplayer.src.elements.daemon import DaemonClient, PlaybackDaemon, RemotePlayer
 from cplayer.src.elements.downloader import YoutubeDownloader
+from cplayer.src.elements.instrumentation import METRICS
+from cplayer.src.elements.logs import LogService
+from cplayer.src.elements.metadata import METADATA
+from cplayer.src.elements.player import Player
+from cplayer.src.elements.playlist import PlayList
+from cplayer.src.elements.playlist_catalog import PLAYLIST_SUFFIX
+from cplayer.src.elements.playlist_formats import export_playlist, import_playlist
+from cplayer.src.elements.profiler import SessionProfiler
+from cplayer.src.elements.watchdog import StallWatchdog
+from cplayer.src.pages.base import PageBase
 from cplayer.src.pages.help import HelpPage
 from cplayer.src.pages.home import HomePage
+from cplayer.src.pages.performance import PerformancePage
 
 
 __LOGGING_FORMAT = '[%(asctime)s] [%(process)d] %(filename)s:%(lineno)d - %(levelname)s - %(message)s'
@@ -44,7 +60,10 @@ class Application(App):
         Binding(CONFIG.data.general.shortcuts.pages.quit, 'quit', 'Quit', show=True),
         Binding(CONFIG.data.general.shortcuts.pages.home, 'home', 'Home', show=True),
         Binding(CONFIG.data.general.shortcuts.pages.information, 'info', 'Info', show=True),
+        Binding(CONFIG.data.general.shortcuts.pages.performance, 'performance', 'Performance', show=False),
     ]
+
+    LAG_INTERVAL = 0.1
     CSS: ClassVar[str] = f"""
     $primary: {CONFIG.data.appearance.style.colors.primary};
     $background: {CONFIG.data.appearance.style.colors.background};
@@ -55,6 +74,7 @@ class Application(App):
     def __init__(
         self,
         path: Path | None,
+        player: Player | None = None,
         driver_class: type[Driver] | None = None,
         css_path: CSSPathType | None = None,
         watch_css: bool = False,  # noqa: FBT002
@@ -62,13 +82,17 @@ class Application(App):
         """Initializes the Application object.
 
         :param path: The optional path of the directory songs.
+        :param player: The player used to play the songs, a local player is used by default.
         :param *args: Variable length argument list.
         :param **kwargs: Arbitrary keyword arguments.
         """
         super().__init__(driver_class, css_path, watch_css)
 
-        self.home_page = HomePage(path, change_title=self.set_title, start_hidden=False)
-        self.help_page = HelpPage(change_title=self.set_title)
+        self.home_page = HomePage(path, change_title=self.set_title, start_hidden=False, player=player)
+        self._last_tick = time.monotonic()
+
+        options = CONFIG.data.development.watchdog
+        self.watchdog = StallWatchdog(options.threshold) if options.enabled else None
 
     def compose(self) -> ComposeResult:
         """Composes the application layout.
@@ -78,7 +102,6 @@ class Application(App):
         yield Header()
 
         yield self.home_page
-        yield self.help_page
 
         if CONFIG.data.appearance.style.footer:
             yield Footer()
@@ -90,24 +113,84 @@ class Application(App):
         """
         self.title = title
 
+    def on_mount(self) -> None:
+        """Handles events on the mounting of the application."""
+        if METRICS.enabled:
+            self.set_interval(self.LAG_INTERVAL, self._measure_lag)
+
+        if self.watchdog is not None:
+            self.watchdog.start()
+            self.set_interval(self.watchdog.interval, self.watchdog.tick)
+
+    def on_unmount(self) -> None:
+        """Handles events on the unmounting of the application, the stalls of the event loop are summarized."""
+        if self.watchdog is not None and self.watchdog.running:
+            self.watchdog.stop()
+            logging.info(self.watchdog.summary())
+
+    def _measure_lag(self) -> None:
+        """Records how late the event loop runs the periodic lag measurement."""
+        now = time.monotonic()
+        METRICS.record('event_loop.lag', max(now - self._last_tick - self.LAG_INTERVAL, 0))
+        self._last_tick = now
+
+    @cached_property
+    def help_page(self) -> HelpPage:
+        """Gets the help page, created and mounted the first time it is shown."""
+        page = HelpPage(change_title=self.set_title)
+        self.mount(page, after=self.home_page)
+        return page
+
+    @cached_property
+    def performance_page(self) -> PerformancePage:
+        """Gets the performance page, created and mounted the first time it is shown."""
+        page = PerformancePage(change_title=self.set_title)
+        self.mount(page, after=self.home_page)
+        return page
+
+    def _show_page(self, page: PageBase) -> None:
+        """Shows a page and hides the other ones.
+
+        :param page: The page to show.
+        """
+        for other_page in self.query(PageBase):
+            if other_page is not page:
+                other_page.hide()
+        page.show()
+
     def action_info(self) -> None:
         """Opens the information window."""
-        help_page = self.query_one(HelpPage)
-        help_page.show()
-
-        home_path = self.query_one(HomePage)
-        home_path.hide()
+        self._show_page(self.help_page)
 
     def action_home(self) -> None:
         """Opens the home window."""
-        home_path = self.query_one(HomePage)
-        home_path.show()
+        self._show_page(self.home_page)
+
+    def action_performance(self) -> None:
+        """Opens the performance window."""
+        self._show_page(self.performance_page)
 
-        help_page = self.query_one(HelpPage)
-        help_page.hide()
 
+def _setup_logging() -> Path:
+    """Configures the logging of the application, written to a rotating log file by a background thread.
 
-@click.command()
+    :returns: The path to the log file.
+    """
+    logfile = Path(CONFIG.data.development.logfile).expanduser()
+    options = CONFIG.data.development.logging
+    LogService(
+        logfile,
+        level=logging.getLevelName(CONFIG.data.development.level),
+        log_format=__LOGGING_FORMAT,
+        max_bytes=int(options.max_size * 1024**2),
+        backups=options.backups,
+        burst=options.burst,
+        window=options.window,
+    ).start()
+    return logfile
+
+
+@click.group(invoke_without_command=True)
 @click.option(
     '-p',
     '--path',
@@ -119,8 +202,19 @@ class Application(App):
     '--url',
     help='URL of the song to download from YouTube.',
 )
+@click.option(
+    '--daemon',
+    is_flag=True,
+    help='Run the headless playback daemon, controlled through a Unix socket.',
+)
+@click.option(
+    '--profile',
+    is_flag=True,
+    help='Profile the CPU time and memory allocations of the session, the report is written next to the logfile.',
+)
 @click.version_option(version=__version__)
-def main(path: Path | None, url: str | None) -> None:
+@click.pass_context
+def main(context: click.Context, path: Path | None, url: str | None, daemon: bool, profile: bool) -> None:
     """Command Line Python player CLI.
 
     This command line tool plays music files from a specified directory or last used playlist.
@@ -138,19 +232,159 @@ def main(path: Path | None, url: str | None) -> None:
 
           $ cplayer --url 'https://www.youtube.com/watch?v=xyz'
 
+        - Run the playback daemon, the next "cplayer" executions will be attached to it:
+
+          $ cplayer --daemon &
+
+        - Profile a session, to report a performance issue:
+
+          $ cplayer --profile
+
+        - Analyze the songs of a library (duration, corrupt files, loudness, waveform):
+
+          $ cplayer scan /path/to/music_directory
+
+        - Import an M3U, M3U8 or PLS playlist, and export a playlist to another player:
+
+          $ cplayer import /path/to/playlist.m3u8
+
+          $ cplayer export playlist_name /path/to/playlist.m3u8
+
     For more information, visit https://github.com/eccanto/cplayer
     """
-    logging.basicConfig(
-        filename=Path(CONFIG.data.development.logfile).expanduser(),
-        level=logging.getLevelName(CONFIG.data.development.level),
-        format=__LOGGING_FORMAT,
-    )
+    if context.invoked_subcommand is not None:
+        return
+
+    logfile = _setup_logging()
+
+    socket_path = Path(CONFIG.data.general.daemon.socket).expanduser()
+    client = DaemonClient(socket_path)
+
+    profiler = SessionProfiler(logfile.parent) if profile else None
 
     if url:
         downloader = YoutubeDownloader(url)
         downloader.download()
+    elif daemon:
+        if client.is_running():
+            message = f'the daemon is already running ("{socket_path}")'
+            raise click.ClickException(message)
+
+        mixer.init(buffer=CONFIG.data.general.output.buffer)
+
+        with profiler or nullcontext():
+            PlaybackDaemon(socket_path, Player()).serve()
     else:
-        mixer.init()
+        if client.is_running():
+            logging.info('attaching to the daemon "%s"...', socket_path)
+            player: Player = RemotePlayer(client)
+        else:
+            mixer.init(buffer=CONFIG.data.general.output.buffer)
+            player = Player()
+
+        app = Application(path, player=player)
+        with profiler or nullcontext():
+            app.run()
+
+        if app.watchdog is not None and app.watchdog.stalls:
+            click.echo(app.watchdog.summary(), err=True)
+
+    if profiler is not None and profiler.report_path.exists():
+        click.echo(f'profile report: {profiler.report_path}', err=True)
 
-        app = Application(path)
-        app.run()
+
+@main.command()
+@click.argument('roots', nargs=-1, required=True, type=click.Path(exists=True, path_type=Path))
+@click.option(
+    '-j',
+    '--jobs',
+    type=click.IntRange(min=1),
+    help='Number of worker processes, by default the number of available cores.',
+)
+@click.option('--force', is_flag=True, help='Analyze again the songs that did not change since the last scan.')
+def scan(roots: tuple[Path, ...], jobs: int | None, force: bool) -> None:
+    """Analyzes the songs of a music library.
+
+    The songs found in the ROOTS directories are probed and fully decoded to detect the corrupt files, and their
+    loudness and waveform peaks are measured. The results are saved in the metadata store, the songs that did not
+    change since the last scan are skipped, so an interrupted scan is resumed by running it again.
+    """
+    _setup_logging()
+
+    scanner = LibraryScanner(METADATA, jobs=jobs, force=force)
+    click.echo(f'scanning with {scanner.jobs} worker processes...', err=True)
+    try:
+        report = scanner.scan(roots)
+    finally:
+        METADATA.close()
+
+    click.echo(
+        f'{report.files} songs found, {report.skipped} unchanged, {report.analyzed} analyzed '
+        f'({report.failed} cannot be decoded) in {report.seconds:.1f} s: '
+        f'{report.files_per_second:.1f} files/s, {report.megabytes_per_second:.1f} MB/s',
+    )
+
+
+@main.command('import')
+@click.argument('files', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('-n', '--name', help='Name of the imported playlist, by default the name of the file (a single file).')
+@click.option('--replace', is_flag=True, help='Replace the playlists with the same name.')
+def import_playlists(files: tuple[Path, ...], name: str | None, replace: bool) -> None:
+    """Imports M3U, M3U8 or PLS files as playlists.
+
+    The relative paths of the songs are resolved against the directory of each file, and the durations of the songs
+    (#EXTINF entries) are saved in the metadata store.
+    """
+    if name and len(files) > 1:
+        message = 'the name can only be given when a single file is imported'
+        raise click.UsageError(message)
+
+    _setup_logging()
+
+    directory = Path(CONFIG.data.general.playlist.directory).expanduser()
+    directory.mkdir(parents=True, exist_ok=True)
+    try:
+        for source in files:
+            destination = directory.joinpath(f'{name or source.stem}{PLAYLIST_SUFFIX}')
+            if destination.exists() and not replace:
+                message = f'the playlist "{destination.stem}" already exists, use --replace to replace it'
+                raise click.ClickException(message)
+
+            start = time.perf_counter()
+            try:
+                playlist = import_playlist(source, destination)
+            except (OSError, ValueError) as error:
+                raise click.ClickException(str(error)) from error
+            click.echo(
+                f'"{source}" imported as "{playlist.name}": {len(playlist.songs)} songs '
+                f'in {time.perf_counter() - start:.1f} s',
+            )
+    finally:
+        METADATA.close()
+
+
+@main.command()
+@click.argument('playlist')
+@click.argument('target', type=click.Path(dir_okay=False, path_type=Path))
+def export(playlist: str, target: Path) -> None:
+    """Exports a playlist as an M3U, M3U8 or PLS file, the format is chosen by the extension of TARGET.
+
+    PLAYLIST is the name of a playlist or the path to a playlist file. The durations of the analyzed songs are written
+    in the #EXTINF entries.
+    """
+    _setup_logging()
+
+    path = Path(playlist)
+    if not path.is_file():
+        path = Path(CONFIG.data.general.playlist.directory).expanduser().joinpath(f'{playlist}{PLAYLIST_SUFFIX}')
+    if not path.is_file():
+        message = f'the playlist "{playlist}" does not exist'
+        raise click.ClickException(message)
+
+    try:
+        count = export_playlist(PlayList(path), target)
+    except (OSError, ValueError) as error:
+        raise click.ClickException(str(error)) from error
+    finally:
+        METADATA.close()
+    click.echo(f'"{path.stem}" exported to "{target}": {count} songs')
@@ -0,0 +1,171 @@
+"""Module that contains the implementation of an equalizer widget."""
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, ClassVar
+
+from rich.text import Text
+from textual.binding import Binding, BindingType
+
+from cplayer.src.components.hidden_widget import HiddenWidget
+from cplayer.src.elements import CONFIG
+from cplayer.src.elements.dsp import BlockStats
+from cplayer.src.elements.equalizer import BANDS, MAX_GAIN, clamp_gain
+
+
+if TYPE_CHECKING:
+    from textual.timer import Timer
+
+
+class EqualizerWidget(HiddenWidget):
+    """Equalizer widget, with a row for the preamp and a row for each band.
+
+    The gain of the selected row is changed with the left and right keys, and every change is reported to the player.
+    The processing time of the blocks is displayed below the bands.
+    """
+
+    DEFAULT_CSS = Path(__file__).parent.joinpath('styles.css').read_text(encoding='UTF-8')
+
+    BINDINGS: ClassVar[list[BindingType]] = [
+        Binding('escape', 'quit', 'Quit', show=True),
+        Binding('up', 'select(-1)', 'Previous Band', show=False),
+        Binding('down', 'select(1)', 'Next Band', show=False),
+        Binding('left', 'change(-1)', 'Decrease Gain', show=True),
+        Binding('right', 'change(1)', 'Increase Gain', show=True),
+        Binding('space', 'toggle', 'Enable/Disable', show=True),
+        Binding('r', 'reset', 'Reset', show=True),
+    ]
+
+    BAR_WIDTH = 24
+    STEP = 1.0
+    REFRESH_INTERVAL = 1.0
+
+    can_focus = True
+
+    def __init__(
+        self,
+        on_change: Callable[[bool, list[float], float], None],
+        on_quit: Callable[[], None],
+        get_stats: Callable[[], BlockStats],
+    ) -> None:
+        """Initializes the Widget object.
+
+        :param on_change: A function called with the enabled state, the gains and the preamp when they change.
+        :param on_quit: A function called when the widget is closed.
+        :param get_stats: A function that gets the processing time of the blocks.
+        """
+        super().__init__()
+
+        self.on_change = on_change
+        self.on_quit = on_quit
+        self.get_stats = get_stats
+
+        self.enabled = CONFIG.data.general.equalizer.enabled
+        self.preamp = clamp_gain(CONFIG.data.general.equalizer.preamp)
+        self.gains = [clamp_gain(gain) for gain in CONFIG.data.general.equalizer.gains]
+        self.selected = 0
+
+        self._timer: Timer | None = None
+
+    def on_mount(self) -> None:
+        """Handles events on the mounting of the equalizer widget."""
+        self._timer = self.set_interval(self.REFRESH_INTERVAL, self._refresh_stats, pause=True)
+
+        super().on_mount()
+
+    def _refresh_stats(self) -> None:
+        """Redraws the equalizer with the current processing time of the blocks."""
+        self.refresh()
+
+    def show(self, focus: bool = True) -> None:  # noqa: FBT002
+        """Shows the equalizer and starts refreshing the processing time of the blocks.
+
+        :param focus: Whether to focus the equalizer.
+        """
+        super().show(focus)
+        if self._timer is not None:
+            self._timer.resume()
+
+    def hide(self) -> None:
+        """Hides the equalizer and stops refreshing the processing time of the blocks."""
+        super().hide()
+        if self._timer is not None:
+            self._timer.pause()
+
+    def _bar(self, gain: float, selected: bool) -> Text:  # noqa: FBT001
+        """Draws the bar of a gain, centered on 0 dB.
+
+        :param gain: The gain in decibels.
+        :param selected: Whether the row is selected.
+
+        :returns: The bar.
+        """
+        half = self.BAR_WIDTH // 2
+        filled = round(abs(gain) / MAX_GAIN * half)
+        left = ' ' * (half - filled) + '█' * filled if gain < 0 else ' ' * half
+        right = '█' * filled + ' ' * (half - filled) if gain > 0 else ' ' * half
+
+        style = CONFIG.data.appearance.style.colors.primary if selected else ''
+        return Text.assemble((left, style), ('│', 'dim'), (right, style))
+
+    def render(self) -> Text:
+        """Renders the equalizer.
+
+        :returns: The rows of the preamp and the bands, and the processing time of the blocks.
+        """
+        text = Text(no_wrap=True, overflow='crop')
+        text.append(f'Equalizer {"on" if self.enabled else "off"}\n', style='bold' if self.enabled else 'dim')
+
+        labels = ['preamp', *(f'{band / 1000:g} kHz' if band >= 1000 else f'{band} Hz' for band in BANDS)]  # noqa: PLR2004
+        for row, (label, gain) in enumerate(zip(labels, [self.preamp, *self.gains], strict=True)):
+            selected = row == self.selected
+            text.append(f'{"❱" if selected else " "} {label:>8} ')
+            text.append_text(self._bar(gain, selected))
+            text.append(f' {gain:+5.1f} dB\n')
+
+        stats = self.get_stats()
+        text.append(
+            f'block {stats.mean * 1000:.2f} ms (max {stats.maximum * 1000:.2f} ms), load {stats.load:.1%}',
+            style='dim',
+        )
+        return text
+
+    def _notify(self) -> None:
+        """Reports the settings to the player and redraws the equalizer."""
+        self.on_change(self.enabled, list(self.gains), self.preamp)
+        self.refresh()
+
+    def action_select(self, offset: int) -> None:
+        """Selects another row.
+
+        :param offset: The offset of the row to select.
+        """
+        self.selected = (self.selected + offset) % (len(BANDS) + 1)
+        self.refresh()
+
+    def action_change(self, direction: int) -> None:
+        """Changes the gain of the selected row by one step.
+
+        :param direction: 1 to increase the gain, -1 to decrease it.
+        """
+        if self.selected == 0:
+            self.preamp = clamp_gain(self.preamp + direction * self.STEP)
+        else:
+            self.gains[self.selected - 1] = clamp_gain(self.gains[self.selected - 1] + direction * self.STEP)
+        self._notify()
+
+    def action_toggle(self) -> None:
+        """Enables or disables the equalizer."""
+        self.enabled = not self.enabled
+        self._notify()
+
+    def action_reset(self) -> None:
+        """Sets all the gains to 0 dB."""
+        self.preamp = 0.0
+        self.gains = [0.0] * len(BANDS)
+        self._notify()
+
+    def action_quit(self) -> None:
+        """Closes the equalizer."""
+        self.hide()
+        self.on_quit()
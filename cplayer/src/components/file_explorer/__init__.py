@@ -1,18 +1,32 @@
 """Module that contains the implementation of a file explorer widget."""
 
 import logging
-from collections.abc import Callable, Iterable
+import os
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
 from typing import ClassVar
 
+from rich.style import Style
+from rich.text import Text
+from textual import work
 from textual.binding import Binding, BindingType
 from textual.widgets import DirectoryTree
+from textual.widgets._directory_tree import DirEntry
+from textual.widgets.tree import TreeNode
+from textual.worker import Worker, get_current_worker
 
 from cplayer.src.components.hidden_widget import HiddenWidget
+from cplayer.src.elements import CONFIG
+from cplayer.src.elements.directory_index import DirectoryIndex
+from cplayer.src.elements.formats import is_supported
 
 
 class FileExplorerWidget(DirectoryTree, HiddenWidget):  # pylint: disable=too-many-ancestors
-    """File explorer widget."""
+    """File explorer widget.
+
+    The directories are listed with `os.scandir`, and the number of audio files of each directory is counted in
+    background and displayed next to its name, the directories without audio files can be hidden.
+    """
 
     DEFAULT_CSS = Path(__file__).parent.joinpath('styles.css').read_text(encoding='UTF-8')
 
@@ -20,6 +34,7 @@ class FileExplorerWidget(DirectoryTree, HiddenWidget):  # pylint: disable=too-ma
         Binding('escape', 'quit', 'Quit', show=True),
         Binding('enter', 'select', 'Select', show=True),
         Binding('right', 'open', 'Open', show=True),
+        Binding('.', 'toggle_empty', 'Empty Folders', show=True),
     ]
 
     def __init__(  # noqa: PLR0913
@@ -44,12 +59,50 @@ class FileExplorerWidget(DirectoryTree, HiddenWidget):  # pylint: disable=too-ma
         self.on_select = on_select
         self.on_quit = on_quit
 
+        self.hide_empty = CONFIG.data.general.explorer.hide_empty
+        self.directory_index = DirectoryIndex()
+
+        self._is_directory: dict[Path, bool] = {}
+
     def on_mount(self) -> None:
         """Handles events on the mounting of the file explorer."""
         super().on_mount()
 
         self.path = self.default_path
 
+    def _directory_content(self, location: Path, worker: Worker) -> Iterator[Path]:
+        """Loads the content of a directory, keeping the type of the entries reported by `os.scandir`.
+
+        :param location: The path to the directory.
+        :param worker: The worker that loads the directory.
+
+        :yields: The paths of the entries of the directory.
+        """
+        try:
+            with os.scandir(location) as entries:
+                for entry in entries:
+                    if worker.is_cancelled:
+                        break
+
+                    path = Path(entry.path)
+                    try:
+                        self._is_directory[path] = entry.is_dir()
+                    except OSError:
+                        self._is_directory[path] = False
+                    yield path
+        except OSError:
+            logging.warning('directory "%s" cannot be listed', location)
+
+    def _safe_is_dir(self, path: Path) -> bool:  # type: ignore[override]
+        """Indicates whether a path is a directory, using the type reported by `os.scandir` when it is known.
+
+        :param path: The path to check.
+
+        :returns: True if the path is a directory, False otherwise.
+        """
+        is_directory = self._is_directory.get(path)
+        return super()._safe_is_dir(path) if is_directory is None else is_directory
+
     def filter_paths(self, paths: Iterable[Path]) -> Iterable[Path]:
         """Filters the provided iterable of paths based on some criteria.
 
@@ -60,9 +113,75 @@ class FileExplorerWidget(DirectoryTree, HiddenWidget):  # pylint: disable=too-ma
         return [
             path
             for path in paths
-            if (not path.name.startswith('.')) and (path.is_dir() or path.suffix in ('.mp3', '.wav'))
+            if not path.name.startswith('.')
+            and (
+                (self._safe_is_dir(path) and not (self.hide_empty and self.directory_index.cached(path) == 0))
+                or is_supported(path)
+            )
         ]
 
+    def _populate_node(self, node: TreeNode[DirEntry], content: Iterable[Path]) -> None:
+        """Populates a node with the content of its directory and starts counting the audio files of its directories.
+
+        :param node: The node of the directory.
+        :param content: The paths of the entries of the directory.
+        """
+        super()._populate_node(node, content)
+
+        self._count_audio_files(node)
+
+    @work(thread=True, group='audio-files', exit_on_error=False)
+    def _count_audio_files(self, node: TreeNode[DirEntry]) -> None:
+        """Counts in background the audio files of the directories of a node.
+
+        :param node: The node of the directory.
+        """
+        worker = get_current_worker()
+        count = self.directory_index.count(node.data.path, lambda: worker.is_cancelled) if node.data else None
+        if count is not None:
+            self.app.call_from_thread(self._annotate, node)
+
+    def _annotate(self, node: TreeNode[DirEntry]) -> None:
+        """Displays the number of audio files of the directories of a node, hiding the empty ones if required.
+
+        :param node: The node of the directory.
+        """
+        if self.hide_empty and node.data is not None:
+            visible = set()
+            for child in list(node.children):
+                if child.data is not None and child.allow_expand:
+                    if self.directory_index.cached(child.data.path) == 0:
+                        child.remove()
+                    else:
+                        visible.add(child.data.path)
+
+            subdirectories = self.directory_index.subdirectories(node.data.path)
+            if any(count and path not in visible for path, count in subdirectories.items()):
+                self.reload_node(node)
+                return
+
+        self._invalidate()
+
+    def render_label(self, node: TreeNode[DirEntry], base_style: Style, style: Style) -> Text:
+        """Renders the label of a node, adding the number of audio files of the directories.
+
+        :param node: The node.
+        :param base_style: The base style of the widget.
+        :param style: The additional style for the label.
+
+        :returns: The label.
+        """
+        label = super().render_label(node, base_style, style)
+        if node.allow_expand and node.data is not None:
+            count = self.directory_index.cached(node.data.path)
+            label.append(f' ({count if count is not None else "…"})', style=Style(dim=True))
+        return label
+
+    def action_toggle_empty(self) -> None:
+        """Shows or hides the directories without audio files."""
+        self.hide_empty = not self.hide_empty
+        self.reload()
+
     def action_open(self) -> None:
         """Selects the selected cursor."""
         super().action_select_cursor()
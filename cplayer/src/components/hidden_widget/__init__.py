@@ -1,4 +1,8 @@
-"""Module that contains the implementation of a hidden widget."""
+"""Module that contains the implementation of a hidden widget.
+
+A hidden widget can be shown or hidden before it is mounted, the last requested visibility is applied when it is
+mounted, so the widgets that are rarely displayed can be created and mounted the first time they are shown.
+"""
 
 from textual.widget import Widget
 
@@ -35,10 +39,12 @@ class HiddenWidget(Widget):
         """Hide the widget."""
         self.display = False
         self.classes = 'hidden'
+        self._start_hidden = True
 
     def show(self, focus: bool = True) -> None:  # noqa: FBT002
         """Show the widget."""
         self.display = True
         self.classes = 'displayed'
+        self._start_hidden = False
         if focus:
             self.focus()
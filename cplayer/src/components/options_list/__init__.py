@@ -4,6 +4,9 @@ from collections.abc import Callable
 from pathlib import Path
 from typing import Any, ClassVar
 
+from rich.markup import escape
+from rich.text import Text
+from textual import events
 from textual.app import ComposeResult
 from textual.binding import Binding, BindingType
 from textual.containers import Middle, VerticalScroll
@@ -12,6 +15,8 @@ from textual.widgets import Label
 
 from cplayer.src.components.hidden_widget import HiddenWidget
 from cplayer.src.elements import CONFIG
+from cplayer.src.elements.instrumentation import METRICS
+from cplayer.src.elements.label_index import LabelIndex
 
 
 try:
@@ -20,8 +25,12 @@ except ImportError:
     from typing_extensions import Self
 
 
-class CustomListView(VerticalScroll):
-    """Custom list view."""
+class CustomListView(VerticalScroll):  # pylint: disable=too-many-instance-attributes
+    """Custom list view.
+
+    Only the options of the visible window are drawn, and the row of an option is only rendered the first time it is
+    visible. The options are filtered as the user types (type-ahead) after pressing the search shortcut.
+    """
 
     BINDINGS: ClassVar[list[BindingType]] = [
         Binding('up', 'cursor_up', 'Cursor Up', show=False),
@@ -35,22 +44,34 @@ class CustomListView(VerticalScroll):
         on_quit: Callable[[], None],
         on_select: Callable[[Path | str], None],
         *children: Widget,
+        on_filter: Callable[[str | None, int, int], None] | None = None,
     ) -> None:
         """Initializes the Widget object.
 
         :param on_quit: A function to be called when quitting the list view.
         :param on_select: A function to be called when an option is selected.
         :param *children: Variable length argument list for child elements to add initially.
+        :param on_filter: A function to be called with the query (None when the options are not filtered), the number
+            of matching options and the number of options when the filter changes.
         """
         super().__init__(*children)
 
         self._on_quit = on_quit
         self._on_select = on_select
+        self._on_filter = on_filter
 
         self.options: list[Option] = []
+        self.displayed: list[int] = []
         self.index = 0
+        self.query: str | None = None
+
+        self._top = 0
+        self._rows: list[str | None] = []
+        self._index: LabelIndex | None = None
+        self._history: list[tuple[str, list[int]]] = []
 
         self._colors = CONFIG.data.appearance.style.colors
+        self._search_key = CONFIG.data.general.shortcuts.playlist.search_songs
 
         self.content = Label('No data.')
 
@@ -61,32 +82,120 @@ class CustomListView(VerticalScroll):
         """
         yield self.content
 
+    @property
+    def highlighted(self) -> 'Option | None':
+        """Gets the highlighted option, None if no option is displayed."""
+        return self.options[self.displayed[self.index]] if self.displayed else None
+
+    def _row(self, position: int) -> str:
+        """Gets the rendered row of an option, it is rendered the first time it is requested.
+
+        :param position: The position of the option.
+
+        :returns: The markup of the row, without the highlight color.
+        """
+        row = self._rows[position]
+        if row is None:
+            option = self.options[position]
+            row = self._rows[position] = f'{option.prefix}{option.to_string(option.data)}'
+        return row
+
+    @METRICS.timed('options.draw')
     def draw(self) -> None:
-        """Draws the listview with the current status."""
+        """Draws the visible window of the options with the current status."""
+        height = self.scrollable_content_region.height or self.app.size.height
+        if self.index < self._top:
+            self._top = self.index
+        elif self.index >= self._top + height:
+            self._top = self.index - height + 1
+        self._top = max(min(self._top, len(self.displayed) - height), 0)
+
         rows = []
-        for index, option in enumerate(self.options):
-            rows.append(
-                f'[{self._colors.primary if (index == self.index) else self._colors.text}]'
-                f'{option.prefix}{option.to_string(option.data)}',
-            )
+        for index in range(self._top, min(self._top + height, len(self.displayed))):
+            color = self._colors.primary if (index == self.index) else self._colors.text
+            rows.append(f'[{color}]{self._row(self.displayed[index])}')
         self.content.update('\n'.join(rows))
 
+    def on_resize(self) -> None:
+        """Draws the options again when the size of the visible window changes."""
+        self.draw()
+
     def update(self, options: list['Option']) -> None:
         """Updates the list view with a new set of options.
 
         :param options: A list of option objects representing the new options.
         """
         self.options = options
+        self.displayed = list(range(len(options)))
+        self.index = 0
+        self.query = None
+
+        self._top = 0
+        self._rows = [None] * len(options)
+        self._index = None
+        self._history = []
+        self.draw()
+
+    @METRICS.timed('options.filter')
+    def filter(self, query: str | None) -> None:
+        """Displays only the options matching a query, the options starting with it come first.
+
+        :param query: The query compared to the labels of the options without case, None to display all the options.
+        """
+        self.query = query
+        if not query:
+            self.displayed = list(range(len(self.options)))
+            self._history = []
+        else:
+            if self._index is None:
+                self._index = LabelIndex([option.label for option in self.options])
+
+            while self._history and not query.startswith(self._history[-1][0]):
+                self._history.pop()
+            candidates = self._history[-1][1] if self._history else None
+            self.displayed = self._index.search(query, candidates)
+            self._history.append((query, self.displayed))
+
         self.index = 0
+        self._top = 0
         self.draw()
 
+        if self._on_filter is not None:
+            self._on_filter(self.query, len(self.displayed), len(self.options))
+
+    def on_key(self, event: events.Key) -> None:
+        """Handles the keys of the type-ahead filter.
+
+        The search shortcut starts the filter, then the printable characters are added to the query and `backspace`
+        removes the last one. The other keys are handled by the bindings.
+
+        :param event: The key event.
+        """
+        if self.query is None:
+            if self._search_key not in {event.key, event.character}:
+                return
+            query = ''
+        elif event.key == 'backspace':
+            query = self.query[:-1]
+        elif event.is_printable and event.character:
+            query = self.query + event.character
+        else:
+            return
+
+        event.stop()
+        event.prevent_default()
+        self.filter(query)
+
     def action_quit(self) -> None:
-        """Calls the quit callback."""
-        self._on_quit()
+        """Clears the type-ahead filter, or calls the quit callback if the options are not filtered."""
+        if self.query is not None:
+            self.filter(None)
+        else:
+            self._on_quit()
 
     def action_cursor_down(self) -> None:
         """Highlight the previous item in the list."""
-        if self.index < len(self.options) - 1:
+        if self.index < len(self.displayed) - 1:
             self.index += 1
             self.draw()
 
@@ -98,24 +207,40 @@ class CustomListView(VerticalScroll):
 
     def action_select_option(self) -> None:
         """Runs the `self.on_select` callback with the selected option."""
-        if self.options:
-            self._on_select(self.options[self.index].data)
+        option = self.highlighted
+        if option is not None:
+            self._on_select(option.data)
 
 
 class Option:  # pylint: disable=too-few-public-methods
     """Option in the list view."""
 
-    def __init__(self, data: Path | str, prefix: str, to_string: Callable[[Any], str]) -> None:
+    def __init__(
+        self,
+        data: Path | str,
+        prefix: str,
+        to_string: Callable[[Any], str],
+        to_label: Callable[[Any], str] | None = None,
+    ) -> None:
         """Initializes the Widget object.
 
         :param data: The data associated with the option.
         :param prefix: A prefix to display before the option text.
-        :param *args: Variable length argument list.
-        :param **kwargs: Arbitrary keyword arguments.
+        :param to_string: A function that gets the markup of the option text from its data.
+        :param to_label: A function that gets the plain label of the option from its data, the text compared to the
+            type-ahead query. By default, the plain option text is used.
         """
         self.data = data
         self.prefix = prefix
         self.to_string = to_string
+        self.to_label = to_label
+
+    @property
+    def label(self) -> str:
+        """Gets the plain label of the option, without its prefix."""
+        if self.to_label is not None:
+            return self.to_label(self.data)
+        return Text.from_markup(self.to_string(self.data)).plain
 
 
 class OptionsListWidget(HiddenWidget):
@@ -150,7 +275,21 @@ class OptionsListWidget(HiddenWidget):
         self._on_select = on_select
 
         self.label = Label(self._label, classes='bold')
-        self.list_view = CustomListView(lambda: self._on_quit(self), self._on_select, *children)
+        self.list_view = CustomListView(
+            lambda: self._on_quit(self), self._on_select, *children, on_filter=self._update_label
+        )
+
+    def _update_label(self, query: str | None, count: int, total: int) -> None:
+        """Displays the type-ahead filter next to the label.
+
+        :param query: The query of the filter, None when the options are not filtered.
+        :param count: The number of matching options.
+        :param total: The number of options.
+        """
+        if query is None:
+            self.label.update(self._label)
+        else:
+            self.label.update(f'{self._label} [not bold]/{escape(query)}[/not bold] [dim]({count}/{total})[/dim]')
 
     def compose(self) -> ComposeResult:
         """Composes the layout for the Widget.
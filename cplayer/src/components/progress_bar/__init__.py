@@ -33,6 +33,10 @@ class ProgressStatusWidget(Widget):
             f'[{CONFIG.data.appearance.style.colors.paused_label}]{CONFIG.data.appearance.style.icons.reproduce} '
             'paused'
         ).ljust(22)
+        TRANSCODING = (
+            f'[{CONFIG.data.appearance.style.colors.paused_label}]{CONFIG.data.appearance.style.icons.reproduce} '
+            'transcoding…'
+        ).ljust(22)
 
     DEFAULT_CSS = Path(__file__).parent.joinpath('styles.css').read_text(encoding='UTF-8')
 
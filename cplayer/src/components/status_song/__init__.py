@@ -36,6 +36,8 @@ class StatusSong(HiddenWidget):
         self.position = Label('NaN/NaN')
         self.progress = ProgressStatusWidget()
         self.song = Label('-', classes='bold')
+        self.format = Label('', classes='format')
+        self._format_text = ''
         self.volume = VolumeBarWidget(default_volume=volume)
 
     def compose(self) -> ComposeResult:
@@ -47,4 +49,21 @@ class StatusSong(HiddenWidget):
             yield self.position
             yield self.progress
             yield self.song
+            yield self.format
             yield self.volume
+
+    def set_format(self, track_format: tuple[int, int] | None, output_format: tuple[int, int] | None) -> None:
+        """Displays the format of the current song, and the output format if the song is resampled.
+
+        :param track_format: The sample rate and the number of channels of the song.
+        :param output_format: The sample rate and the number of channels of the mixer.
+        """
+        text = ''
+        if track_format is not None:
+            text = f'{track_format[0] / 1000:g} kHz {track_format[1]}ch'
+            if output_format is not None and output_format != track_format:
+                text += f' → {output_format[0] / 1000:g} kHz {output_format[1]}ch'
+
+        if text != self._format_text:
+            self._format_text = text
+            self.format.update(f'[dim]{text}[/dim]' if text else '')
@@ -1,24 +1,37 @@
 """Package representing a playlist widget."""
 
+import math
+import os
 import random
+import stat
 from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 from difflib import SequenceMatcher
 from enum import Enum
+from itertools import compress
 from pathlib import Path
 from typing import ClassVar
 
 import numpy as np
-from pydub import AudioSegment
 from pydub.logging_utils import logging
 from rich.console import Console
+from textual import work
 from textual.app import ComposeResult
 from textual.binding import Binding, BindingType
 from textual.containers import VerticalScroll
 from textual.geometry import Region
 from textual.widget import Widget
 from textual.widgets import Label
+from textual.worker import Worker, get_current_worker
 
 from cplayer.src.elements import CONFIG
+from cplayer.src.elements.decoder_pool import DECODERS
+from cplayer.src.elements.formats import AudioInfo, is_streamable, is_supported, probe
+from cplayer.src.elements.instrumentation import METRICS
+from cplayer.src.elements.metadata import METADATA
+from cplayer.src.elements.session import MISSING_UNKNOWN, SessionSnapshot
+from cplayer.src.elements.track_table import TrackTable
 
 
 try:
@@ -30,22 +43,60 @@ except ImportError:
 class Song:
     """Song item."""
 
-    def __init__(self, path: Path, on_play: Callable[['Song'], None]) -> None:
+    __slots__ = ('_path', '_seconds', '_selected', 'channels', 'frame_rate', 'missing', 'on_play')
+
+    _probing: ClassVar[dict[str, Future[AudioInfo]]] = {}
+
+    def __init__(self, path: Path | str, on_play: Callable[['Song'], None]) -> None:
         """Initializes the Widget object.
 
-        :param path: The path to the audio file.
+        :param path: The path to the audio file, the Path object is only created when it is used.
         :param *args: Variable length argument list.
         :param **kwargs: Arbitrary keyword arguments.
         """
-        self.path = path
+        self._path = path
         self.on_play = on_play
 
-        self._seconds = None
-        self._audio = None
-        self.frame_rate = None
-        self._buffer = None
+        self._seconds: float | None = None
+        self.frame_rate: int | None = None
+        self.channels: int | None = None
         self._selected = False
 
+        self.missing: bool | None = None
+
+    @property
+    def path(self) -> Path:
+        """Gets the path to the audio file."""
+        if not isinstance(self._path, Path):
+            self._path = Path(self._path)
+        return self._path
+
+    @property
+    def location(self) -> str:
+        """Gets the path to the audio file as a string."""
+        return str(self._path)
+
+    @property
+    def stem(self) -> str:
+        """Gets the name of the audio file without its extension, used to sort the tracklist."""
+        name = self.location.rpartition(os.sep)[2]
+        stem, _, suffix = name.rpartition('.')
+        return stem if stem and suffix else name
+
+    @property
+    def cached_seconds(self) -> float | None:
+        """Gets the duration of the audio if it is already known, without reading the file."""
+        return self._seconds
+
+    def set_status(self, missing: bool | None, seconds: float | None) -> None:
+        """Sets the status of the song, as known from a previous session, or clears it to check the audio file again.
+
+        :param missing: Whether the audio file is missing, None if it is unknown.
+        :param seconds: The duration of the audio in seconds, None if it is unknown.
+        """
+        self.missing = missing
+        self._seconds = seconds
+
     @property
     def selected(self) -> bool:
         """Indicates whether the song is selected."""
@@ -58,6 +109,54 @@ class Song:
 
         self._selected = is_selected
 
+    def stat(self) -> os.stat_result | None:
+        """Reads the status of the audio file, flagging the song as missing if it does not exist.
+
+        :returns: The status of the file, or None if it does not exist.
+        """
+        try:
+            file_status = os.stat(self.location)  # noqa: PTH116
+        except OSError:
+            file_status = None
+
+        self.missing = file_status is None or not stat.S_ISREG(file_status.st_mode)
+        if self.missing:
+            logging.warning('song not found: "%s"', self.location)
+            return None
+        return file_status
+
+    def exists(self) -> bool:
+        """Checks whether the audio file exists, flagging the song as missing if it does not.
+
+        :returns: True if the audio file exists, False otherwise.
+        """
+        return self.stat() is not None
+
+    def known_seconds(self, file_status: os.stat_result, stored: tuple[int, int, float] | None) -> float | None:
+        """Gets the duration of the audio without decoding it, from the metadata store or the file headers.
+
+        :param file_status: The status of the audio file.
+        :param stored: The size, the modification time and the duration of the song in the metadata store, if any.
+
+        :returns: The duration of the audio in seconds, or None if the song must be decoded to know it.
+        """
+        if self._seconds is None:
+            if stored is not None and stored[:2] == (file_status.st_size, file_status.st_mtime_ns):
+                self._seconds = stored[2]
+            else:
+                try:
+                    info = probe(self.path)
+                except OSError:
+                    info = None
+                if info is not None:
+                    self._seconds, self.frame_rate, self.channels = info.seconds, info.frame_rate, info.channels
+        return self._seconds
+
+    @property
+    def streamable(self) -> bool:
+        """Indicates whether the mixer can stream the song without transcoding it."""
+        return is_streamable(self.path)
+
     def play(self) -> None:
         """Plays the audio associated with the song."""
         self.on_play(self)
@@ -66,30 +165,75 @@ class Song:
     def seconds(self) -> float | None:
         """Calculates and returns the duration of the audio in seconds.
 
-        :returns: The duration of the audio in seconds.
+        The duration is read from the file headers or the metadata store (see `cplayer scan`). If the headers could not
+        be read and the song was not analyzed, the song is decoded by a worker of the decoder pool without waiting for
+        it: the duration is unknown until the worker finishes.
+
+        :returns: The duration of the audio in seconds, None while the song is decoded.
+
+        :raises NotImplementedError: If the audio format is not supported.
         """
+        if METRICS.enabled:
+            METRICS.increment('metadata.miss' if self._seconds is None else 'metadata.hit')
+
         if self._seconds is None:
-            if self.path.suffix == '.mp3':
-                self._audio = AudioSegment.from_mp3(self.path)
-            elif self.path.suffix == '.wav':
-                self._audio = AudioSegment.from_wav(self.path)
-            else:
+            if not is_supported(self.path):
                 raise NotImplementedError
 
-            if self._audio:
-                self._seconds = len(self._audio) / 1000.0
-                self.frame_rate = self._audio.frame_rate
+            info = probe(self.path)
+            track = METADATA.get(self.path) if info is None else None
+            if info is not None:
+                self._seconds = info.seconds
+                self.frame_rate = info.frame_rate
+                self.channels = info.channels
+            elif track is not None and track.seconds and track.matches(self.path):
+                self._seconds = track.seconds
+                self.frame_rate = track.frame_rate
+                self.channels = track.channels
+            elif self.location not in self._probing:
+                logging.info('unable to read the headers of "%s", decoding it...', self.path)
+                future = DECODERS.probe(self.path)
+                self._probing[self.location] = future
+                future.add_done_callback(self._set_probed)
         return self._seconds
 
-    @property
-    def buffer(self) -> np.ndarray | None:
-        """Returns the audio data as a numpy array.
+    def _set_probed(self, future: Future[AudioInfo]) -> None:
+        """Sets the stream information of the song once it is decoded by a worker of the decoder pool.
+
+        The failed decodings are kept, so the song is not decoded again.
 
-        :returns: The audio data as a numpy array.
+        :param future: The future of the decoding.
         """
-        if self._buffer is None and self._audio:
-            self._buffer = np.array(self._audio.get_array_of_samples())
-        return self._buffer
+        try:
+            info = future.result()
+        except Exception:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+            logging.exception('error decoding the song "%s"', self.path)
+            return
+
+        self._seconds = info.seconds
+        self.frame_rate = info.frame_rate
+        self.channels = info.channels
+        self._probing.pop(self.location, None)
+
+
+class ChangeKind(Enum):
+    """Kinds of changes of the songs of the tracklist."""
+
+    INSERT = 'insert'
+    REMOVE = 'remove'
+    MOVE = 'move'
+    REPLACE = 'replace'
+    REORDER = 'reorder'
+
+
+@dataclass
+class TracklistChange:
+    """Change of the songs of the tracklist, the displayed songs before `start` are not affected."""
+
+    kind: ChangeKind
+    start: int
+    removed: list[Song] = field(default_factory=list)
+    inserted: list[Song] = field(default_factory=list)
 
 
 class PlaylistOrder(Enum):
@@ -105,6 +249,8 @@ class TracklistWidget(VerticalScroll):  # pylint: disable=too-many-instance-attr
 
     DEFAULT_CSS = Path(__file__).parent.joinpath('styles.css').read_text(encoding='UTF-8')
 
+    CHECK_BATCH_SIZE = 512
+
     BINDINGS: ClassVar[list[BindingType]] = [
         Binding(CONFIG.data.general.shortcuts.playlist.up, 'cursor_up', 'Cursor Up', show=False),
         Binding(CONFIG.data.general.shortcuts.playlist.down, 'cursor_down', 'Cursor Down', show=False),
@@ -121,6 +267,7 @@ class TracklistWidget(VerticalScroll):  # pylint: disable=too-many-instance-attr
         on_change_position: Callable[[int, int], None],
         order: PlaylistOrder = PlaylistOrder.ASCENDING,
         fixed_size: int = 0,
+        on_change: Callable[[TracklistChange], None] | None = None,
         *children: Widget,
         name: str | None = None,
         id: str | None = None,
@@ -133,6 +280,7 @@ class TracklistWidget(VerticalScroll):  # pylint: disable=too-many-instance-attr
         :param on_cursor_left: A function to be called when moving the cursor to the left.
         :param on_cursor_right: A function to be called when moving the cursor to the right.
         :param order: The order in which the playlist is played.
+        :param on_change: A function to be called when songs are inserted, removed, moved or reordered.
         :param **kwargs: Arbitrary keyword arguments.
         """
         super().__init__(*children, name=name, id=id, classes=classes, disabled=disabled)
@@ -143,6 +291,7 @@ class TracklistWidget(VerticalScroll):  # pylint: disable=too-many-instance-attr
         self.on_cursor_left = on_cursor_left
         self.on_cursor_right = on_cursor_right
         self.on_change_position = on_change_position
+        self.on_change = on_change
 
         self.order = order
 
@@ -158,7 +307,18 @@ class TracklistWidget(VerticalScroll):  # pylint: disable=too-many-instance-attr
         self.items_length = 0
         self.index = 0
 
-        self.filter_pattern: str | None = None
+        self._rows: np.ndarray | None = None
+
+        self.table: TrackTable | None = None
+
+        self.filter_query = ''
+        self._filter_pending = False
+
+        self._encoded_songs: tuple[list[Song], int, bytes] | None = None
+
+        self._marked = 0
+        self._check_worker: Worker[None] | None = None
+        self._recheck = False
 
         self.content = Label('No data.')
 
@@ -209,6 +369,15 @@ class TracklistWidget(VerticalScroll):  # pylint: disable=too-many-instance-attr
             self.index = min(position - 1, self.items_length - 1)
         self.draw()
 
+    def upcoming(self, count: int) -> list[Song]:
+        """Gets the songs that will be played after the highlighted one.
+
+        :param count: The maximum number of songs.
+
+        :returns: The upcoming songs in the tracklist order.
+        """
+        return self.items[self.index + 1 : self.index + 1 + count]
+
     def next_song(self) -> None:
         """Goes to the next song."""
         self.action_cursor_down()
@@ -233,21 +402,28 @@ class TracklistWidget(VerticalScroll):  # pylint: disable=too-many-instance-attr
         """Performs the action associated with moving the cursor to the right."""
         self.on_cursor_right()
 
+    @METRICS.timed('tracklist.draw')
     def draw(self) -> None:
         """Draws the tracklist to display new songs."""
-        if self.filter_pattern is not None:
-            items = [song for song in self.items if self.filter_pattern in song.path.name]
-        else:
-            items = self.items
-
         rows = []
-        for index, song in enumerate(items[self.index : self.index + self.length]):
-            is_current_song = self.current_song is not None and song.path == self.current_song.path
-            rows.append(
-                f'[{self._colors.text}]'
-                f'{f"[{self._colors.playing_label}]" if is_current_song else CONFIG.data.appearance.style.icons.song} '
-                f'[{self._colors.primary if (index == 0) else self._colors.text}]{song.path.name}',
-            )
+        for index, song in enumerate(self.items[self.index : self.index + self.length]):
+            if song.missing is None:
+                song.exists()
+
+            is_current_song = self.current_song is not None and song.location == self.current_song.location
+            if song.missing:
+                icon = f'[{self._colors.missing_label}]{CONFIG.data.appearance.style.icons.missing}'
+            elif is_current_song:
+                icon = f'[{self._colors.playing_label}]'
+            else:
+                icon = CONFIG.data.appearance.style.icons.song
+            if index == 0:
+                color = self._colors.primary
+            elif song.selected:
+                color = self._colors.marked_label
+            else:
+                color = self._colors.text
+            rows.append(f'[{self._colors.text}]{icon} [{color}]{song.path.name}')
 
         self.content.update('\n'.join(rows))
         self.on_change_position(self.index, self.items_length)
@@ -264,27 +440,231 @@ class TracklistWidget(VerticalScroll):  # pylint: disable=too-many-instance-attr
             self.index -= 1
             self.draw()
 
-    def delete_selected_song(self) -> Path | None:
-        """Deletes the selected song.
+    @property
+    def marked_positions(self) -> list[int]:
+        """Gets the positions of the marked songs, or the position of the highlighted song if none is marked."""
+        if self._marked:
+            positions = [index for index, song in enumerate(self.items) if song.selected]
+            if positions:
+                return positions
+        return [self.index] if self.items_length else []
+
+    def toggle_mark(self) -> None:
+        """Marks or unmarks the highlighted song, then highlights the next one."""
+        if not self.items_length:
+            return
+
+        song = self.items[self.index]
+        song.selected = not song.selected
+        self._marked += 1 if song.selected else -1
+
+        if self.index < self.items_length - 1:
+            self.index += 1
+        self.draw()
+
+    def _view_rows(self) -> np.ndarray:
+        """Gets the rows of the displayed songs, their positions in the songs of the tracklist.
+
+        The displayed songs are always in the order of the songs of the tracklist: the manual displacements and the
+        orders apply to both.
+
+        :returns: The sorted rows of the displayed songs.
+        """
+        return np.arange(self.items_length) if self._rows is None else self._rows
+
+    def _changed(self, change: TracklistChange) -> None:
+        """Updates the tracklist after its songs changed, the rows are only drawn again if the change is visible.
+
+        :param change: The change of the songs.
+        """
+        self.items_length = len(self.items)
+        self.index = max(min(self.index, self.items_length - 1), 0)
+        if change.start < self.index + self.length:
+            self.draw()
+        else:
+            self.on_change_position(self.index, self.items_length)
+
+        if self.on_change is not None:
+            self.on_change(change)
 
-        :returns: The path of the deleted song.
+        running = self._check_worker is not None and self._check_worker.is_running
+        if running or (change.inserted and change.kind != ChangeKind.MOVE):
+            self._start_check(recheck=self._recheck and running)
+
+    def _permute(self, order: np.ndarray) -> None:
+        """Reorders the displayed songs, the songs that are not displayed keep their positions.
+
+        :param order: The positions of the displayed songs, in their new order.
         """
-        if self.index is not None:
-            songs = [song.path for song in self.items]
-            deleted_song = songs[self.index]
+        rows = self._view_rows()
+        permutation = np.arange(len(self.items_unfilter))
+        permutation[rows] = rows[order]
+
+        self.items = list(map(self.items.__getitem__, order.tolist()))
+        if self._rows is None:
+            self.items_unfilter = self.items.copy()
+        else:
+            self.items_unfilter = list(map(self.items_unfilter.__getitem__, permutation.tolist()))
+        if self.table is not None:
+            self.table = self.table.take(permutation)
+
+    def _remove_songs(self, positions: list[int]) -> list[Song]:
+        """Removes displayed songs, without updating the tracklist.
 
-            del songs[self.index]
+        :param positions: The sorted positions of the songs to remove.
 
-            new_size = len(songs)
-            self.set_songs(
-                songs,
-                position=(new_size - 1) if (self.index >= new_size) else self.index,
+        :returns: The removed songs.
+        """
+        rows = self._view_rows()[positions]
+        removed = [self.items[position] for position in positions]
+
+        keep = np.ones(len(self.items_unfilter), dtype=bool)
+        keep[rows] = False
+        self.items_unfilter = list(compress(self.items_unfilter, keep.tolist()))
+        if self._rows is None:
+            self.items = self.items_unfilter.copy()
+        else:
+            displayed = np.ones(len(self.items), dtype=bool)
+            displayed[positions] = False
+            remaining = self._rows[displayed]
+            self._rows = remaining - np.searchsorted(rows, remaining)
+            self.items = list(compress(self.items, displayed.tolist()))
+        if self.table is not None:
+            self.table = self.table.without(rows)
+
+        self._marked -= sum(song.selected for song in removed)
+        self.items_length = len(self.items)
+        return removed
+
+    def _insert_songs(self, position: int, songs: list[Song]) -> None:
+        """Inserts songs before a displayed song, without updating the tracklist.
+
+        :param position: The position of the first inserted song.
+        :param songs: The songs to insert.
+        """
+        count = len(songs)
+        if self._rows is None:
+            row = position
+        else:
+            row = int(self._rows[position]) if position < len(self._rows) else len(self.items_unfilter)
+            self._rows = np.concatenate(
+                (self._rows[:position], np.arange(row, row + count), self._rows[position:] + count)
             )
+
+        self.items_unfilter = [*self.items_unfilter[:row], *songs, *self.items_unfilter[row:]]
+        self.items = [*self.items[:position], *songs, *self.items[position:]]
+        if self.table is not None:
+            self.table = self.table.with_songs(row, [song.location for song in songs])
+
+        self._marked += sum(song.selected for song in songs)
+        self.items_length = len(self.items)
+
+    @METRICS.timed('tracklist.move')
+    def move(self, positions: list[int], target: int) -> None:
+        """Moves songs as a block, in their current order, so the first one is at a new position.
+
+        The highlighted song keeps being highlighted if it is moved, otherwise the first moved song is highlighted.
+
+        :param positions: The sorted positions of the songs to move.
+        :param target: The new position of the first song, clamped to the size of the tracklist.
+        """
+        if not positions:
+            return
+
+        target = min(max(target, 0), self.items_length - len(positions))
+        offset = positions.index(self.index) if self.index in positions else 0
+        moved = [self.items[position] for position in positions]
+
+        remaining = np.delete(np.arange(self.items_length), positions)
+        self._permute(np.concatenate((remaining[:target], positions, remaining[target:])))
+
+        self.index = target + offset
+        self._changed(TracklistChange(ChangeKind.MOVE, min(positions[0], target), moved, moved))
+
+    @METRICS.timed('tracklist.remove')
+    def remove(self, positions: list[int]) -> list[Path]:
+        """Removes songs from the tracklist, the remaining songs and their metadata are kept as they are.
+
+        :param positions: The sorted positions of the songs to remove.
+
+        :returns: The paths of the removed songs.
+        """
+        if not positions:
+            return []
+
+        removed = self._remove_songs(positions)
+        self.index = positions[0]
+        self._changed(TracklistChange(ChangeKind.REMOVE, positions[0], removed=removed))
+        return [song.path for song in removed]
+
+    @METRICS.timed('tracklist.insert')
+    def insert(self, position: int, paths: list[Path]) -> None:
+        """Inserts new songs in the tracklist, the highlighted song keeps being highlighted.
+
+        In a filtered tracklist, the songs are inserted before the song displayed at the position (or after all the
+        songs at the end), and they are displayed even if they do not match the filter.
+
+        :param position: The position of the first new song, clamped to the size of the tracklist.
+        :param paths: The paths to the audio files.
+        """
+        if not paths:
+            return
+
+        position = min(max(position, 0), self.items_length)
+        songs = [Song(path, on_play=self.on_select) for path in paths]
+
+        if self.items_length and position <= self.index:
+            self.index += len(songs)
+        self._insert_songs(position, songs)
+        self._changed(TracklistChange(ChangeKind.INSERT, position, inserted=songs))
+
+    @METRICS.timed('tracklist.replace')
+    def replace(self, start: int, stop: int, paths: list[Path]) -> None:
+        """Replaces a range of songs, the replaced songs that are kept are not checked again.
+
+        :param start: The position of the first replaced song.
+        :param stop: The position after the last replaced song.
+        :param paths: The paths to the audio files of the new songs.
+        """
+        start = min(max(start, 0), self.items_length)
+        stop = min(max(stop, start), self.items_length)
+
+        removed = self._remove_songs(list(range(start, stop)))
+        kept = {song.location: song for song in removed}
+        songs = [kept.pop(str(path), None) or Song(path, on_play=self.on_select) for path in paths]
+
+        self._insert_songs(start, songs)
+        self._changed(TracklistChange(ChangeKind.REPLACE, start, removed, songs))
+
+    @METRICS.timed('tracklist.reorder')
+    def reorder(self) -> None:
+        """Sorts all the songs in the order of the tracklist, the displayed songs and the highlighted song are kept."""
+        songs = self.items_unfilter
+        if self.order == PlaylistOrder.RANDOM:
+            order = list(range(len(songs)))
+            random.shuffle(order)
+        else:
+            stems = [song.stem for song in songs]
+            order = sorted(range(len(songs)), key=stems.__getitem__, reverse=self.order == PlaylistOrder.DESCENDANT)
+        permutation = np.array(order, dtype=np.int64)
+        positions = np.empty_like(permutation)
+        positions[permutation] = np.arange(len(songs))
+
+        highlighted = int(self._view_rows()[self.index]) if self.items_length else 0
+        self.items_unfilter = list(map(songs.__getitem__, permutation.tolist()))
+        if self._rows is None:
+            self.items = self.items_unfilter.copy()
+            self.index = int(positions[highlighted]) if self.items_length else 0
         else:
-            deleted_song = None
+            self._rows = np.sort(positions[self._rows])
+            self.items = list(map(self.items_unfilter.__getitem__, self._rows.tolist()))
+            self.index = int(np.searchsorted(self._rows, positions[highlighted])) if self.items_length else 0
+        if self.table is not None:
+            self.table = self.table.take(permutation)
 
-        return deleted_song
+        self._changed(TracklistChange(ChangeKind.REORDER, 0))
 
+    @METRICS.timed('tracklist.set_songs')
     def set_songs(self, paths: list[Path], position: int = 0, sort: bool = False) -> None:  # noqa: FBT002
         """Updates the tracklist with a new list of audio file paths.
 
@@ -300,53 +680,255 @@ class TracklistWidget(VerticalScroll):  # pylint: disable=too-many-instance-attr
             elif self.order == PlaylistOrder.RANDOM:
                 random.shuffle(paths)
 
-        self.items = []
-        for path in paths:
-            if path.is_file():
-                self.items.append(Song(path, on_play=self.on_select))
-            else:
-                logging.warning('song not found: "%s"', path)
+        self.items = [Song(path, on_play=self.on_select) for path in paths]
 
         self.items_unfilter = self.items.copy()
-        self.items_length = len(paths)
+        self.items_length = len(self.items)
         self.index = position
+        self._rows = None
+        self.table = None
+        self.filter_query = ''
+        self._filter_pending = False
+        self._marked = 0
         self.draw()
 
-    def add(self, paths: list[Path]) -> None:
-        """Adds new file paths to the tracklist.
+        self._start_check()
 
-        :param items: A list of paths to the audio files.
-        """
-        songs = [Song(path, on_play=self.on_select) for path in paths]
+    @METRICS.timed('tracklist.restore')
+    def restore(self, snapshot: SessionSnapshot) -> None:
+        """Restores the tracklist from the snapshot of a previous session, its songs are checked again in background.
 
-        self.items_unfilter.extend(songs)
+        :param snapshot: The snapshot of the tracklist.
+        """
+        songs = [Song(location, on_play=self.on_select) for location in snapshot.locations()]
+        view = snapshot.view
+        if view is not None and (
+            not view.size or (view[0] >= 0 and view[-1] < len(songs) and (np.diff(view) > 0).all())
+        ):
+            self._rows = view.astype(np.int64)
+            self.items = [songs[index] for index in view.tolist()]
+            self.filter_query = snapshot.query
+        else:
+            self._rows = None
+            self.items = songs.copy()
+            self.filter_query = ''
 
-        self.items.extend(songs)
+        self.items_unfilter = songs
         self.items_length = len(self.items)
+        self.index = min(max(snapshot.index, 0), max(self.items_length - 1, 0))
+        self.current_song = songs[snapshot.current] if 0 <= snapshot.current < len(songs) else None
+        self.table = None
+        self._filter_pending = False
+        self._encoded_songs = (songs, len(songs), snapshot.songs)
+        self._marked = 0
+
+        if snapshot.rows_missing is not None and snapshot.rows_seconds is not None:
+            rows = self.items[self.index : self.index + len(snapshot.rows_missing)]
+            for song, missing, seconds in zip(
+                rows, snapshot.rows_missing.tolist(), snapshot.rows_seconds.tolist(), strict=False
+            ):
+                song.set_status(
+                    None if missing == MISSING_UNKNOWN else bool(missing), None if math.isnan(seconds) else seconds
+                )
+        self.draw()
+
+        self._start_check(recheck=True)
 
+    def snapshot(self, source: Path, playlist: bool, source_mtime: int, position: float) -> SessionSnapshot:
+        """Takes a snapshot of the tracklist, to restore it in the next session.
+
+        :param source: The path to the playlist file or the directory of the songs.
+        :param playlist: Whether the source is a playlist file.
+        :param source_mtime: The modification time of the source, in nanoseconds.
+        :param position: The playback position of the current song, in seconds.
+
+        :returns: The snapshot of the tracklist.
+        """
+        songs = self.items_unfilter
+        if self._encoded_songs is None or self._encoded_songs[0] is not songs or self._encoded_songs[1] != len(songs):
+            self._encoded_songs = (songs, len(songs), SessionSnapshot.encode_songs(song.location for song in songs))
+
+        try:
+            current = -1 if self.current_song is None else songs.index(self.current_song)
+        except ValueError:
+            current = -1
+
+        rows = self.items[self.index : self.index + self.length]
+        return SessionSnapshot(
+            source=source,
+            playlist=playlist,
+            source_mtime=source_mtime,
+            songs=self._encoded_songs[2],
+            index=self.index,
+            current=current,
+            position=position,
+            query=self.filter_query,
+            view=self._rows,
+            rows_missing=np.fromiter(
+                (MISSING_UNKNOWN if song.missing is None else song.missing for song in rows),
+                dtype=np.uint8,
+                count=len(rows),
+            ),
+            rows_seconds=np.fromiter(
+                (math.nan if song.cached_seconds is None else song.cached_seconds for song in rows),
+                dtype=np.float32,
+                count=len(rows),
+            ),
+        )
+
+    def _adopt_table(self, songs: list[Song], table: TrackTable) -> TrackTable | None:
+        """Sets the metadata table built in background, unless the tracklist was replaced meanwhile.
+
+        :param songs: The songs of the table.
+        :param table: The metadata table.
+
+        :returns: The metadata table of the tracklist, or None if the songs are not in the tracklist anymore.
+        """
+        if songs is not self.items_unfilter:
+            return None
+
+        if self.table is None:
+            table.extend([song.location for song in songs[len(table) :]])
+            self.table = table
+            if self._filter_pending:
+                self.filter(self.filter_query)
+        return self.table
+
+    def _refilter(self) -> None:
+        """Applies the filter query again, as the metadata it depends on changed, keeping the highlighted song."""
+        if not self.filter_query or self.table is None:
+            return
+
+        highlighted = self.items[self.index] if self.index < self.items_length else None
+        songs = self.items_unfilter
+        self._rows = np.flatnonzero(self.table.query(self.filter_query))
+        self.items = [songs[index] for index in self._rows.tolist()]
+        self.items_length = len(self.items)
+        try:
+            self.index = self.items.index(highlighted) if highlighted is not None else 0
+        except ValueError:
+            self.index = max(min(self.index, self.items_length - 1), 0)
         self.draw()
 
+    def _checked(self, songs: list[Song]) -> None:
+        """Applies the filter query again once the songs are checked, unless the tracklist was replaced meanwhile.
+
+        :param songs: The checked songs.
+        """
+        if songs is self.items_unfilter:
+            self._refilter()
+
+    def _start_check(self, recheck: bool = False) -> None:  # noqa: FBT002
+        """Starts checking the songs of the tracklist in background, replacing the previous check.
+
+        :param recheck: Whether the status of the songs, restored from a previous session, is checked again.
+        """
+        self._recheck = recheck
+        self._check_worker = self._check_songs(self.items_unfilter, recheck=recheck)
+
+    @work(thread=True, exclusive=True, group='check-songs', exit_on_error=False, description='check songs')
+    def _check_songs(self, songs: list[Song], recheck: bool = False) -> None:  # noqa: FBT002
+        """Builds in background the metadata table of the songs, then fills it by batches.
+
+        The audio files are checked (the visible songs are also checked when drawn), and their durations are read from
+        the metadata store or, if they were not analyzed, from their headers. The rows of the table that were already
+        filled (by a check interrupted when the songs changed) are skipped. The filter query is applied again once the
+        songs are checked, the durations, sizes and modification times being unknown until then.
+
+        :param songs: The songs to check.
+        :param recheck: Whether the status of the songs, restored from a previous session, is checked again.
+        """
+        worker = get_current_worker()
+        table = self.app.call_from_thread(self._adopt_table, songs, TrackTable([song.location for song in songs]))
+        if table is None:
+            return
+
+        for start in range(0, len(songs), self.CHECK_BATCH_SIZE):
+            if worker.is_cancelled:
+                break
+
+            pending = (np.flatnonzero(np.isnan(table.size[start : start + self.CHECK_BATCH_SIZE])) + start).tolist()
+            if not pending:
+                continue
+            durations = METADATA.durations([songs[index].location for index in pending])
+
+            changed = False
+            for index in pending:
+                song = songs[index]
+                previous = song.missing
+                if recheck:
+                    song.set_status(None, None)
+                file_status = song.stat() if recheck or not previous else None
+                if file_status is None:
+                    changed = changed or previous is not True
+                    table.update(index, math.nan, math.nan, None)
+                    continue
+
+                changed = changed or previous is True
+                seconds = song.known_seconds(file_status, durations.get(song.location))
+                table.update(index, file_status.st_size, file_status.st_mtime, seconds)
+
+            if changed:
+                self.app.call_from_thread(self.draw)
+
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._checked, songs)
+
+    def add(self, paths: list[Path]) -> None:
+        """Adds new file paths at the end of the tracklist.
+
+        :param paths: A list of paths to the audio files.
+        """
+        self.insert(self.items_length, paths)
+
     def select(self, path: Path) -> None:
         """Selects a song in the tracklist based on its path.
 
         :param path: The path to the audio file.
         """
+        location = str(path)
         for index, song in enumerate(self.items):
-            if song.path == path:
+            if song.location == location:
                 self.index = index
                 self.draw()
                 break
 
+    def set_current(self, path: Path) -> None:
+        """Marks a song as the one being played, without playing it.
+
+        :param path: The path to the audio file.
+        """
+        self.select(path)
+        if self.items and self.items[self.index].location == str(path):
+            self.current_song = self.items[self.index]
+            self.draw()
+
+    @METRICS.timed('tracklist.filter')
     def filter(self, pattern: str) -> None:
-        """Filters the tracklist based on a search pattern.
+        """Filters the tracklist based on a query over the songs metadata (see `TrackTable` for the query syntax).
 
-        :param pattern: The filter pattern.
+        The metadata table is built in background when the songs are set, if it is not ready yet the query is applied
+        once it is.
+
+        :param pattern: The filter query.
         """
+        if pattern and self.table is None:
+            self.filter_query = pattern
+            self._filter_pending = True
+            if self._check_worker is None or self._check_worker.is_finished:
+                self._start_check()
+            return
+
+        self._filter_pending = False
         if pattern:
-            self.items = [song for song in self.items_unfilter if pattern.lower() in song.path.name.lower()]
+            songs = self.items_unfilter
+            self._rows = np.flatnonzero(self.table.query(pattern))
+            self.items = [songs[index] for index in self._rows.tolist()]
         else:
+            self._rows = None
             self.items = self.items_unfilter.copy()
 
+        self.filter_query = pattern
         self.items_length = len(self.items)
         self.index = 0
         self.draw()
@@ -354,6 +936,7 @@ class TracklistWidget(VerticalScroll):  # pylint: disable=too-many-instance-attr
         if self.current_song:
             self.select(self.current_song.path)
 
+    @METRICS.timed('tracklist.search')
     def search(self, pattern: str) -> None:
         """Searchs a song in the the tracklist.
 
@@ -371,15 +954,25 @@ class TracklistWidget(VerticalScroll):  # pylint: disable=too-many-instance-attr
     async def swap(self, position: int) -> None:
         """Swaps the position of the currently highlighted song with another song.
 
+        The two songs are swapped in place, unless the songs are being checked: the tracklist is then permuted, so the
+        check goes on with the previous songs and table.
+
         :param position: The position to swap with.
         """
         new_index = min(position, self.items_length - 1) if self.index < position else max(position, 0)
 
-        current_item = self.items[self.index]
-        new_item = self.items[new_index]
-
-        self.items[self.index] = new_item
-        self.items[new_index] = current_item
-
+        if self._check_worker is not None and self._check_worker.is_running:
+            order = np.arange(self.items_length)
+            order[[self.index, new_index]] = order[[new_index, self.index]]
+            self._permute(order)
+        else:
+            rows = [self.index, new_index] if self._rows is None else self._rows[[self.index, new_index]].tolist()
+            self.items[self.index], self.items[new_index] = self.items[new_index], self.items[self.index]
+            self.items_unfilter[rows[0]], self.items_unfilter[rows[1]] = self.items[self.index], self.items[new_index]
+            if self.table is not None:
+                self.table.swap(*rows)
+
+        songs = [self.items[self.index], self.items[new_index]]
+        start = min(self.index, new_index)
         self.index = new_index
-        self.draw()
+        self._changed(TracklistChange(ChangeKind.MOVE, start, songs, songs))
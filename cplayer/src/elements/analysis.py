@@ -0,0 +1,233 @@
+"""Module that defines the LibraryScanner class, used to analyze a whole music library.
+
+Each song is analyzed by a worker of a decoder pool: its headers are probed, it is fully decoded to detect the corrupt
+files, and its loudness and waveform peaks are measured. The results are stored in the metadata store as they arrive, so
+an interrupted scan is resumed by running it again: the songs whose size and modification time did not change are
+skipped.
+"""
+
+import logging
+import math
+import os
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from cplayer.src.elements.audio_buffer import AudioBuffer
+from cplayer.src.elements.decoder_pool import DecoderPool, available_cores
+from cplayer.src.elements.formats import SUPPORTED_EXTENSIONS, get_format, probe
+from cplayer.src.elements.metadata import MetadataStore, TrackMetadata
+
+
+WAVEFORM_POINTS = 200
+BLOCK_FRAMES = 1 << 18
+
+
+@dataclass
+class ScanReport:
+    """Summary of a library scan."""
+
+    files: int = 0
+    skipped: int = 0
+    analyzed: int = 0
+    failed: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        """Gets the number of analyzed songs per second."""
+        return self.analyzed / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        """Gets the number of analyzed megabytes per second."""
+        return self.bytes / (1024 * 1024) / self.seconds if self.seconds else 0.0
+
+
+def _measure(buffer: AudioBuffer) -> tuple[float, float, bytes]:
+    """Measures the loudness, the peak and the waveform peaks of a song.
+
+    The samples are converted and processed by blocks, so the temporary buffers stay small for long songs.
+
+    :param buffer: The samples of the song.
+
+    :returns: The RMS loudness and the peak, in dBFS, and the waveform peaks (one byte per point).
+    """
+    squares = 0.0
+    frames = len(buffer)
+    points = np.zeros(WAVEFORM_POINTS, dtype=np.float32)
+    point_frames = max(math.ceil(frames / WAVEFORM_POINTS), 1)
+
+    for start in range(0, frames, BLOCK_FRAMES):
+        block = buffer.to_float(start, start + BLOCK_FRAMES)
+        squares += float(np.einsum('ij,ij->', block, block, dtype=np.float64))
+
+        magnitudes = np.abs(block).max(axis=1)
+        indexes = np.arange(start, start + len(block)) // point_frames
+        np.maximum.at(points, indexes, magnitudes)
+
+    rms = math.sqrt(squares / max(frames * buffer.channels, 1))
+    peak = float(points.max())
+    waveform = np.minimum(points * 255, 255).astype(np.uint8).tobytes()
+    return (
+        20 * math.log10(rms) if rms else -math.inf,
+        20 * math.log10(peak) if peak else -math.inf,
+        waveform,
+    )
+
+
+def analyze(path: str, size: int, mtime: int) -> TrackMetadata:
+    """Analyzes a song, it is executed by the workers of the decoder pool.
+
+    :param path: The path to the song.
+    :param size: The size of the file, in bytes.
+    :param mtime: The modification time of the file, in nanoseconds.
+
+    :returns: The metadata of the song.
+    """
+    song_path = Path(path)
+    track = TrackMetadata(path, size, mtime)
+
+    audio_format = get_format(song_path)
+    track.format = audio_format.name if audio_format else None
+
+    info = probe(song_path)
+    if info is not None:
+        track.seconds, track.frame_rate, track.channels = info.seconds, info.frame_rate, info.channels
+
+    try:
+        buffer = AudioBuffer.open(song_path)
+    except Exception as error:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+        track.error = f'{type(error).__name__}: {error}'
+        return track
+
+    if not len(buffer):
+        track.error = 'no audio frames'
+        return track
+
+    track.valid = True
+    if track.seconds is None:
+        track.seconds, track.frame_rate, track.channels = buffer.seconds, buffer.frame_rate, buffer.channels
+    track.loudness, track.peak, track.waveform = _measure(buffer)
+    return track
+
+
+class LibraryScanner:
+    """Analyzes the songs of a library with a pool of decoder workers."""
+
+    BATCH_SIZE = 64
+    QUEUED_PER_WORKER = 4
+
+    def __init__(self, store: MetadataStore, jobs: int | None = None, force: bool = False) -> None:  # noqa: FBT002
+        """Initializes the LibraryScanner object.
+
+        :param store: The store where the metadata of the songs is saved.
+        :param jobs: The number of worker processes, by default the number of cores available to the process.
+        :param force: Whether to analyze again the songs that did not change.
+        """
+        self.store = store
+        self.jobs = jobs or available_cores()
+        self.force = force
+
+    @staticmethod
+    def walk(roots: Iterable[Path]) -> Iterator[tuple[str, int, int]]:
+        """Finds the songs of the library.
+
+        :param roots: The root directories (or song files) of the library.
+
+        :yields: The path, the size and the modification time of each song.
+        """
+        for root in roots:
+            if root.is_file():
+                stat = root.stat()
+                yield str(root.absolute()), stat.st_size, stat.st_mtime_ns
+                continue
+
+            directories = [str(root.absolute())]
+            while directories:
+                try:
+                    with os.scandir(directories.pop()) as entries:
+                        for entry in entries:
+                            if entry.name.startswith('.'):
+                                continue
+                            if entry.is_dir(follow_symlinks=False):
+                                directories.append(entry.path)
+                            elif os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS:  # noqa: PTH122
+                                stat = entry.stat()
+                                yield entry.path, stat.st_size, stat.st_mtime_ns
+                except OSError as error:
+                    logging.warning('directory cannot be scanned: %s', error)
+
+    def _collect(
+        self,
+        futures: Iterable[Future[TrackMetadata]],
+        submitted: dict[Future[TrackMetadata], tuple[str, int, int]],
+        batch: list[TrackMetadata],
+        report: ScanReport,
+    ) -> None:
+        """Collects the results of finished analyses, saving them by batches.
+
+        :param futures: The finished analyses.
+        :param submitted: The arguments of the submitted analyses.
+        :param batch: The results that were not saved yet.
+        :param report: The report of the scan.
+        """
+        for future in futures:
+            path, size, mtime = submitted.pop(future)
+            try:
+                track = future.result()
+            except Exception as error:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+                track = TrackMetadata(path, size, mtime, error=f'{type(error).__name__}: {error}')
+
+            if not track.valid:
+                logging.warning('song "%s" cannot be decoded: %s', path, track.error)
+                report.failed += 1
+
+            report.analyzed += 1
+            report.bytes += size
+            batch.append(track)
+
+        if len(batch) >= self.BATCH_SIZE:
+            self.store.save(batch)
+            batch.clear()
+
+    def scan(self, roots: Iterable[Path]) -> ScanReport:
+        """Analyzes the new and modified songs of the library.
+
+        :param roots: The root directories (or song files) of the library.
+
+        :returns: The report of the scan.
+        """
+        report = ScanReport()
+        fingerprints = {} if self.force else self.store.fingerprints()
+
+        submitted: dict[Future[TrackMetadata], tuple[str, int, int]] = {}
+        batch: list[TrackMetadata] = []
+
+        start = time.perf_counter()
+        decoders = DecoderPool(self.jobs)
+        try:
+            for path, size, mtime in self.walk(roots):
+                report.files += 1
+                if fingerprints.get(path) == (size, mtime):
+                    report.skipped += 1
+                    continue
+
+                submitted[decoders.analyze(path, size, mtime)] = (path, size, mtime)
+                if len(submitted) >= self.jobs * self.QUEUED_PER_WORKER:
+                    done, _ = wait(submitted, return_when=FIRST_COMPLETED)
+                    self._collect(done, submitted, batch, report)
+
+            done, _ = wait(submitted)
+            self._collect(done, submitted, batch, report)
+        finally:
+            decoders.shutdown()
+            self.store.save(batch)
+            report.seconds = time.perf_counter() - start
+
+        return report
@@ -0,0 +1,188 @@
+"""Module that defines the AudioBuffer class, a frames by channels view over the PCM samples of a song.
+
+The samples are never copied to build the view: the data chunk of a WAV file is memory-mapped, so only the pages that
+are read are loaded from the disk, and the decoded songs wrap the raw bytes produced by the decoder. The conversion to
+floating point numbers is done on demand, block by block, so a whole song can be analyzed in constant memory.
+"""
+
+import struct
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+from pydub import AudioSegment
+from pygame import mixer, sndarray
+
+from cplayer.src.elements.formats import is_streamable
+
+
+BLOCK_FRAMES = 1 << 16
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_INTEGER_TYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+_FLOAT_TYPES = {4: np.float32, 8: np.float64}
+
+
+def _wav_layout(path: Path) -> tuple[np.dtype, int, int, int, int]:
+    """Reads the layout of the samples of a WAV file.
+
+    :param path: The path to the WAV file.
+
+    :returns: The type of the samples, the number of channels, the sample rate, the offset and the number of frames of
+        the data chunk.
+
+    :raises ValueError: If the file is not a WAV file or its samples cannot be viewed as a NumPy type.
+    """
+    size = path.stat().st_size
+    with path.open('rb') as stream:
+        header = stream.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':  # noqa: PLR2004
+            message = 'not a RIFF/WAVE file'
+            raise ValueError(message)
+
+        sample_type = None
+        channels = frame_rate = block_align = 0
+        while len(chunk := stream.read(8)) == 8:  # noqa: PLR2004
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk)
+            if chunk_id == b'fmt ':
+                fmt = stream.read(chunk_size + (chunk_size & 1))
+                format_tag, channels, frame_rate, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+                if format_tag == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:  # noqa: PLR2004
+                    format_tag = struct.unpack('<H', fmt[24:26])[0]
+
+                types = _FLOAT_TYPES if format_tag == _WAVE_FORMAT_IEEE_FLOAT else _INTEGER_TYPES
+                if format_tag in {_WAVE_FORMAT_PCM, _WAVE_FORMAT_IEEE_FLOAT} and bits // 8 in types:
+                    sample_type = np.dtype(types[bits // 8]).newbyteorder('<')
+            elif chunk_id == b'data':
+                if sample_type is None or not channels or block_align != sample_type.itemsize * channels:
+                    message = 'unsupported sample format'
+                    raise ValueError(message)
+                frames = min(chunk_size, size - stream.tell()) // block_align
+                return sample_type, channels, frame_rate, stream.tell(), frames
+            else:
+                stream.seek(chunk_size + (chunk_size & 1), 1)
+
+    message = 'no data chunk'
+    raise ValueError(message)
+
+
+class AudioBuffer:
+    """Frames by channels view over PCM samples."""
+
+    def __init__(self, samples: np.ndarray, frame_rate: int) -> None:
+        """Initializes the AudioBuffer object.
+
+        :param samples: The samples, with shape (frames, channels).
+        :param frame_rate: The sample rate.
+        """
+        self.samples = samples
+        self.frame_rate = frame_rate
+
+    @classmethod
+    def from_wav(cls, path: Path) -> 'AudioBuffer':
+        """Memory-maps the samples of a WAV file.
+
+        :param path: The path to the WAV file.
+
+        :returns: The buffer, backed by the file.
+
+        :raises ValueError: If the samples cannot be memory-mapped (24 bits samples, compressed formats).
+        """
+        sample_type, channels, frame_rate, offset, frames = _wav_layout(path)
+        if not frames:
+            return cls(np.empty((0, channels), dtype=sample_type), frame_rate)
+        return cls(np.memmap(path, dtype=sample_type, mode='r', offset=offset, shape=(frames, channels)), frame_rate)
+
+    @classmethod
+    def from_segment(cls, audio: AudioSegment) -> 'AudioBuffer':
+        """Wraps the raw bytes of a song decoded by `pydub`.
+
+        :param audio: The decoded song.
+
+        :returns: The buffer, sharing the memory of the song (24 bits samples are converted to 32 bits).
+        """
+        if audio.sample_width not in _INTEGER_TYPES:
+            audio = audio.set_sample_width(4)
+        samples = np.frombuffer(audio.raw_data, dtype=_INTEGER_TYPES[audio.sample_width])
+        return cls(samples.reshape(-1, audio.channels), audio.frame_rate)
+
+    @classmethod
+    def from_sound(cls, sound: mixer.Sound) -> 'AudioBuffer':
+        """Wraps the samples of a song decoded by the mixer.
+
+        :param sound: The decoded song.
+
+        :returns: The buffer, sharing the memory of the sound.
+        """
+        frame_rate, _, channels = mixer.get_init()
+        samples = sndarray.samples(sound)
+        return cls(samples.reshape(len(samples), channels), frame_rate)
+
+    @classmethod
+    def open(cls, path: Path) -> 'AudioBuffer':
+        """Gets the samples of a song, memory-mapped for the WAV files and decoded for the other formats.
+
+        :param path: The path to the song.
+
+        :returns: The buffer.
+        """
+        if path.suffix.lower() == '.wav':
+            try:
+                return cls.from_wav(path)
+            except (OSError, ValueError):
+                pass
+
+        if is_streamable(path) and mixer.get_init():
+            return cls.from_sound(mixer.Sound(path))
+        return cls.from_segment(AudioSegment.from_file(path))
+
+    def __len__(self) -> int:
+        """Gets the number of frames.
+
+        :returns: The number of frames.
+        """
+        return len(self.samples)
+
+    @property
+    def channels(self) -> int:
+        """Gets the number of channels."""
+        return self.samples.shape[1]
+
+    @property
+    def seconds(self) -> float:
+        """Gets the duration of the samples, in seconds."""
+        return len(self) / self.frame_rate if self.frame_rate else 0.0
+
+    @property
+    def full_scale(self) -> float:
+        """Gets the full scale value of the samples."""
+        if self.samples.dtype.kind == 'f':
+            return 1.0
+        return float(1 << (8 * self.samples.dtype.itemsize - 1))
+
+    def to_float(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        """Converts a range of frames to floating point numbers between -1 and 1.
+
+        :param start: The first frame.
+        :param stop: The frame after the last one, by default the end of the buffer.
+
+        :returns: The converted frames, a new array with shape (frames, channels).
+        """
+        block = self.samples[start:stop].astype(np.float32)
+        if self.samples.dtype == np.uint8:
+            block -= 128
+        block /= self.full_scale
+        return block
+
+    def blocks(self, block_frames: int = BLOCK_FRAMES) -> Iterator[np.ndarray]:
+        """Iterates over the frames by blocks, without copying them.
+
+        :param block_frames: The number of frames of each block.
+
+        :yields: The views of the blocks, with shape (frames, channels).
+        """
+        for start in range(0, len(self), block_frames):
+            yield self.samples[start : start + block_frames]
@@ -18,6 +18,7 @@ class PlaylistType:
     """Playlist option fields."""
 
     directory: str
+    catalog: str
     selected: str | None
     order: str
 
@@ -29,6 +30,7 @@ class PagesShortcutsType:
     quit: str
     information: str
     home: str
+    performance: str
 
 
 @dataclass
@@ -40,6 +42,7 @@ class SongsShortcutsType:
     increase_volume: str
     restart: str
     mute: str
+    equalizer: str
 
 
 @dataclass
@@ -66,6 +69,9 @@ class PlaylistShortcutsType:  # pylint: disable=too-many-instance-attributes
     forward: str
     select: str
     synchronize: str
+    export: str
+    mark: str
+    move_to_position: str
 
 
 @dataclass
@@ -77,11 +83,84 @@ class ShortcutsType:
     playlist: PlaylistShortcutsType
 
 
+@dataclass
+class TranscodingType:
+    """Transcoding option fields."""
+
+    directory: str
+    max_size: int
+    prefetch: int
+
+
+@dataclass
+class DecodersType:
+    """Decoder pool option fields."""
+
+    workers: int
+
+
+@dataclass
+class OutputType:
+    """Audio output option fields."""
+
+    native_format: bool
+    buffer: int
+
+
+@dataclass
+class EqualizerType:
+    """Equalizer option fields."""
+
+    enabled: bool
+    preamp: float
+    gains: list[float]
+    block: int
+
+
+@dataclass
+class MetadataType:
+    """Metadata store option fields."""
+
+    database: str
+
+
+@dataclass
+class ExplorerType:
+    """File explorer option fields."""
+
+    hide_empty: bool
+
+
+@dataclass
+class DaemonType:
+    """Daemon option fields."""
+
+    socket: str
+
+
+@dataclass
+class SessionType:
+    """Session snapshot option fields."""
+
+    enabled: bool
+    path: str
+    interval: float
+
+
 @dataclass
 class GeneralType:
     """General option fields."""
 
     playlist: PlaylistType
+    crossfade: float
+    output: OutputType
+    equalizer: EqualizerType
+    transcoding: TranscodingType
+    decoders: DecodersType
+    explorer: ExplorerType
+    metadata: MetadataType
+    daemon: DaemonType
+    session: SessionType
     shortcuts: ShortcutsType
 
 
@@ -101,6 +180,7 @@ class IconsStyleType:  # pylint: disable=too-many-instance-attributes
     save: str
     go_to_position: str
     order: str
+    missing: str
 
 
 @dataclass
@@ -112,6 +192,8 @@ class ColorsStyleType:
     text: str
     playing_label: str
     paused_label: str
+    missing_label: str
+    marked_label: str
 
 
 @dataclass
@@ -130,12 +212,33 @@ class AppearanceType:
     style: StyleType
 
 
+@dataclass
+class LoggingType:
+    """Logging option fields."""
+
+    max_size: float
+    backups: int
+    burst: int
+    window: float
+
+
+@dataclass
+class WatchdogType:
+    """Event loop watchdog option fields."""
+
+    enabled: bool
+    threshold: float
+
+
 @dataclass
 class DevelopmentType:
     """Development option fields."""
 
     logfile: str
     level: str
+    logging: LoggingType
+    instrumentation: bool
+    watchdog: WatchdogType
 
 
 @dataclass
@@ -169,21 +272,51 @@ class Config:  # pylint: disable=too-few-public-methods
         """Initialize the Config object.
 
         :param path: Path to the YAML file.
+        :param default_data: Path to the YAML file with the default configuration.
 
         :raises FileNotFoundError: If the YAML file does not exist.
         """
         self._path = path
 
+        defaults = self._load(default_data) if (default_data is not None and default_data.exists()) else {}
+
         if self._path.exists():
-            with path.open(encoding='UTF-8') as yaml_file:
-                self.data = DotMap(yaml.safe_load(yaml_file), _dynamic=False)
-        elif default_data is not None and default_data.exists():
-            with default_data.open(encoding='UTF-8') as yaml_file:
-                self.data = DotMap(yaml.safe_load(yaml_file), _dynamic=False)
+            self.data = DotMap(self._merge(self._load(self._path), defaults), _dynamic=False)
+        elif defaults:
+            self.data = DotMap(defaults, _dynamic=False)
 
             self._path.parent.mkdir(parents=True, exist_ok=True)
             self.save()
 
+    @staticmethod
+    def _load(path: Path) -> dict[str, Any]:
+        """Loads the content of a YAML file.
+
+        :param path: Path to the YAML file.
+
+        :returns: The content of the YAML file.
+        """
+        with path.open(encoding='UTF-8') as yaml_file:
+            return yaml.safe_load(yaml_file) or {}
+
+    @classmethod
+    def _merge(cls, data: dict[str, Any], defaults: dict[str, Any]) -> dict[str, Any]:
+        """Fills the options missing in the configuration data with their default values.
+
+        This allows to add new options to the default configuration without breaking the existing configuration files.
+
+        :param data: The configuration data.
+        :param defaults: The default configuration data.
+
+        :returns: The configuration data with the missing options.
+        """
+        for key, value in defaults.items():
+            if key not in data:
+                data[key] = value
+            elif isinstance(value, dict) and isinstance(data[key], dict):
+                cls._merge(data[key], value)
+        return data
+
     def save(self) -> None:
         """Save the configuration data to the YAML file."""
         with self._path.open('w', encoding='UTF-8') as yaml_file:
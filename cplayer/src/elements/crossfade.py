@@ -0,0 +1,38 @@
+"""Crossfade between consecutive songs.
+
+The tail of the song being played is decoded ahead of time by a worker of the decoder pool, to the sample format of the
+mixer, and received in a shared memory block. When the crossfade starts the stream of the song is replaced by its
+decoded tail, faded out with a NumPy gain ramp and played through a mixer channel, while the next song is streamed with
+a fade in.
+"""
+
+import numpy as np
+
+
+MAX_CROSSFADE = 12.0
+BLOCK_FRAMES = 4096
+
+
+def fade_out(samples: np.ndarray, block_frames: int = BLOCK_FRAMES) -> np.ndarray:
+    """Applies an equal-power fade out to the samples.
+
+    The gain ramp is computed and applied block by block, so the temporary buffers stay small.
+
+    :param samples: The samples, with shape (frames,) or (frames, channels).
+    :param block_frames: The number of frames processed at once.
+
+    :returns: The faded samples, with the same shape and type.
+    """
+    faded = np.empty_like(samples)
+    frames = len(samples)
+    step = np.float32(np.pi / 2 / max(frames, 1))
+
+    for start in range(0, frames, block_frames):
+        stop = min(start + block_frames, frames)
+
+        gains = np.cos(np.arange(start, stop, dtype=np.float32) * step)
+        block = samples[start:stop].astype(np.float32)
+        block *= gains[:, np.newaxis] if samples.ndim > 1 else gains
+        faded[start:stop] = block
+
+    return faded
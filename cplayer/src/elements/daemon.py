@@ -0,0 +1,729 @@
+"""Headless playback daemon controlled through a Unix socket.
+
+The daemon owns the player, the loaded playlist and the queue of songs, so the music keeps playing when the user
+interface is closed. The clients send one JSON object per line with the `command` name and its arguments, and receive
+one JSON object per line with the `ok` field and the command result (or the `error` message), e.g.:
+
+    -> {"command": "load_playlist", "path": "~/.cplayer/playlists/rock.playlist"}
+    <- {"ok": true, "total": 120}
+    -> {"command": "status"}
+    <- {"ok": true, "path": "/music/song.mp3", "index": 0, "total": 120, "position": 3.5, ...}
+
+Available commands: `status`, `queue`, `play` (`index`, `path`, `start`, `queue`), `pause`, `resume`, `stop`, `next`,
+`previous`, `seek` (`position`), `volume` (`value`), `equalizer` (`enabled`, `gains`, `preamp`), `load_playlist`
+(`path`), `load_directory` (`path`) and `shutdown`.
+"""
+
+import json
+import logging
+import socket
+import socketserver
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, ClassVar
+
+import pygame
+
+from cplayer.src.elements import CONFIG
+from cplayer.src.elements.dsp import BlockStats
+from cplayer.src.elements.formats import is_supported, probe
+from cplayer.src.elements.player import Player
+from cplayer.src.elements.playlist import PlayList
+
+
+class DaemonError(Exception):
+    """Error reported by the playback daemon."""
+
+
+class DaemonConnectionError(DaemonError):
+    """Error raised when the playback daemon is not reachable anymore."""
+
+
+class PlaybackDaemon:
+    """Playback daemon that keeps the player and the queue of songs."""
+
+    POLLING_INTERVAL = 0.5
+
+    def __init__(self, socket_path: Path, player: Player) -> None:
+        """Initializes the PlaybackDaemon object.
+
+        :param socket_path: The path of the Unix socket where the daemon listens.
+        :param player: The player used to play the songs.
+        """
+        self.socket_path = socket_path
+        self.player = player
+
+        self.queue: list[Path] = []
+        self.index: int | None = None
+        self.seconds = 0.0
+        self.playlist: PlayList | None = None
+
+        self._playing = False
+        self._preparing: Path | None = None
+        self._lock = threading.RLock()
+        self._server: _DaemonServer | None = None
+
+        self._commands: dict[str, Callable[..., dict[str, Any]]] = {
+            'status': self.status,
+            'queue': self.get_queue,
+            'play': self.play,
+            'pause': self.pause,
+            'resume': self.resume,
+            'stop': self.stop,
+            'next': self.next_song,
+            'previous': self.previous_song,
+            'seek': self.seek,
+            'volume': self.set_volume,
+            'equalizer': self.set_equalizer,
+            'load_playlist': self.load_playlist,
+            'load_directory': self.load_directory,
+            'shutdown': self.shutdown,
+        }
+
+    def execute(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Executes a command received from a client.
+
+        :param request: The request with the `command` name and its arguments.
+
+        :returns: The response for the client.
+        """
+        arguments = dict(request)
+        command = self._commands.get(arguments.pop('command', None))
+        if command is None:
+            return {'ok': False, 'error': f'unknown command: {request.get("command")}'}
+
+        with self._lock:
+            try:
+                return {'ok': True, **command(**arguments)}
+            except (TypeError, ValueError, OSError, IndexError, RuntimeError, pygame.error) as error:
+                logging.exception('error executing the command %s', request)
+                return {'ok': False, 'error': str(error)}
+
+    def status(self) -> dict[str, Any]:
+        """Gets the playback status.
+
+        :returns: The playback status.
+        """
+        return {
+            'path': str(self.player.path) if self.player.path else None,
+            'index': self.index,
+            'total': len(self.queue),
+            'position': self.player.position if self._playing else 0.0,
+            'seconds': self.seconds,
+            'busy': self.player.busy,
+            'transcoding': self._preparing is not None,
+            'paused': self.player.paused,
+            'volume': self.player.volume,
+            'format': self.player.track_format,
+            'output': self.player.output_format,
+            'equalizer': self.player.equalizer_enabled,
+            'dsp': asdict(self.player.dsp_stats),
+            'playlist': str(self.playlist.path) if self.playlist else None,
+        }
+
+    def get_queue(self) -> dict[str, Any]:
+        """Gets the queue of songs.
+
+        :returns: The paths of the queued songs.
+        """
+        return {'paths': [str(path) for path in self.queue], 'index': self.index}
+
+    def play(
+        self,
+        index: int | None = None,
+        path: str | None = None,
+        start: float = 0.0,
+        queue: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """Plays a song of the queue, or any song when it is not queued.
+
+        :param index: The position of the song in the queue.
+        :param path: The path of the song, used if the index is not provided.
+        :param start: The position, in seconds, where the playback starts.
+        :param queue: The new queue of songs, it replaces the current one.
+
+        :returns: The playback status.
+        """
+        if queue is not None:
+            self.queue = [Path(song) for song in queue]
+
+        if index is None and path is not None:
+            song = Path(path).expanduser()
+            index = self.queue.index(song) if song in self.queue else None
+        elif index is not None:
+            if not 0 <= index < len(self.queue):
+                message = f'there is no song at index {index} of the queue'
+                raise IndexError(message)
+            song = self.queue[index]
+        elif self.index is not None:
+            index, song = self.index, self.queue[self.index]
+        else:
+            message = 'there is no song to play'
+            raise ValueError(message)
+
+        self.index = index
+
+        info = probe(song)
+        self.seconds = info.seconds if info else 0.0
+        self._playing = True
+
+        ready = self.player.prepare(song)
+        if ready.done():
+            self._start(song, start)
+        else:
+            logging.info('waiting for the transcoding of "%s"...', song)
+            self._preparing = song
+            self.player.stop()
+            ready.add_done_callback(
+                lambda ready: threading.Thread(
+                    target=self._start_prepared, args=(song, start, ready), name='daemon-transcoded', daemon=True
+                ).start()
+            )
+
+        if self.playlist and index is not None:
+            self.playlist.select(song)
+
+        if index is not None:
+            self.player.prefetch(self.queue[index + 1 : index + 1 + CONFIG.data.general.transcoding.prefetch])
+
+        return self.status()
+
+    def _start(self, song: Path, start: float) -> None:
+        """Loads and plays a song that is ready to be played.
+
+        :param song: The path to the song.
+        :param start: The position, in seconds, where the playback starts.
+        """
+        self._preparing = None
+        self.player.load(song)
+        self.player.play(start)
+
+    def _start_prepared(self, song: Path, start: float, ready: Future[Path]) -> None:
+        """Plays a song once it is transcoded, unless another song was requested in the meantime.
+
+        The song is not busy if it cannot be transcoded or played, so the next polling of the queue skips it.
+
+        :param song: The path to the song.
+        :param start: The position, in seconds, where the playback starts.
+        :param ready: The future of the transcoding of the song.
+        """
+        with self._lock:
+            if self._preparing != song:
+                return
+            try:
+                ready.result()
+                self._start(song, start)
+            except Exception:  # pylint: disable=broad-exception-caught
+                self._preparing = None
+                logging.exception('error playing the transcoded song "%s"', song)
+
+    def pause(self) -> dict[str, Any]:
+        """Pauses the playback.
+
+        :returns: The playback status.
+        """
+        self.player.pause()
+        return self.status()
+
+    def resume(self) -> dict[str, Any]:
+        """Resumes the paused playback.
+
+        :returns: The playback status.
+        """
+        self.player.unpause()
+        return self.status()
+
+    def stop(self) -> dict[str, Any]:
+        """Stops the playback.
+
+        :returns: The playback status.
+        """
+        self._playing = False
+        self._preparing = None
+        self.player.stop()
+        return self.status()
+
+    def next_song(self) -> dict[str, Any]:
+        """Plays the next song of the queue.
+
+        :returns: The playback status.
+        """
+        if self.index is not None and self.index < len(self.queue) - 1:
+            return self.play(index=self.index + 1)
+        return self.stop()
+
+    def previous_song(self) -> dict[str, Any]:
+        """Plays the previous song of the queue.
+
+        :returns: The playback status.
+        """
+        return self.play(index=max((self.index or 0) - 1, 0))
+
+    def seek(self, position: float) -> dict[str, Any]:
+        """Moves the playback to a position of the current song.
+
+        :param position: The position in seconds.
+
+        :returns: The playback status.
+        """
+        if self._playing:
+            self.player.seek(min(max(float(position), 0.0), self.seconds or float(position)))
+        return self.status()
+
+    def set_volume(self, value: float) -> dict[str, Any]:
+        """Sets the playback volume.
+
+        :param value: The volume, between 0 and 1.
+
+        :returns: The playback status.
+        """
+        self.player.volume = min(max(float(value), 0.0), 1.0)
+        return self.status()
+
+    def set_equalizer(self, enabled: bool, gains: list[float], preamp: float) -> dict[str, Any]:  # noqa: FBT001
+        """Changes the equalizer settings.
+
+        :param enabled: Whether the equalizer is enabled.
+        :param gains: The gains of the bands, in decibels.
+        :param preamp: The gain applied to the whole spectrum, in decibels.
+
+        :returns: The playback status.
+        """
+        self.player.set_equalizer(bool(enabled), [float(gain) for gain in gains], float(preamp))
+        return self.status()
+
+    def load_playlist(self, path: str) -> dict[str, Any]:
+        """Loads a playlist into the queue, without playing it.
+
+        :param path: The path of the playlist file.
+
+        :returns: The size of the queue.
+        """
+        playlist = PlayList(Path(path).expanduser())
+        if not playlist.path.exists():
+            message = f'playlist "{playlist.path}" not found'
+            raise FileNotFoundError(message)
+
+        deleted_songs = set(playlist.deleted_songs)
+        selected = Path(playlist.selected) if playlist.selected else None
+
+        self.playlist = playlist
+        self.queue = [song for song in playlist.songs if song not in deleted_songs]
+        self.index = self.queue.index(selected) if selected in self.queue else None
+        return {'total': len(self.queue)}
+
+    def load_directory(self, path: str) -> dict[str, Any]:
+        """Loads the songs of a directory into the queue, without playing them.
+
+        :param path: The path of the directory.
+
+        :returns: The size of the queue.
+        """
+        self.playlist = None
+        self.queue = sorted(
+            (song for song in Path(path).expanduser().iterdir() if is_supported(song)),
+            key=lambda song: song.stem,
+        )
+        self.index = None
+        return {'total': len(self.queue)}
+
+    def shutdown(self) -> dict[str, Any]:
+        """Stops the daemon.
+
+        :returns: An empty response.
+        """
+        self.stop()
+        if self._server is not None:
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+        return {}
+
+    def _advance(self) -> None:
+        """Plays the next song of the queue every time the current song ends or starts its crossfade.
+
+        The songs that cannot be played are skipped, the thread keeps advancing until the daemon is stopped.
+        """
+        while self._server is not None:
+            time.sleep(self.POLLING_INTERVAL)
+            with self._lock:
+                if not self._playing or self.player.paused or self._preparing is not None:
+                    continue
+
+                try:
+                    has_next = self.index is not None and self.index < len(self.queue) - 1
+                    if not self.player.busy or (has_next and self.player.fade_out()):
+                        self.next_song()
+                except Exception:  # pylint: disable=broad-exception-caught
+                    # the failed song is the current one, so the next polling skips it
+                    logging.exception('error playing the song %s of the queue, skipping it', self.index)
+
+    def serve(self) -> None:
+        """Listens for commands until the daemon is stopped."""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self.socket_path.unlink(missing_ok=True)
+
+        with _DaemonServer(str(self.socket_path), self) as server:
+            self._server = server
+            threading.Thread(target=self._advance, name='daemon-advance', daemon=True).start()
+
+            logging.info('playback daemon listening on "%s"', self.socket_path)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                logging.info('playback daemon interrupted')
+            finally:
+                self._server = None
+                self.socket_path.unlink(missing_ok=True)
+                self.player.close()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handler of the connections of the clients."""
+
+    server: '_DaemonServer'
+
+    def handle(self) -> None:
+        """Answers the requests of a client until it disconnects."""
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = (
+                    self.server.daemon.execute(request)
+                    if isinstance(request, dict)
+                    else {'ok': False, 'error': 'invalid request'}
+                )
+            except json.JSONDecodeError as error:
+                response = {'ok': False, 'error': f'invalid request: {error}'}
+
+            self.wfile.write(f'{json.dumps(response)}\n'.encode())
+
+
+class _DaemonServer(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server of the daemon."""
+
+    daemon_threads = True
+
+    def __init__(self, address: str, daemon: PlaybackDaemon) -> None:
+        """Initializes the server object.
+
+        :param address: The path of the Unix socket.
+        :param daemon: The daemon that executes the commands.
+        """
+        super().__init__(address, _RequestHandler)
+        self.daemon = daemon
+
+
+class DaemonClient:
+    """Client of the playback daemon."""
+
+    def __init__(self, socket_path: Path) -> None:
+        """Initializes the DaemonClient object.
+
+        :param socket_path: The path of the Unix socket where the daemon listens.
+        """
+        self.socket_path = socket_path
+
+        self._connection: socket.socket | None = None
+        self._reader: Any = None
+        self._lock = threading.Lock()
+
+    def is_running(self) -> bool:
+        """Indicates whether the daemon is listening.
+
+        :returns: True if a daemon is running, False otherwise.
+        """
+        try:
+            self._connect()
+        except OSError:
+            return False
+        return True
+
+    def _connect(self) -> None:
+        """Connects to the daemon, if not connected yet."""
+        if self._connection is None:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                connection.connect(str(self.socket_path))
+            except OSError:
+                connection.close()
+                raise
+            self._connection = connection
+            self._reader = connection.makefile('rb')
+
+    def request(self, command: str, **arguments: Any) -> dict[str, Any]:  # noqa: ANN401
+        """Sends a command to the daemon.
+
+        :param command: The command name.
+        :param **arguments: The command arguments.
+
+        :returns: The response of the daemon.
+
+        :raises DaemonError: If the daemon reports an error.
+        :raises DaemonConnectionError: If the connection is lost.
+        """
+        with self._lock:
+            try:
+                self._connect()
+                if self._connection is not None:
+                    self._connection.sendall(f'{json.dumps({"command": command, **arguments})}\n'.encode())
+                line = self._reader.readline()
+            except OSError as error:
+                self.close()
+                raise DaemonConnectionError(str(error)) from error
+
+        if not line:
+            self.close()
+            message = 'connection closed by the daemon'
+            raise DaemonConnectionError(message)
+
+        response = json.loads(line)
+        if not response.pop('ok', False):
+            raise DaemonError(response.get('error', 'unknown error'))
+        return response
+
+    def close(self) -> None:
+        """Closes the connection with the daemon."""
+        if self._connection is not None:
+            self._reader.close()
+            self._connection.close()
+            self._connection = None
+
+
+class RemotePlayer(Player):
+    """Player that delegates the playback to the daemon, used by the user interface attached to it.
+
+    When the daemon is not reachable anymore (it exited or another client shut it down), the player is disconnected:
+    it stops sending requests, reports a stopped playback and calls `on_disconnect` once.
+    """
+
+    autonomous = True
+
+    STATUS_TTL: ClassVar[float] = 0.2
+
+    def __init__(self, client: DaemonClient) -> None:  # pylint: disable=super-init-not-called
+        """Initializes the RemotePlayer object.
+
+        :param client: The client connected to the daemon.
+        """
+        self.client = client
+        self.connected = True
+        self.on_disconnect: Callable[[], None] | None = None
+
+        self.paused = False
+
+        self._loaded: Path | None = None
+        self._queue: list[Path] | None = None
+        self._synchronized_queue: list[Path] | None = None
+        self._status: dict[str, Any] = {}
+        self._status_time = 0.0
+
+    def _update(self, status: dict[str, Any]) -> dict[str, Any]:
+        """Caches the playback status reported by the daemon.
+
+        :param status: The playback status.
+
+        :returns: The playback status.
+        """
+        self._status = status
+        self._status_time = time.monotonic()
+        self.paused = status['paused']
+        return status
+
+    def _request(self, command: str, **arguments: Any) -> dict[str, Any] | None:  # noqa: ANN401
+        """Sends a command to the daemon, the player is disconnected if the daemon is not reachable anymore.
+
+        :param command: The command name.
+        :param **arguments: The command arguments.
+
+        :returns: The response of the daemon, None if the player is disconnected.
+
+        :raises DaemonError: If the daemon reports an error.
+        """
+        if not self.connected:
+            return None
+
+        try:
+            return self.client.request(command, **arguments)
+        except DaemonConnectionError as error:
+            logging.warning('the playback daemon is not reachable anymore: %s', error)
+            self._disconnect()
+            return None
+
+    def _send(self, command: str, **arguments: Any) -> None:  # noqa: ANN401
+        """Sends a command to the daemon and caches the playback status of its response.
+
+        :param command: The command name.
+        :param **arguments: The command arguments.
+        """
+        status = self._request(command, **arguments)
+        if status is not None:
+            self._update(status)
+
+    def _disconnect(self) -> None:
+        """Stops using the daemon, the playback is reported as stopped."""
+        self.connected = False
+        self.client.close()
+        self._update(
+            {
+                **self._status,
+                'path': None,
+                'busy': False,
+                'paused': False,
+                'position': 0.0,
+                'volume': self._status.get('volume', 1.0),
+            },
+        )
+        if self.on_disconnect is not None:
+            self.on_disconnect()
+
+    @property
+    def status(self) -> dict[str, Any]:
+        """Gets the playback status of the daemon, cached for a short time."""
+        if self.connected and time.monotonic() - self._status_time > self.STATUS_TTL:
+            self._send('status')
+        return self._status
+
+    @property
+    def path(self) -> Path | None:  # type: ignore[override]
+        """Gets the path of the song played by the daemon."""
+        return Path(self.status['path']) if self.status.get('path') else None
+
+    def load(self, path: Path) -> None:
+        """Loads a song to be played.
+
+        :param path: The path to the song.
+        """
+        self._loaded = path
+
+    def play(self, start: float = 0.0) -> None:
+        """Plays the loaded song in the daemon, sending the queue if it changed.
+
+        :param start: The position, in seconds, where the playback starts.
+        """
+        arguments: dict[str, Any] = {'path': str(self._loaded), 'start': start}
+        if self._queue is not None:
+            arguments['queue'] = [str(path) for path in self._queue]
+            self._queue = None
+        self._send('play', **arguments)
+
+    def prepare(self, path: Path) -> Future[Path]:
+        """The daemon prepares its own songs.
+
+        :param path: The path to the song.
+
+        :returns: A future already resolved with the path of the song.
+        """
+        future = Future[Path]()
+        future.set_result(path)
+        return future
+
+    def fade_out(self) -> bool:
+        """The daemon crossfades its own songs.
+
+        :returns: False, the caller must not change the song.
+        """
+        return False
+
+    def seek(self, position: float) -> None:
+        """Moves the playback to a position of the current song.
+
+        :param position: The position in seconds.
+        """
+        self._send('seek', position=position)
+
+    def pause(self) -> None:
+        """Pauses the playback."""
+        self._send('pause')
+
+    def unpause(self) -> None:
+        """Resumes the paused playback."""
+        self._send('resume')
+
+    def stop(self) -> None:
+        """Stops the playback."""
+        self._send('stop')
+
+    @property
+    def busy(self) -> bool:
+        """Indicates whether the daemon is playing a song."""
+        return self.status['busy']
+
+    @property
+    def position(self) -> float:
+        """Gets the playback position, in seconds, of the song played by the daemon."""
+        return self.status['position']
+
+    @property
+    def volume(self) -> float:
+        """Gets the playback volume."""
+        return self.status['volume']
+
+    @property
+    def track_format(self) -> tuple[int, int] | None:  # type: ignore[override]
+        """Gets the sample rate and the number of channels of the song played by the daemon."""
+        track_format = self.status.get('format')
+        return tuple(track_format) if track_format else None  # type: ignore[return-value]
+
+    @property
+    def output_format(self) -> tuple[int, int] | None:
+        """Gets the sample rate and the number of channels of the mixer of the daemon."""
+        output_format = self.status.get('output')
+        return tuple(output_format) if output_format else None  # type: ignore[return-value]
+
+    @volume.setter
+    def volume(self, value: float) -> None:
+        self._send('volume', value=value)
+
+    @property
+    def equalizer_enabled(self) -> bool:  # type: ignore[override]
+        """Indicates whether the daemon streams the songs through the equalizer."""
+        return self.status.get('equalizer', False)
+
+    @property
+    def dsp_stats(self) -> BlockStats:  # type: ignore[override]
+        """Gets the processing time of the blocks streamed by the daemon."""
+        return BlockStats(**self.status.get('dsp', {}))
+
+    def set_equalizer(self, enabled: bool, gains: list[float], preamp: float) -> None:  # noqa: FBT001
+        """Changes the equalizer settings of the daemon.
+
+        :param enabled: Whether the equalizer is enabled.
+        :param gains: The gains of the bands, in decibels.
+        :param preamp: The gain applied to the whole spectrum, in decibels.
+        """
+        self._send('equalizer', enabled=enabled, gains=list(gains), preamp=preamp)
+
+    def set_queue(self, paths: Iterable[Path]) -> None:
+        """Sends the queue of songs to the daemon with the next played song, if it changed.
+
+        :param paths: The paths of the queued songs, in playback order.
+        """
+        queue = list(paths)
+        if queue != self._synchronized_queue:
+            self._queue = queue
+            self._synchronized_queue = queue
+
+    def remote_queue(self) -> tuple[list[Path], int | None]:
+        """Gets the queue of songs of the daemon.
+
+        :returns: The paths of the queued songs and the position of the current song, no songs if the player is
+            disconnected.
+        """
+        response = self._request('queue')
+        if response is None:
+            return [], None
+        self._synchronized_queue = [Path(path) for path in response['paths']]
+        return self._synchronized_queue, response['index']
+
+    def prefetch(self, paths: Iterable[Path]) -> None:
+        """The daemon prepares its own upcoming songs.
+
+        :param paths: The paths of the upcoming songs.
+        """
+
+    def close(self) -> None:
+        """Closes the connection with the daemon."""
+        self.client.close()
@@ -0,0 +1,592 @@
+"""Module that defines the DecoderPool class, a pool of long-lived worker processes that decode the songs.
+
+The workers are started when jobs are submitted (one more each time all of them are busy, up to the size of the pool)
+and kept alive, so probing, analyzing or transcoding thousands of songs does not start a process per song. Each worker
+initializes the mixer once, without audio device, and decodes the formats that the mixer supports natively: `ffmpeg`
+is only run for the other formats.
+
+The jobs are sent through the pipe of the worker with the fewest pending jobs, and a background thread of the parent
+process resolves their futures as the results arrive. The decoded samples come back in shared memory blocks: only the
+name and the layout of a block are pickled, the samples are viewed by the parent process without being copied.
+"""
+
+import atexit
+import contextlib
+import io
+import itertools
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from collections import deque
+from concurrent.futures import CancelledError, Future, InvalidStateError
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pygame
+from pydub import AudioSegment
+from pygame import mixer, sndarray
+
+from cplayer.src.elements import CONFIG
+from cplayer.src.elements.audio_buffer import AudioBuffer
+from cplayer.src.elements.formats import AudioInfo, probe
+from cplayer.src.elements.logs import LogService, RateLimitFilter
+from cplayer.src.elements.metadata import TrackMetadata
+
+
+def available_cores() -> int:
+    """Gets the number of cores available to the process.
+
+    :returns: The number of cores.
+    """
+    return len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+
+
+class DecoderError(Exception):
+    """Error raised when a worker of the decoder pool exits before finishing its jobs."""
+
+
+@dataclass
+class SharedPcm:
+    """Layout of PCM samples written in a shared memory block by a worker."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+    frame_rate: int
+    seconds: float
+
+
+class PcmBlock:
+    """PCM samples decoded by a worker, viewed in a shared memory block."""
+
+    def __init__(self, memory: SharedMemory, samples: np.ndarray, frame_rate: int, seconds: float) -> None:
+        """Initializes the PcmBlock object.
+
+        :param memory: The shared memory block, already unlinked.
+        :param samples: The samples viewed in the block, with shape (frames,) or (frames, channels).
+        :param frame_rate: The sample rate.
+        :param seconds: The duration of the whole song, the samples may only be its tail.
+        """
+        self.memory = memory
+        self.samples = samples
+        self.frame_rate = frame_rate
+        self.seconds = seconds
+
+    @classmethod
+    def attach(cls, shared: SharedPcm) -> 'PcmBlock':
+        """Views the samples written by a worker, the block is freed when it is closed.
+
+        :param shared: The layout of the samples.
+
+        :returns: The samples.
+        """
+        memory = SharedMemory(shared.name)
+        memory.unlink()
+        samples = np.ndarray(shared.shape, dtype=np.dtype(shared.dtype), buffer=memory.buf)
+        return cls(memory, samples, shared.frame_rate, shared.seconds)
+
+    def close(self) -> None:
+        """Releases the shared memory block, the samples must not be used anymore."""
+        self.samples = np.empty((0, *self.samples.shape[1:]), dtype=self.samples.dtype)
+        with contextlib.suppress(BufferError):
+            self.memory.close()
+
+    def __del__(self) -> None:
+        """Releases the shared memory block when the samples are not referenced anymore."""
+        self.close()
+
+
+def _share(samples: np.ndarray, frame_rate: int, seconds: float) -> SharedPcm:
+    """Copies samples to a new shared memory block, that is unlinked by the parent process.
+
+    :param samples: The samples.
+    :param frame_rate: The sample rate.
+    :param seconds: The duration of the whole song.
+
+    :returns: The layout of the samples.
+    """
+    memory = SharedMemory(create=True, size=max(samples.nbytes, 1))
+    try:
+        np.ndarray(samples.shape, dtype=samples.dtype, buffer=memory.buf)[...] = samples
+        return SharedPcm(memory.name, samples.shape, samples.dtype.str, frame_rate, seconds)
+    finally:
+        memory.close()
+
+
+def _initialize_mixer(mixer_format: tuple[int, int, int] | None = None) -> None:
+    """Initializes the mixer of a worker, with the format of the mixer of the parent process if it is required.
+
+    :param mixer_format: The sample rate, the sample size and the number of channels.
+    """
+    if mixer_format is not None and mixer.get_init() not in {None, mixer_format}:
+        mixer.quit()
+    if not mixer.get_init():
+        if mixer_format is None:
+            mixer.init()
+        else:
+            mixer.init(*mixer_format)
+
+
+def probe_job(path: str) -> AudioInfo:
+    """Reads the stream information of a song, from its headers or by decoding it if they cannot be read.
+
+    :param path: The path to the song.
+
+    :returns: The stream information.
+    """
+    song_path = Path(path)
+    info = probe(song_path)
+    if info is not None:
+        return info
+
+    _initialize_mixer()
+    buffer = AudioBuffer.open(song_path)
+    return AudioInfo(buffer.seconds, buffer.frame_rate, buffer.channels)
+
+
+def _decode_tail(path: Path, seconds: float) -> np.ndarray | None:
+    """Decodes the last seconds of a song to the sample format of the mixer, without decoding the rest of the song.
+
+    The last frames of a WAV file are read from its memory-mapped data chunk and converted by the mixer, the other
+    formats are decoded from their end by `ffmpeg` (`-sseof`), if it is installed.
+
+    :param path: The path to the song.
+    :param seconds: The duration of the tail.
+
+    :returns: The samples, with the shape of the samples of the mixer, or None if the tail cannot be decoded alone.
+    """
+    frame_rate, size, channels = mixer.get_init()
+    if path.suffix.lower() == '.wav':
+        with contextlib.suppress(OSError, ValueError, pygame.error):
+            buffer = AudioBuffer.from_wav(path)
+            if buffer.samples.dtype.kind in 'iu':
+                stream = io.BytesIO()
+                with wave.open(stream, 'wb') as wav_file:
+                    wav_file.setnchannels(buffer.channels)
+                    wav_file.setsampwidth(buffer.samples.dtype.itemsize)
+                    wav_file.setframerate(buffer.frame_rate)
+                    wav_file.writeframes(buffer.samples[-int(seconds * buffer.frame_rate) :].tobytes())
+                stream.seek(0)
+                return sndarray.samples(mixer.Sound(file=stream))
+
+    if size == -16 and shutil.which('ffmpeg'):  # noqa: PLR2004
+        result = subprocess.run(  # noqa: S603
+            [  # noqa: S607
+                'ffmpeg',
+                '-nostdin',
+                '-loglevel',
+                'error',
+                '-sseof',
+                f'-{seconds:.3f}',
+                '-i',
+                str(path),
+                '-f',
+                's16le',
+                '-ac',
+                str(channels),
+                '-ar',
+                str(frame_rate),
+                '-',
+            ],
+            capture_output=True,
+            check=False,
+        )
+        data = result.stdout[: len(result.stdout) - len(result.stdout) % (2 * channels)]
+        if result.returncode == 0 and data:
+            samples = np.frombuffer(data, dtype=np.int16)
+            return samples if channels == 1 else samples.reshape(-1, channels)
+    return None
+
+
+def decode_job(path: str, mixer_format: tuple[int, int, int], seconds: float | None = None) -> SharedPcm:
+    """Decodes a song, or its tail, to the sample format of the mixer.
+
+    The tail is decoded alone when the duration of the song is known from its headers, otherwise the whole song is
+    decoded and only its tail is kept.
+
+    :param path: The path to a song that the mixer can decode.
+    :param mixer_format: The sample rate, the sample size and the number of channels of the mixer.
+    :param seconds: The duration of the decoded tail, by default the whole song is decoded.
+
+    :returns: The layout of the samples, with the shape of the samples of the mixer: (frames,) or (frames, channels).
+    """
+    _initialize_mixer(mixer_format)
+    frame_rate = mixer.get_init()[0]
+
+    if seconds:
+        info = probe(Path(path))
+        tail = _decode_tail(Path(path), seconds) if info is not None else None
+        if info is not None and tail is not None:
+            return _share(tail, frame_rate, info.seconds)
+
+    samples = sndarray.samples(mixer.Sound(path))
+    tail = samples[-int(seconds * frame_rate) :] if seconds else samples
+    return _share(tail, frame_rate, len(samples) / frame_rate)
+
+
+def analyze_job(path: str, size: int, mtime: int) -> TrackMetadata:
+    """Analyzes a song (see `cplayer.src.elements.analysis.analyze`).
+
+    :param path: The path to the song.
+    :param size: The size of the file, in bytes.
+    :param mtime: The modification time of the file, in nanoseconds.
+
+    :returns: The metadata of the song.
+    """
+    from cplayer.src.elements.analysis import analyze  # noqa: PLC0415  # pylint: disable=import-outside-toplevel
+
+    _initialize_mixer()
+    return analyze(path, size, mtime)
+
+
+def transcode_job(path: str, target: str, audio_format: str) -> str:
+    """Transcodes a song to a format that the mixer can stream.
+
+    :param path: The path to the song.
+    :param target: The path to the transcoded file.
+    :param audio_format: The format of the transcoded file.
+
+    :returns: The path to the transcoded file.
+    """
+    AudioSegment.from_file(path).export(target, format=audio_format)
+    return target
+
+
+JOBS = {'probe': probe_job, 'decode': decode_job, 'analyze': analyze_job, 'transcode': transcode_job}
+
+
+def _configure_logging(settings: tuple[str, int | str, str, int, float] | None) -> None:
+    """Writes the records of a worker directly to the log file of the application.
+
+    :param settings: The path, the level, the format, the burst and the window of the log file, None to drop them.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+
+    if settings is None:
+        root.addHandler(logging.NullHandler())
+        return
+
+    path, level, log_format, burst, window = settings
+    handler = logging.FileHandler(path, encoding='UTF-8', delay=True)
+    handler.setFormatter(logging.Formatter(log_format))
+    handler.addFilter(RateLimitFilter(burst, window))
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def _serve(connection: Connection, log_settings: tuple[str, int | str, str, int, float] | None) -> None:
+    """Runs the jobs received through the pipe until the pool is shut down, it is executed by the worker processes.
+
+    All the messages waiting in the pipe are received before running the next job, so the jobs cancelled meanwhile are
+    skipped.
+
+    :param connection: The end of the pipe of the worker.
+    :param log_settings: The settings of the log file of the application.
+    """
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    _configure_logging(log_settings)
+
+    jobs: deque[tuple[int, str, tuple[Any, ...]]] = deque()
+    while True:
+        try:
+            while not jobs or connection.poll():
+                message = connection.recv()
+                if message is None:
+                    return
+                if message[1] == 'cancel':
+                    _skip(connection, jobs, message[0])
+                else:
+                    jobs.append(message)
+        except (EOFError, OSError):
+            break
+
+        identifier, kind, args = jobs.popleft()
+        try:
+            response = (identifier, True, JOBS[kind](*args))
+        except Exception as error:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+            response = (identifier, False, error)
+
+        try:
+            connection.send(response)
+        except (EOFError, OSError):
+            break
+        except Exception as error:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+            connection.send((identifier, False, DecoderError(f'{type(error).__name__}: {error}')))
+
+
+def _skip(connection: Connection, jobs: deque[tuple[int, str, tuple[Any, ...]]], identifier: int) -> None:
+    """Removes a cancelled job from the jobs received by a worker, unless it already ran.
+
+    :param connection: The end of the pipe of the worker.
+    :param jobs: The jobs received by the worker and not run yet.
+    :param identifier: The identifier of the cancelled job.
+    """
+    for job in jobs:
+        if job[0] == identifier:
+            jobs.remove(job)
+            connection.send((identifier, False, CancelledError()))
+            return
+
+
+@dataclass
+class _Worker:
+    """Worker process of the pool."""
+
+    process: BaseProcess
+    connection: Connection
+    pending: set[int] = field(default_factory=set)
+    send_lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class DecoderPool:
+    """Pool of long-lived worker processes that probe, decode, analyze and transcode the songs."""
+
+    def __init__(self, workers: int | None = None) -> None:
+        """Initializes the DecoderPool object, the workers are only started when jobs are submitted.
+
+        :param workers: The maximum number of worker processes, by default the number of cores available.
+        """
+        self.workers = workers or available_cores()
+
+        self._context = multiprocessing.get_context('spawn')
+        self._workers: list[_Worker] = []
+        self._futures: dict[int, tuple[_Worker, Future[Any]]] = {}
+        self._identifiers = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._wakeup_reader, self._wakeup_writer = self._context.Pipe(duplex=False)
+        self._reader: threading.Thread | None = None
+
+    def _start_worker(self) -> _Worker:
+        """Starts a worker process.
+
+        :returns: The worker.
+        """
+        connection, worker_connection = self._context.Pipe()
+        service = LogService.current
+        process = self._context.Process(
+            target=_serve,
+            args=(worker_connection, service.worker_settings() if service is not None else None),
+            name=f'cplayer-decoder-{len(self._workers)}',
+            daemon=True,
+        )
+        process.start()
+        worker_connection.close()
+
+        worker = _Worker(process, connection)
+        self._workers.append(worker)
+        if self._reader is None:
+            self._reader = threading.Thread(target=self._read, name='cplayer-decoders', daemon=True)
+            self._reader.start()
+            atexit.register(self.shutdown)
+        else:
+            self._wakeup_writer.send(None)
+        return worker
+
+    def _choose_worker(self) -> _Worker:
+        """Chooses the worker of a new job, a worker is started if all the workers are busy.
+
+        :returns: The worker with the fewest pending jobs.
+        """
+        worker = min(self._workers, key=lambda worker: len(worker.pending), default=None)
+        if worker is None or (worker.pending and len(self._workers) < self.workers):
+            worker = self._start_worker()
+        return worker
+
+    def submit(self, kind: str, *args: Any) -> Future[Any]:  # noqa: ANN401
+        """Submits a job to the pool.
+
+        :param kind: The kind of job: `probe`, `decode`, `analyze` or `transcode`.
+        :param *args: The arguments of the job.
+
+        :returns: The future resolved with the result of the job, the job is skipped if the future is cancelled before
+            the worker runs it.
+
+        :raises RuntimeError: If the pool is shut down.
+        """
+        future: Future[Any] = Future()
+        with self._lock:
+            if self._closed:
+                message = 'the decoder pool is shut down'
+                raise RuntimeError(message)
+
+            worker = self._choose_worker()
+            identifier = next(self._identifiers)
+            worker.pending.add(identifier)
+            self._futures[identifier] = (worker, future)
+
+        try:
+            with worker.send_lock:
+                worker.connection.send((identifier, kind, args))
+        except (OSError, ValueError) as error:
+            self._resolve(identifier, success=False, result=DecoderError(f'the job cannot be sent: {error}'))
+        future.add_done_callback(lambda future: self._cancel(identifier) if future.cancelled() else None)
+        return future
+
+    def _cancel(self, identifier: int) -> None:
+        """Asks the worker of a cancelled job to skip it, if the worker did not run it yet.
+
+        :param identifier: The identifier of the job.
+        """
+        with self._lock:
+            worker, _ = self._futures.get(identifier, (None, None))
+            if worker is None or self._closed:
+                return
+
+        with contextlib.suppress(OSError, ValueError), worker.send_lock:
+            worker.connection.send((identifier, 'cancel', ()))
+
+    def probe(self, path: Path) -> Future[AudioInfo]:
+        """Reads the stream information of a song, by decoding it if its headers cannot be read.
+
+        :param path: The path to the song.
+
+        :returns: The future resolved with the stream information.
+        """
+        return self.submit('probe', str(path))
+
+    def decode(self, path: Path, seconds: float | None = None) -> Future[PcmBlock]:
+        """Decodes a song, or its tail, to the sample format of the mixer.
+
+        :param path: The path to a song that the mixer can decode.
+        :param seconds: The duration of the decoded tail, by default the whole song is decoded.
+
+        :returns: The future resolved with the samples, they must be closed once they are not used anymore.
+        """
+        return self.submit('decode', str(path), mixer.get_init(), seconds)
+
+    def analyze(self, path: str, size: int, mtime: int) -> Future[TrackMetadata]:
+        """Analyzes a song: duration, corrupt file, loudness and waveform peaks.
+
+        :param path: The path to the song.
+        :param size: The size of the file, in bytes.
+        :param mtime: The modification time of the file, in nanoseconds.
+
+        :returns: The future resolved with the metadata of the song.
+        """
+        return self.submit('analyze', path, size, mtime)
+
+    def transcode(self, path: Path, target: Path, audio_format: str) -> Future[str]:
+        """Transcodes a song to a format that the mixer can stream.
+
+        :param path: The path to the song.
+        :param target: The path to the transcoded file.
+        :param audio_format: The format of the transcoded file.
+
+        :returns: The future resolved with the path to the transcoded file.
+        """
+        return self.submit('transcode', str(path), str(target), audio_format)
+
+    def _resolve(self, identifier: int, success: bool, result: Any) -> None:  # noqa: ANN401
+        """Resolves the future of a job.
+
+        :param identifier: The identifier of the job.
+        :param success: Whether the job succeeded.
+        :param result: The result of the job, or its exception.
+        """
+        with self._lock:
+            worker, future = self._futures.pop(identifier, (None, None))
+            if worker is not None:
+                worker.pending.discard(identifier)
+        if future is None:
+            return
+
+        if success and isinstance(result, SharedPcm):
+            try:
+                result = PcmBlock.attach(result)
+            except OSError as error:
+                success, result = False, error
+
+        try:
+            if success:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+        except InvalidStateError:
+            if isinstance(result, PcmBlock):
+                result.close()
+
+    def _remove_worker(self, worker: _Worker) -> None:
+        """Removes a worker that exited, failing its pending jobs.
+
+        :param worker: The worker.
+        """
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            pending = list(worker.pending)
+
+        worker.process.join(timeout=1)
+        if pending and not self._closed:
+            logging.warning('decoder worker exited (code %s), %s jobs failed', worker.process.exitcode, len(pending))
+        for identifier in pending:
+            self._resolve(identifier, success=False, result=DecoderError('the decoder worker exited'))
+        worker.connection.close()
+
+    def _read(self) -> None:
+        """Resolves the futures of the jobs as the results are received, it is executed by the reader thread."""
+        while True:
+            with self._lock:
+                if self._closed and not self._workers:
+                    break
+                connections = {worker.connection: worker for worker in self._workers}
+
+            for connection in wait([*connections, self._wakeup_reader]):
+                if connection is self._wakeup_reader:
+                    with contextlib.suppress(EOFError, OSError):
+                        self._wakeup_reader.recv()
+                    continue
+
+                worker = connections[connection]
+                try:
+                    identifier, success, result = connection.recv()
+                except (EOFError, OSError):
+                    self._remove_worker(worker)
+                    continue
+                except Exception as error:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+                    logging.warning('result of a decoder worker cannot be read: %s', error)
+                    continue
+                self._resolve(identifier, success, result)
+
+    def shutdown(self) -> None:
+        """Stops the worker processes, the pending jobs are cancelled."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+            futures = [future for _, future in self._futures.values()]
+
+        for worker in workers:
+            with contextlib.suppress(OSError, ValueError), worker.send_lock:
+                worker.connection.send(None)
+        for worker in workers:
+            worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        for future in futures:
+            future.cancel()
+
+        if self._reader is not None:
+            with contextlib.suppress(OSError):
+                self._wakeup_writer.send(None)
+            self._reader.join(timeout=1)
+        atexit.unregister(self.shutdown)
+
+
+DECODERS = DecoderPool(CONFIG.data.general.decoders.workers or None)
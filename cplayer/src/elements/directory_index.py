@@ -0,0 +1,109 @@
+"""Module that defines the DirectoryIndex class, a cache of the number of audio files of the directories."""
+
+import os
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from cplayer.src.elements.formats import SUPPORTED_EXTENSIONS
+
+
+@dataclass
+class _DirectoryEntry:
+    """Content of a directory, valid while the directory modification time does not change."""
+
+    mtime: int
+    files: int
+    directories: list[Path] = field(default_factory=list)
+    total: int = 0
+
+
+class DirectoryIndex:
+    """Cache of the number of audio files of the directories (including their subdirectories).
+
+    The content of each directory is listed with `os.scandir`, whose entries already know their type, and it is cached
+    by the directory modification time, so a directory is listed again only when an entry is added, removed or renamed.
+    The cache is updated entry by entry, so it can be shared by several background workers.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the DirectoryIndex object."""
+        self._entries: dict[Path, _DirectoryEntry] = {}
+
+    def cached(self, path: Path) -> int | None:
+        """Gets the last computed number of audio files of a directory, without accessing the file system.
+
+        :param path: The path to the directory.
+
+        :returns: The number of audio files, or None if it was not computed yet.
+        """
+        entry = self._entries.get(path)
+        return entry.total if entry is not None else None
+
+    def subdirectories(self, path: Path) -> dict[Path, int]:
+        """Gets the last computed number of audio files of the subdirectories of a directory.
+
+        :param path: The path to the directory.
+
+        :returns: The number of audio files of each subdirectory whose count was computed.
+        """
+        entry = self._entries.get(path)
+        if entry is None:
+            return {}
+        return {
+            directory: self._entries[directory].total for directory in entry.directories if directory in self._entries
+        }
+
+    @staticmethod
+    def _scan(path: Path, mtime: int) -> _DirectoryEntry:
+        """Lists the audio files and the subdirectories of a directory.
+
+        :param path: The path to the directory.
+        :param mtime: The modification time of the directory.
+
+        :returns: The content of the directory.
+        """
+        entry = _DirectoryEntry(mtime, files=0)
+        try:
+            with os.scandir(path) as entries:
+                for directory_entry in entries:
+                    if directory_entry.name.startswith('.'):
+                        continue
+                    if directory_entry.is_dir(follow_symlinks=False):
+                        entry.directories.append(Path(directory_entry.path))
+                    elif os.path.splitext(directory_entry.name)[1].lower() in SUPPORTED_EXTENSIONS:  # noqa: PTH122
+                        entry.files += 1
+        except OSError:
+            pass
+        return entry
+
+    def count(self, path: Path, is_cancelled: Callable[[], bool] = lambda: False) -> int | None:
+        """Counts the audio files of a directory and its subdirectories, listing only the modified directories.
+
+        :param path: The path to the directory.
+        :param is_cancelled: A function that indicates whether the count must be aborted.
+
+        :returns: The number of audio files, or None if the count was aborted.
+        """
+        if is_cancelled():
+            return None
+
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+        entry = self._entries.get(path)
+        if entry is None or entry.mtime != mtime:
+            entry = self._scan(path, mtime)
+
+        total = entry.files
+        for directory in entry.directories:
+            count = self.count(directory, is_cancelled)
+            if count is None:
+                return None
+            total += count
+
+        entry.total = total
+        self._entries[path] = entry
+        return total
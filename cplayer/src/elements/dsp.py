@@ -0,0 +1,360 @@
+"""Block-streaming output of the player, used when the songs are processed by the equalizer.
+
+The songs are decoded block by block (WAV files are memory-mapped, the other formats are decoded by an `ffmpeg` pipe),
+each block of PCM samples is processed by the equalizer and queued on a mixer channel by a feeder thread, so a song is
+never decoded as a whole. The processing time of every block is measured, and compared to the duration of the block.
+"""
+
+import abc
+import logging
+import shutil
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from pygame import mixer, sndarray
+
+from cplayer.src.elements.audio_buffer import AudioBuffer
+from cplayer.src.elements.equalizer import Equalizer
+from cplayer.src.elements.instrumentation import METRICS
+
+
+SAMPLE_WIDTH = 2
+
+
+class PcmStream(abc.ABC):
+    """Stream of 16 bits PCM samples, the subclasses read the bytes of the frames."""
+
+    def __init__(self, frame_rate: int, channels: int) -> None:
+        """Initializes the PcmStream object.
+
+        :param frame_rate: The sample rate of the stream.
+        :param channels: The number of channels of the stream.
+        """
+        self.frame_rate = frame_rate
+        self.channels = channels
+
+    @abc.abstractmethod
+    def _read_bytes(self, frames: int) -> bytes:
+        """Reads the bytes of the next frames.
+
+        :param frames: The maximum number of frames.
+
+        :returns: The bytes, empty at the end of the stream.
+        """
+
+    def read(self, frames: int) -> np.ndarray:
+        """Reads the next frames.
+
+        :param frames: The maximum number of frames.
+
+        :returns: The samples, with shape (frames, channels), no frames at the end of the stream.
+        """
+        data = self._read_bytes(frames)
+        usable = len(data) - len(data) % (SAMPLE_WIDTH * self.channels)
+        return np.frombuffer(data[:usable], dtype=np.int16).reshape(-1, self.channels)
+
+    def close(self) -> None:  # noqa: B027
+        """Releases the resources of the stream, by default it has none."""
+
+
+class WaveStream(PcmStream):
+    """Stream of the samples of a 16 bits WAV file, read as views of the memory-mapped file."""
+
+    def __init__(self, path: Path, start: float = 0.0) -> None:
+        """Initializes the WaveStream object.
+
+        :param path: The path to the WAV file.
+        :param start: The position, in seconds, where the stream starts.
+
+        :raises ValueError: If the samples are not 16 bits integers.
+        """
+        self._buffer = AudioBuffer.from_wav(path)
+        if self._buffer.samples.dtype != np.int16:
+            message = f'unsupported sample type: {self._buffer.samples.dtype}'
+            raise ValueError(message)
+
+        super().__init__(self._buffer.frame_rate, self._buffer.channels)
+        self._position = min(int(start * self.frame_rate), len(self._buffer))
+
+    def _read_bytes(self, frames: int) -> bytes:
+        """Reads a copy of the bytes of the next frames.
+
+        :param frames: The maximum number of frames.
+
+        :returns: The bytes, empty at the end of the stream.
+        """
+        return self.read(frames).tobytes()
+
+    def read(self, frames: int) -> np.ndarray:
+        """Reads the next frames, without copying them.
+
+        :param frames: The maximum number of frames.
+
+        :returns: The samples, with shape (frames, channels), no frames at the end of the stream.
+        """
+        block = self._buffer.samples[self._position : self._position + frames]
+        self._position += len(block)
+        return block
+
+
+class FfmpegStream(PcmStream):
+    """Stream of the samples of a song decoded by an `ffmpeg` process."""
+
+    def __init__(self, path: Path, frame_rate: int, channels: int, start: float = 0.0) -> None:
+        """Initializes the FfmpegStream object.
+
+        :param path: The path to the song.
+        :param frame_rate: The sample rate of the stream, the song is resampled if required.
+        :param channels: The number of channels of the stream.
+        :param start: The position, in seconds, where the stream starts.
+        """
+        super().__init__(frame_rate, channels)
+        self._process = subprocess.Popen(  # noqa: S603
+            [  # noqa: S607
+                'ffmpeg',
+                '-nostdin',
+                '-loglevel',
+                'error',
+                '-ss',
+                f'{start:.3f}',
+                '-i',
+                str(path),
+                '-f',
+                's16le',
+                '-ac',
+                str(channels),
+                '-ar',
+                str(frame_rate),
+                'pipe:1',
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def _read_bytes(self, frames: int) -> bytes:
+        if self._process.stdout is None:
+            return b''
+        return self._process.stdout.read(frames * SAMPLE_WIDTH * self.channels)
+
+    def close(self) -> None:
+        """Terminates the `ffmpeg` process."""
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+        if self._process.stdout is not None:
+            self._process.stdout.close()
+
+
+def can_stream(path: Path) -> bool:
+    """Indicates whether a song can probably be streamed block by block.
+
+    :param path: The path to the song.
+
+    :returns: True if the song is a WAV file or `ffmpeg` is installed, False otherwise.
+    """
+    return path.suffix.lower() == '.wav' or shutil.which('ffmpeg') is not None
+
+
+def open_stream(path: Path, frame_rate: int, channels: int, start: float = 0.0) -> PcmStream | None:
+    """Opens a stream of the samples of a song.
+
+    :param path: The path to the song.
+    :param frame_rate: The sample rate of the stream when the song must be decoded by `ffmpeg`.
+    :param channels: The number of channels of the stream when the song must be decoded by `ffmpeg`.
+    :param start: The position, in seconds, where the stream starts.
+
+    :returns: The stream, or None if the song cannot be streamed (not a 16 bits WAV file and `ffmpeg` not installed).
+    """
+    if path.suffix.lower() == '.wav':
+        try:
+            return WaveStream(path, start)
+        except (OSError, ValueError) as error:
+            logging.info('"%s" cannot be streamed as WAV: %s', path, error)
+
+    if shutil.which('ffmpeg') is None:
+        return None
+    return FfmpegStream(path, frame_rate, channels, start)
+
+
+@dataclass
+class BlockStats:
+    """Processing time of the blocks of the songs."""
+
+    blocks: int = 0
+    seconds: float = 0.0
+    maximum: float = 0.0
+    audio_seconds: float = 0.0
+
+    def record(self, seconds: float, audio_seconds: float) -> None:
+        """Records the processing time of a block.
+
+        :param seconds: The processing time in seconds.
+        :param audio_seconds: The duration of the block in seconds.
+        """
+        self.blocks += 1
+        self.seconds += seconds
+        self.maximum = max(self.maximum, seconds)
+        self.audio_seconds += audio_seconds
+
+    @property
+    def mean(self) -> float:
+        """Gets the mean processing time of a block, in seconds."""
+        return self.seconds / self.blocks if self.blocks else 0.0
+
+    @property
+    def load(self) -> float:
+        """Gets the ratio between the processing time and the duration of the blocks (1 means real time)."""
+        return self.seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+
+class BlockOutput:
+    """Plays a stream, processed by the equalizer block by block, through a mixer channel.
+
+    The feeder thread keeps a block queued behind the block being played, and tracks when each block starts playing to
+    know the playback position.
+    """
+
+    POLLING_INTERVAL = 0.01
+
+    def __init__(  # noqa: PLR0913
+        self,
+        stream: PcmStream,
+        equalizer: Equalizer,
+        channel: mixer.Channel,
+        stats: BlockStats,
+        start: float = 0.0,
+    ) -> None:
+        """Initializes the BlockOutput object.
+
+        :param stream: The stream of the song, in the format of the mixer.
+        :param equalizer: The equalizer that processes the blocks.
+        :param channel: The mixer channel where the blocks are played.
+        :param stats: The statistics where the processing time of the blocks is recorded.
+        :param start: The position, in seconds, where the stream starts.
+        """
+        self.stream = stream
+        self.equalizer = equalizer
+        self.channel = channel
+        self.stats = stats
+        self.start = start
+
+        self.paused = False
+        self.finished = False
+
+        self._played_frames = 0
+        self._playing_frames = 0
+        self._queued_frames = 0
+        self._block_start = 0.0
+        self._paused_at: float | None = None
+
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._feed, name='cplayer-dsp', daemon=True)
+
+    def _next_block(self) -> np.ndarray | None:
+        """Reads and processes the next block of the stream.
+
+        :returns: The processed samples, or None at the end of the stream.
+        """
+        samples = self.stream.read(self.equalizer.block_frames)
+        start = time.perf_counter()
+        block = self.equalizer.process(samples) if len(samples) else self.equalizer.flush()
+        elapsed = time.perf_counter() - start
+
+        if not len(block):
+            return None
+
+        self.stats.record(elapsed, len(block) / self.stream.frame_rate)
+        if METRICS.enabled:
+            METRICS.record('dsp.block', elapsed)
+        return block
+
+    def _feed(self) -> None:
+        """Queues the processed blocks on the channel until the end of the stream."""
+        try:
+            exhausted = False
+            while not self._stopped.is_set():
+                if self.paused or (self.channel.get_queue() is not None and self.channel.get_busy()):
+                    time.sleep(self.POLLING_INTERVAL)
+                    continue
+
+                if self._queued_frames:
+                    # The queued block started playing.
+                    with self._lock:
+                        self._played_frames += self._playing_frames
+                        self._playing_frames, self._queued_frames = self._queued_frames, 0
+                        self._block_start = time.monotonic()
+
+                if exhausted:
+                    if not self.channel.get_busy():
+                        break
+                    time.sleep(self.POLLING_INTERVAL)
+                    continue
+
+                block = self._next_block()
+                if block is None:
+                    exhausted = True
+                    continue
+
+                sound = sndarray.make_sound(np.ascontiguousarray(block if self.stream.channels > 1 else block[:, 0]))
+                with self._lock:
+                    if self.channel.get_busy():
+                        self.channel.queue(sound)
+                        self._queued_frames = len(block)
+                    else:
+                        self.channel.play(sound)
+                        self._played_frames += self._playing_frames
+                        self._playing_frames = len(block)
+                        self._block_start = time.monotonic()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logging.exception('error streaming the song')
+        finally:
+            self.stream.close()
+            self.finished = True
+
+    def play(self) -> None:
+        """Starts streaming the song."""
+        self._thread.start()
+
+    @property
+    def busy(self) -> bool:
+        """Indicates whether the song is being played."""
+        return not self.finished
+
+    @property
+    def position(self) -> float:
+        """Gets the playback position, in seconds."""
+        with self._lock:
+            now = self._paused_at if self._paused_at is not None else time.monotonic()
+            elapsed = min((now - self._block_start) * self.stream.frame_rate, self._playing_frames)
+            return self.start + (self._played_frames + max(elapsed, 0)) / self.stream.frame_rate
+
+    def pause(self) -> None:
+        """Pauses the playback."""
+        with self._lock:
+            self.paused = True
+            self._paused_at = time.monotonic()
+            self.channel.pause()
+
+    def unpause(self) -> None:
+        """Resumes the paused playback."""
+        with self._lock:
+            if self._paused_at is not None:
+                self._block_start += time.monotonic() - self._paused_at
+                self._paused_at = None
+            self.channel.unpause()
+            self.paused = False
+
+    def stop(self) -> None:
+        """Stops the playback and the feeder thread."""
+        self._stopped.set()
+        self.channel.stop()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        elif not self._thread.is_alive():
+            self.stream.close()
+            self.finished = True
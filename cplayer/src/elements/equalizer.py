@@ -0,0 +1,135 @@
+"""Module that defines the Equalizer class, a 10-band graphic equalizer with a preamp.
+
+The equalizer is a linear phase FIR filter whose frequency response interpolates the gains of the bands (in decibels,
+over a logarithmic frequency scale). The PCM blocks are filtered with the FFT overlap-add method, all the channels of a
+block at once, so the cost of a block is a couple of FFTs whatever the gains are.
+"""
+
+import threading
+from collections.abc import Sequence
+
+import numpy as np
+
+
+BANDS = (31, 62, 125, 250, 500, 1000, 2000, 4000, 8000, 16000)
+MAX_GAIN = 12.0
+
+INT16_MIN, INT16_MAX = -32768, 32767
+
+
+def clamp_gain(gain: float) -> float:
+    """Limits a gain to the range supported by the equalizer.
+
+    :param gain: The gain in decibels.
+
+    :returns: The gain between -MAX_GAIN and MAX_GAIN decibels.
+    """
+    return min(max(float(gain), -MAX_GAIN), MAX_GAIN)
+
+
+def design_kernel(gains: Sequence[float], preamp: float, frame_rate: int, taps: int) -> np.ndarray:
+    """Designs the impulse response of the equalizer with the frequency sampling method.
+
+    :param gains: The gains of the bands, in decibels.
+    :param preamp: The gain applied to the whole spectrum, in decibels.
+    :param frame_rate: The sample rate of the signal.
+    :param taps: The length of the impulse response, an odd number.
+
+    :returns: The impulse response, symmetric so the filter has a linear phase.
+    """
+    size = taps + 1
+    frequencies = np.fft.rfftfreq(size, d=1 / frame_rate)
+    decibels = np.interp(np.log10(np.maximum(frequencies, BANDS[0])), np.log10(BANDS), gains) + preamp
+
+    impulse = np.fft.irfft(10 ** (decibels / 20), n=size)
+    kernel = np.roll(impulse, taps // 2)[:taps]
+    return kernel * np.hanning(taps)
+
+
+class Equalizer:
+    """Graphic equalizer that filters fixed-size PCM blocks."""
+
+    TAPS = 2047
+
+    def __init__(  # noqa: PLR0913
+        self,
+        gains: Sequence[float],
+        preamp: float,
+        frame_rate: int,
+        channels: int,
+        block_frames: int,
+    ) -> None:
+        """Initializes the Equalizer object.
+
+        :param gains: The gains of the bands, in decibels.
+        :param preamp: The gain applied to the whole spectrum, in decibels.
+        :param frame_rate: The sample rate of the blocks.
+        :param channels: The number of channels of the blocks.
+        :param block_frames: The number of frames of the blocks.
+        """
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.block_frames = block_frames
+        self.fft_size = 1 << (block_frames + self.TAPS - 2).bit_length()
+
+        self.gains = [0.0] * len(BANDS)
+        self.preamp = 0.0
+        self.flat = True
+
+        self._response: np.ndarray | None = None
+        self._overlap = np.zeros((self.TAPS - 1, channels))
+        self._lock = threading.Lock()
+
+        self.set_gains(gains, preamp)
+
+    def set_gains(self, gains: Sequence[float], preamp: float) -> None:
+        """Changes the gains of the equalizer, the next processed block uses them.
+
+        :param gains: The gains of the bands, in decibels.
+        :param preamp: The gain applied to the whole spectrum, in decibels.
+        """
+        gains = [clamp_gain(gain) for gain in gains]
+        preamp = clamp_gain(preamp)
+        flat = not any(gains) and not preamp
+
+        response = None
+        if not flat:
+            kernel = design_kernel(gains, preamp, self.frame_rate, self.TAPS)
+            response = np.fft.rfft(kernel, n=self.fft_size)[:, np.newaxis]
+
+        with self._lock:
+            self.gains, self.preamp, self.flat = gains, preamp, flat
+            self._response = response
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Filters a block of samples.
+
+        The filter delays the signal by half its length, the overlap of the previous block is added to the start of
+        the block and the overlap of the block is kept for the next one.
+
+        :param block: The samples, with shape (frames, channels), at most `block_frames` frames.
+
+        :returns: The filtered samples, with the same shape, as 16 bits integers.
+        """
+        with self._lock:
+            response = self._response
+        if response is None:
+            return block
+
+        frames = len(block)
+        spectrum = np.fft.rfft(block, n=self.fft_size, axis=0)
+        filtered = np.fft.irfft(spectrum * response, n=self.fft_size, axis=0)[: frames + self.TAPS - 1]
+
+        filtered[: self.TAPS - 1] += self._overlap
+        self._overlap = filtered[frames:].copy()
+        return np.clip(filtered[:frames], INT16_MIN, INT16_MAX).astype(np.int16)
+
+    def flush(self) -> np.ndarray:
+        """Gets the end of the filtered signal, kept as overlap after the last block.
+
+        :returns: The remaining samples, as 16 bits integers (none if no block was filtered).
+        """
+        overlap, self._overlap = self._overlap, np.zeros_like(self._overlap)
+        if not overlap.any():
+            return np.empty((0, self.channels), dtype=np.int16)
+        return np.clip(overlap, INT16_MIN, INT16_MAX).astype(np.int16)
@@ -0,0 +1,441 @@
+"""Module that defines the registry of audio formats supported by the player.
+
+Every supported extension is associated with an `AudioFormat` that knows how to read the stream information (duration,
+sample rate and channels) directly from the container headers, so a song does not need to be decoded to know how long
+it is. `pygame.mixer.music` streams most of these formats natively, the ones that it cannot stream are marked as not
+streamable and must be transcoded before being played.
+"""
+
+import struct
+import uuid
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+
+@dataclass(frozen=True)
+class AudioInfo:
+    """Stream information read from the headers of an audio file."""
+
+    seconds: float
+    frame_rate: int
+    channels: int
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    """Audio format supported by the player."""
+
+    name: str
+    extensions: tuple[str, ...]
+    probe: Callable[[BinaryIO, int], AudioInfo | None]
+    streamable: bool = True
+
+
+_ID3V2_HEADER_SIZE = 10
+_ID3V1_TAG_SIZE = 128
+
+_MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    25: (11025, 12000, 8000),
+}
+_MP3_FRAME_SYNC = 0x7FF
+_MP3_HEADER_SEARCH_LIMIT = 64 * 1024
+_OGG_TAIL_SIZE = 64 * 1024
+_OPUS_FRAME_RATE = 48000
+
+_MP4_CONTAINERS = frozenset({b'moov', b'trak', b'mdia', b'minf', b'stbl'})
+
+_ASF_HEADER_OBJECT = uuid.UUID('75B22630-668E-11CF-A6D9-00AA0062CE6C').bytes_le
+_ASF_FILE_PROPERTIES_OBJECT = uuid.UUID('8CABDCA1-A947-11CF-8EE4-00C00C205365').bytes_le
+_ASF_STREAM_PROPERTIES_OBJECT = uuid.UUID('B7DC0791-A9B7-11CF-8EE6-00C00C205365').bytes_le
+_ASF_AUDIO_MEDIA = uuid.UUID('F8699E40-5B4D-11CF-A8FD-00805F5C442B').bytes_le
+_ASF_HEADER_SIZE_LIMIT = 16 * 1024 * 1024
+
+
+def _skip_id3v2(stream: BinaryIO) -> int:
+    """Skips the ID3v2 tag at the beginning of the stream, if any.
+
+    :param stream: The binary stream positioned at the beginning of the file.
+
+    :returns: The offset of the first byte after the tag.
+    """
+    header = stream.read(_ID3V2_HEADER_SIZE)
+    offset = 0
+    if len(header) == _ID3V2_HEADER_SIZE and header[:3] == b'ID3':
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        offset = _ID3V2_HEADER_SIZE + size + (_ID3V2_HEADER_SIZE if header[5] & 0x10 else 0)
+    stream.seek(offset)
+    return offset
+
+
+def _probe_wav(stream: BinaryIO, size: int) -> AudioInfo | None:
+    """Reads the stream information of a RIFF/WAVE file.
+
+    :param stream: The binary stream of the file.
+    :param size: The size of the file in bytes.
+
+    :returns: The stream information, or None if the headers are invalid.
+    """
+    header = stream.read(12)
+    if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':  # noqa: PLR2004
+        return None
+
+    channels = frame_rate = block_align = 0
+    while chunk := stream.read(8):
+        if len(chunk) < 8:  # noqa: PLR2004
+            break
+        chunk_id, chunk_size = struct.unpack('<4sI', chunk)
+        if chunk_id == b'fmt ':
+            _, channels, frame_rate, _, block_align = struct.unpack('<HHIIH', stream.read(14))
+            stream.seek(chunk_size - 14 + (chunk_size & 1), 1)
+        elif chunk_id == b'data':
+            if not (channels and frame_rate and block_align):
+                return None
+            data_size = min(chunk_size, size - stream.tell())
+            return AudioInfo(data_size / block_align / frame_rate, frame_rate, channels)
+        else:
+            stream.seek(chunk_size + (chunk_size & 1), 1)
+    return None
+
+
+def _probe_flac(stream: BinaryIO, _: int) -> AudioInfo | None:
+    """Reads the stream information of a FLAC file from its STREAMINFO metadata block.
+
+    :param stream: The binary stream of the file.
+
+    :returns: The stream information, or None if the headers are invalid.
+    """
+    _skip_id3v2(stream)
+    if stream.read(4) != b'fLaC':
+        return None
+
+    block_header = stream.read(4)
+    if len(block_header) < 4 or (block_header[0] & 0x7F) != 0:  # noqa: PLR2004
+        return None
+
+    streaminfo = stream.read(34)
+    if len(streaminfo) < 34:  # noqa: PLR2004
+        return None
+
+    packed = int.from_bytes(streaminfo[10:18], 'big')
+    frame_rate = packed >> 44
+    channels = ((packed >> 41) & 0x07) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    if not frame_rate:
+        return None
+    return AudioInfo(total_samples / frame_rate, frame_rate, channels)
+
+
+def _last_ogg_granule(stream: BinaryIO, size: int) -> int | None:
+    """Finds the granule position of the last Ogg page of the stream.
+
+    :param stream: The binary stream of the file.
+    :param size: The size of the file in bytes.
+
+    :returns: The last granule position, or None if no page was found.
+    """
+    stream.seek(max(size - _OGG_TAIL_SIZE, 0))
+    tail = stream.read()
+    position = tail.rfind(b'OggS')
+    while position >= 0:
+        if position + 14 <= len(tail):
+            (granule,) = struct.unpack_from('<q', tail, position + 6)
+            if granule >= 0:
+                return granule
+        position = tail.rfind(b'OggS', 0, position)
+    return None
+
+
+def _probe_ogg(stream: BinaryIO, size: int) -> AudioInfo | None:
+    """Reads the stream information of an Ogg file containing a Vorbis or Opus stream.
+
+    :param stream: The binary stream of the file.
+    :param size: The size of the file in bytes.
+
+    :returns: The stream information, or None if the headers are invalid.
+    """
+    page_header = stream.read(27)
+    if len(page_header) < 27 or page_header[:4] != b'OggS':  # noqa: PLR2004
+        return None
+
+    stream.seek(page_header[26], 1)
+    packet = stream.read(19)
+
+    if packet[:7] == b'\x01vorbis':
+        channels, frame_rate = struct.unpack_from('<BI', packet, 11)
+        pre_skip = 0
+    elif packet[:8] == b'OpusHead':
+        channels, pre_skip = struct.unpack_from('<BH', packet, 9)
+        frame_rate = _OPUS_FRAME_RATE
+    else:
+        return None
+
+    granule = _last_ogg_granule(stream, size)
+    if granule is None or not frame_rate:
+        return None
+    return AudioInfo(max(granule - pre_skip, 0) / frame_rate, frame_rate, channels)
+
+
+def _probe_mp3(stream: BinaryIO, size: int) -> AudioInfo | None:
+    """Reads the stream information of an MPEG Layer III file.
+
+    The duration is taken from the Xing/Info or VBRI header when present (VBR files), otherwise it is estimated from
+    the bitrate of the first frame (CBR files).
+
+    :param stream: The binary stream of the file.
+    :param size: The size of the file in bytes.
+
+    :returns: The stream information, or None if no valid frame was found.
+    """
+    start = _skip_id3v2(stream)
+    data = stream.read(_MP3_HEADER_SEARCH_LIMIT)
+
+    position = data.find(b'\xff')
+    while 0 <= position < len(data) - 4:
+        header = int.from_bytes(data[position : position + 4], 'big')
+        version_bits = (header >> 19) & 0x03
+        layer_bits = (header >> 17) & 0x03
+        bitrate_index = (header >> 12) & 0x0F
+        sample_rate_index = (header >> 10) & 0x03
+        if (
+            (header >> 21) == _MP3_FRAME_SYNC
+            and version_bits != 1
+            and layer_bits == 1
+            and bitrate_index not in {0, 15}
+            and sample_rate_index != 3  # noqa: PLR2004
+        ):
+            break
+        position = data.find(b'\xff', position + 1)
+    else:
+        return None
+
+    version = {0: 25, 2: 2, 3: 1}[version_bits]
+    frame_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    channels = 1 if ((header >> 6) & 0x03) == 3 else 2  # noqa: PLR2004
+    samples_per_frame = 1152 if version == 1 else 576
+
+    side_information = (32 if channels == 2 else 17) if version == 1 else (17 if channels == 2 else 9)  # noqa: PLR2004
+    xing = position + 4 + side_information
+    if data[xing : xing + 4] in {b'Xing', b'Info'}:
+        (flags,) = struct.unpack_from('>I', data, xing + 4)
+        if flags & 0x01:
+            (frames,) = struct.unpack_from('>I', data, xing + 8)
+            return AudioInfo(frames * samples_per_frame / frame_rate, frame_rate, channels)
+
+    vbri = position + 4 + 32
+    if data[vbri : vbri + 4] == b'VBRI':
+        (frames,) = struct.unpack_from('>I', data, vbri + 14)
+        return AudioInfo(frames * samples_per_frame / frame_rate, frame_rate, channels)
+
+    audio_size = size - start - position
+    stream.seek(max(size - _ID3V1_TAG_SIZE, 0))
+    if stream.read(3) == b'TAG':
+        audio_size -= _ID3V1_TAG_SIZE
+
+    bitrate = _MP3_BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+    return AudioInfo(audio_size * 8 / bitrate, frame_rate, channels)
+
+
+def _mp4_atoms(data: bytes, start: int, end: int) -> Iterator[tuple[bytes, int, int]]:
+    """Iterates over the MP4 atoms contained between two offsets.
+
+    :param data: The bytes containing the atoms.
+    :param start: The offset of the first atom.
+    :param end: The offset where the atoms end.
+
+    :yields: The type of the atom and the offsets where its payload starts and ends.
+    """
+    position = start
+    while position + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', data, position)
+        header_size = 8
+        if size == 1:
+            (size,) = struct.unpack_from('>Q', data, position + 8)
+            header_size = 16
+        elif size == 0:
+            size = end - position
+
+        if size < header_size:
+            return
+
+        yield kind, position + header_size, min(position + size, end)
+        position += size
+
+
+def _mp4_audio_track(data: bytes, start: int, end: int) -> AudioInfo | None:
+    """Reads the stream information of the first audio track found in a `moov` atom.
+
+    :param data: The bytes of the `moov` atom.
+    :param start: The offset where the payload of the atom starts.
+    :param end: The offset where the payload of the atom ends.
+
+    :returns: The stream information, or None if no audio track was found.
+    """
+    atoms = {kind: (payload_start, payload_end) for kind, payload_start, payload_end in _mp4_atoms(data, start, end)}
+
+    if b'hdlr' in atoms and b'mdhd' in atoms and b'stsd' in atoms:
+        if data[atoms[b'hdlr'][0] + 8 : atoms[b'hdlr'][0] + 12] != b'soun':
+            return None
+
+        mdhd = atoms[b'mdhd'][0]
+        if data[mdhd] == 1:
+            timescale, duration = struct.unpack_from('>IQ', data, mdhd + 20)
+        else:
+            timescale, duration = struct.unpack_from('>II', data, mdhd + 12)
+
+        entry = atoms[b'stsd'][0] + 8
+        (channels,) = struct.unpack_from('>H', data, entry + 24)
+        frame_rate = struct.unpack_from('>I', data, entry + 32)[0] >> 16
+        return AudioInfo(duration / timescale, frame_rate or timescale, channels)
+
+    for kind, (payload_start, payload_end) in atoms.items():
+        if kind in _MP4_CONTAINERS:
+            info = _mp4_audio_track(data, payload_start, payload_end)
+            if info is not None:
+                return info
+    return None
+
+
+def _probe_mp4(stream: BinaryIO, size: int) -> AudioInfo | None:
+    """Reads the stream information of an MPEG-4 audio file (AAC, ALAC) from its `moov` atom.
+
+    :param stream: The binary stream of the file.
+    :param size: The size of the file in bytes.
+
+    :returns: The stream information, or None if the headers are invalid.
+    """
+    position = 0
+    while position + 8 <= size:
+        stream.seek(position)
+        header = stream.read(16)
+        atom_size, kind = struct.unpack_from('>I4s', header)
+        if atom_size == 1:
+            (atom_size,) = struct.unpack_from('>Q', header, 8)
+        elif atom_size == 0:
+            atom_size = size - position
+
+        if atom_size < 8:  # noqa: PLR2004
+            return None
+
+        if kind == b'moov':
+            stream.seek(position)
+            moov = stream.read(atom_size)
+            return _mp4_audio_track(moov, 8, len(moov))
+
+        position += atom_size
+    return None
+
+
+def _probe_asf(stream: BinaryIO, size: int) -> AudioInfo | None:
+    """Reads the stream information of an ASF file (WMA) from its header objects.
+
+    :param stream: The binary stream of the file.
+    :param size: The size of the file, in bytes.
+
+    :returns: The stream information, or None if the headers are invalid.
+    """
+    header = stream.read(30)
+    if len(header) < 30 or header[:16] != _ASF_HEADER_OBJECT:  # noqa: PLR2004
+        return None
+
+    (header_size,) = struct.unpack_from('<Q', header, 16)
+    if not 30 <= header_size <= min(size, _ASF_HEADER_SIZE_LIMIT):  # noqa: PLR2004
+        return None
+    data = header + stream.read(header_size - 30)
+
+    seconds = None
+    frame_rate = channels = 0
+
+    position = 30
+    while position + 24 <= len(data):
+        guid = data[position : position + 16]
+        (object_size,) = struct.unpack_from('<Q', data, position + 16)
+        if object_size < 24:  # noqa: PLR2004
+            break
+
+        if guid == _ASF_FILE_PROPERTIES_OBJECT:
+            play_duration, _, preroll = struct.unpack_from('<QQQ', data, position + 64)
+            seconds = max(play_duration / 10_000_000 - preroll / 1000, 0)
+        elif guid == _ASF_STREAM_PROPERTIES_OBJECT and data[position + 24 : position + 40] == _ASF_AUDIO_MEDIA:
+            _, channels, frame_rate = struct.unpack_from('<HHI', data, position + 78)
+
+        position += object_size
+
+    if seconds is None or not frame_rate:
+        return None
+    return AudioInfo(seconds, frame_rate, channels)
+
+
+AUDIO_FORMATS = (
+    AudioFormat('MP3', ('.mp3',), _probe_mp3),
+    AudioFormat('WAV', ('.wav', '.wave'), _probe_wav),
+    AudioFormat('FLAC', ('.flac',), _probe_flac),
+    AudioFormat('Ogg Vorbis', ('.ogg', '.oga'), _probe_ogg),
+    AudioFormat('Opus', ('.opus',), _probe_ogg),
+    AudioFormat('AAC', ('.m4a', '.aac'), _probe_mp4, streamable=False),
+    AudioFormat('WMA', ('.wma',), _probe_asf, streamable=False),
+)
+
+FORMATS_BY_EXTENSION: dict[str, AudioFormat] = {
+    extension: audio_format for audio_format in AUDIO_FORMATS for extension in audio_format.extensions
+}
+
+SUPPORTED_EXTENSIONS = frozenset(FORMATS_BY_EXTENSION)
+
+
+def get_format(path: Path) -> AudioFormat | None:
+    """Gets the audio format associated with the extension of a file.
+
+    :param path: The path to the audio file.
+
+    :returns: The audio format, or None if the extension is not supported.
+    """
+    return FORMATS_BY_EXTENSION.get(path.suffix.lower())
+
+
+def is_supported(path: Path) -> bool:
+    """Indicates whether the extension of a file is a supported audio format.
+
+    :param path: The path to the audio file.
+
+    :returns: True if the file can be played, False otherwise.
+    """
+    return path.suffix.lower() in SUPPORTED_EXTENSIONS
+
+
+def is_streamable(path: Path) -> bool:
+    """Indicates whether a file can be streamed by the mixer without being transcoded first.
+
+    :param path: The path to the audio file.
+
+    :returns: True if the mixer can stream the file, False otherwise.
+    """
+    audio_format = get_format(path)
+    return audio_format is not None and audio_format.streamable
+
+
+def probe(path: Path) -> AudioInfo | None:
+    """Reads the stream information of an audio file from its headers, without decoding it.
+
+    :param path: The path to the audio file.
+
+    :returns: The stream information, or None if the format is not supported or the headers could not be read.
+    """
+    audio_format = get_format(path)
+    if audio_format is None:
+        return None
+
+    with path.open('rb') as stream:
+        size = stream.seek(0, 2)
+        stream.seek(0)
+        try:
+            return audio_format.probe(stream, size)
+        except (struct.error, KeyError, ZeroDivisionError):
+            return None
@@ -0,0 +1,147 @@
+"""Low-overhead instrumentation of the application hot paths.
+
+The `METRICS` registry collects latency histograms and counters that are displayed by the performance page. The
+instrumentation is enabled with the `development.instrumentation` option; when it is disabled the `timed` decorator
+returns the decorated function untouched, and the explicit measurements are guarded by `METRICS.enabled`, so the hot
+paths do not pay anything.
+"""
+
+import os
+import resource
+import time
+from collections.abc import Callable
+from functools import wraps
+from typing import ParamSpec, TypeVar
+
+from cplayer.src.elements import CONFIG
+
+
+_P = ParamSpec('_P')
+_R = TypeVar('_R')
+
+
+class Histogram:
+    """Latency histogram with power-of-two buckets, from 1 microsecond to ~16 seconds."""
+
+    BUCKETS = 25
+
+    def __init__(self) -> None:
+        """Initializes the Histogram object."""
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * self.BUCKETS
+
+    def record(self, seconds: float) -> None:
+        """Records a measurement.
+
+        :param seconds: The measured duration in seconds.
+        """
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        self.buckets[min(int(seconds * 1_000_000).bit_length(), self.BUCKETS - 1)] += 1
+
+    @property
+    def mean(self) -> float:
+        """Gets the mean of the measurements, in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Gets the approximate percentile of the measurements (the upper bound of its bucket).
+
+        :param percent: The percentile, between 0 and 100.
+
+        :returns: The percentile in seconds.
+        """
+        threshold = self.count * percent / 100
+        accumulated = 0
+        for index, count in enumerate(self.buckets):
+            accumulated += count
+            if count and accumulated >= threshold:
+                return min((1 << index) / 1_000_000, self.maximum)
+        return self.maximum
+
+
+class Metrics:
+    """Registry of the latency histograms and counters."""
+
+    def __init__(self, enabled: bool) -> None:
+        """Initializes the Metrics object.
+
+        :param enabled: Whether the instrumentation is enabled.
+        """
+        self.enabled = enabled
+        self.started = time.monotonic()
+
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: dict[str, int] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        """Records a duration in a histogram.
+
+        :param name: The name of the histogram.
+        :param seconds: The measured duration in seconds.
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.record(seconds)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Increments a counter.
+
+        :param name: The name of the counter.
+        :param value: The increment.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def ratio(self, hits: str, misses: str) -> float | None:
+        """Gets the ratio between two counters, e.g. a cache hit rate.
+
+        :param hits: The name of the counter of hits.
+        :param misses: The name of the counter of misses.
+
+        :returns: The ratio of hits, or None if there are no measurements.
+        """
+        total = self.counters.get(hits, 0) + self.counters.get(misses, 0)
+        return self.counters.get(hits, 0) / total if total else None
+
+    def timed(self, name: str) -> Callable[[Callable[_P, _R]], Callable[_P, _R]]:
+        """Decorator that records the execution time of a function.
+
+        :param name: The name of the histogram.
+
+        :returns: The decorator, it returns the function untouched if the instrumentation is disabled.
+        """
+
+        def decorator(function: Callable[_P, _R]) -> Callable[_P, _R]:
+            if not self.enabled:
+                return function
+
+            @wraps(function)
+            def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+
+def resident_memory() -> int:
+    """Gets the resident memory of the process.
+
+    :returns: The resident set size in bytes (the peak resident set size if the current one is not available).
+    """
+    try:
+        with open('/proc/self/statm', encoding='UTF-8') as statm:  # noqa: PTH123
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+METRICS = Metrics(enabled=CONFIG.data.development.instrumentation)
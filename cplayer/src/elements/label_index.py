@@ -0,0 +1,91 @@
+"""Module that defines the LabelIndex class, the index used to filter a list of options as the user types.
+
+The labels are case-folded once, then sorted to find the labels starting with the query by binary search, and joined
+in a single text to find the labels containing the query with `str.find`, so filtering does not compare the query with
+every label in Python. A query that extends the previous one (the user typed one more character) only searches the
+labels that matched the previous query.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from itertools import accumulate
+
+
+SEPARATOR = '\0'
+
+
+class LabelIndex:
+    """Prefix and substring index over the labels of a list of options."""
+
+    def __init__(self, labels: Sequence[str]) -> None:
+        """Initializes the LabelIndex object.
+
+        :param labels: The plain texts of the options, in their order.
+        """
+        self.labels = [label.casefold().replace(SEPARATOR, ' ') for label in labels]
+
+        ordered = sorted(range(len(self.labels)), key=self.labels.__getitem__)
+        self._sorted_labels = [self.labels[position] for position in ordered]
+        self._sorted_positions = ordered
+
+        self._text = SEPARATOR.join(self.labels)
+        self._starts = list(accumulate((len(label) + 1 for label in self.labels[:-1]), initial=0))
+
+    def __len__(self) -> int:
+        """Gets the number of labels.
+
+        :returns: The number of labels.
+        """
+        return len(self.labels)
+
+    def prefixed(self, query: str) -> list[int]:
+        """Finds the labels that start with a text.
+
+        :param query: The case-folded text.
+
+        :returns: The sorted positions of the labels.
+        """
+        start = bisect_left(self._sorted_labels, query)
+        stop = bisect_right(self._sorted_labels, query + '\U0010ffff', lo=start)
+        return sorted(self._sorted_positions[start:stop])
+
+    def containing(self, query: str) -> list[int]:
+        """Finds the labels that contain a text.
+
+        :param query: The case-folded text, without separator.
+
+        :returns: The sorted positions of the labels.
+        """
+        positions = []
+        offset = self._text.find(query)
+        while offset >= 0:
+            position = bisect_right(self._starts, offset) - 1
+            positions.append(position)
+            next_label = self._starts[position + 1] if position + 1 < len(self._starts) else len(self._text)
+            offset = self._text.find(query, next_label)
+        return positions
+
+    def search(self, query: str, candidates: Sequence[int] | None = None) -> list[int]:
+        """Finds the labels matching a query, the labels starting with it come first.
+
+        :param query: The query, compared without case.
+        :param candidates: The positions of the labels to search, by default all the labels.
+
+        :returns: The positions of the labels starting with the query then of the labels containing it elsewhere, both
+            in the order of the options.
+        """
+        query = query.casefold()
+        if not query:
+            return list(range(len(self))) if candidates is None else list(candidates)
+        if SEPARATOR in query:
+            return []
+
+        if candidates is None:
+            prefixed = self.prefixed(query)
+            matching = self.containing(query)
+        else:
+            prefixed = sorted(position for position in candidates if self.labels[position].startswith(query))
+            matching = sorted(position for position in candidates if query in self.labels[position])
+
+        starting = set(prefixed)
+        return prefixed + [position for position in matching if position not in starting]
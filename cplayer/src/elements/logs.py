@@ -0,0 +1,176 @@
+"""Non-blocking logging of the application.
+
+The log records are put in a queue by the threads that emit them (the event loop of the user interface included), and
+written to the log file by a background listener thread, the file is rotated when it reaches its maximum size. The
+repetitive warnings (emitted from the same line of code, like the warning of every missing song of a playlist) are
+rate-limited: once the burst of a time window is exhausted they are dropped before being queued, and the number of
+dropped records is appended to the next record that passes.
+
+The forked processes and the workers of the decoder pool have no listener thread, they append their records to the log
+file directly.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import ClassVar
+
+
+class RateLimitFilter(logging.Filter):
+    """Filter that limits the number of similar records (same logger, level and line of code) per time window.
+
+    Only the warnings are limited, the errors are never dropped and the verbosity of the lower levels is chosen with
+    the logging level.
+    """
+
+    def __init__(self, burst: int, window: float) -> None:
+        """Initializes the RateLimitFilter object.
+
+        :param burst: The number of similar records accepted per window.
+        :param window: The duration of a window, in seconds.
+        """
+        super().__init__()
+
+        self.burst = burst
+        self.window = window
+
+        self._windows: dict[tuple[str, int, str, int], list[float | int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Indicates whether a record is logged, adding the number of dropped similar records to its message.
+
+        :param record: The log record.
+
+        :returns: True if the record is logged, False if it is dropped.
+        """
+        if record.levelno != logging.WARNING:
+            return True
+
+        key = (record.name, record.levelno, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.window:
+                suppressed = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.burst:
+                suppressed = 0
+                window[1] += 1
+            else:
+                window[2] += 1
+                return False
+
+        if suppressed:
+            record.msg = f'{record.getMessage()} ({suppressed} similar messages suppressed)'
+            record.args = None
+        return True
+
+    def pending(self) -> list[tuple[tuple[str, int, str, int], int]]:
+        """Gets and resets the number of dropped records that were not reported yet.
+
+        :returns: The key of the similar records (logger, level, file and line) and the number of dropped records.
+        """
+        with self._lock:
+            pending = [(key, int(window[2])) for key, window in self._windows.items() if window[2]]
+            self._windows.clear()
+        return pending
+
+
+class LogService:
+    """Queued logging to a rotating log file."""
+
+    current: ClassVar['LogService | None'] = None
+
+    def __init__(  # noqa: PLR0913
+        self,
+        path: Path,
+        level: int | str,
+        log_format: str,
+        max_bytes: int,
+        backups: int,
+        burst: int,
+        window: float,
+    ) -> None:
+        """Initializes the LogService object.
+
+        :param path: The path to the log file.
+        :param level: The minimum level of the logged records.
+        :param log_format: The format of the records.
+        :param max_bytes: The size of the log file that triggers its rotation (0 disables the rotation).
+        :param backups: The number of rotated log files that are kept.
+        :param burst: The number of similar records accepted per window.
+        :param window: The duration of a rate limit window, in seconds.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.file_handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding='UTF-8', delay=True
+        )
+        self.file_handler.setFormatter(logging.Formatter(log_format))
+
+        self.rate_limit = RateLimitFilter(burst, window)
+        self.queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+
+        self.queue_handler = QueueHandler(self.queue)
+        self.queue_handler.addFilter(self.rate_limit)
+
+        self.listener = QueueListener(self.queue, self.file_handler)
+        self.path = path
+        self.level = level
+        self.log_format = log_format
+
+    def start(self) -> None:
+        """Routes the records of the root logger through the queue and starts the listener thread."""
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            handler.close()
+        root.addHandler(self.queue_handler)
+        root.setLevel(self.level)
+
+        self.listener.start()
+        atexit.register(self.stop)
+        os.register_at_fork(after_in_child=self._after_fork)
+        LogService.current = self
+
+    def worker_settings(self) -> tuple[str, int | str, str, int, float]:
+        """Gets the settings used by the spawned worker processes to write to the log file directly.
+
+        :returns: The path to the log file, the level, the format, the burst and the window of the rate limit.
+        """
+        return str(self.path), self.level, self.log_format, self.rate_limit.burst, self.rate_limit.window
+
+    def _after_fork(self) -> None:
+        """Replaces the queue by a handler writing to the log file in a forked process."""
+        root = logging.getLogger()
+        if self.queue_handler not in root.handlers:
+            return
+
+        handler = logging.FileHandler(self.path, encoding='UTF-8', delay=True)
+        handler.setFormatter(self.file_handler.formatter)
+        handler.addFilter(self.rate_limit)
+        root.removeHandler(self.queue_handler)
+        root.addHandler(handler)
+        atexit.unregister(self.stop)
+
+    def stop(self) -> None:
+        """Reports the dropped records, writes the queued records and stops the listener thread."""
+        if self.listener._thread is None:  # noqa: SLF001  # pylint: disable=protected-access
+            return
+
+        for (name, level, pathname, lineno), suppressed in self.rate_limit.pending():
+            self.queue.put(
+                logging.LogRecord(name, level, pathname, lineno, '%s similar messages suppressed', (suppressed,), None)
+            )
+
+        self.listener.stop()
+        logging.getLogger().removeHandler(self.queue_handler)
+        self.file_handler.close()
+        atexit.unregister(self.stop)
+        LogService.current = None
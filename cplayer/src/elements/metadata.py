@@ -0,0 +1,186 @@
+"""Module that defines the persistent metadata store of the songs.
+
+The metadata of the songs (duration, format, decoding status, loudness and waveform peaks) is computed by the
+`cplayer scan` command and stored in a SQLite database, it is valid while the size and the modification time of the
+song do not change.
+"""
+
+import sqlite3
+import threading
+from collections.abc import Iterable
+from dataclasses import astuple, dataclass, fields
+from pathlib import Path
+
+from cplayer.src.elements import CONFIG
+
+
+@dataclass
+class TrackMetadata:  # pylint: disable=too-many-instance-attributes
+    """Metadata of a song."""
+
+    path: str
+    size: int
+    mtime: int
+    format: str | None = None
+    seconds: float | None = None
+    frame_rate: int | None = None
+    channels: int | None = None
+    valid: bool = False
+    error: str | None = None
+    loudness: float | None = None
+    peak: float | None = None
+    waveform: bytes | None = None
+
+    def matches(self, path: Path) -> bool:
+        """Indicates whether the metadata is still valid for a file.
+
+        :param path: The path to the song.
+
+        :returns: True if the size and the modification time of the file did not change, False otherwise.
+        """
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == (self.size, self.mtime)
+
+
+class MetadataStore:
+    """SQLite store of the metadata of the songs, the database is opened on the first access."""
+
+    COLUMNS = tuple(field.name for field in fields(TrackMetadata))
+
+    def __init__(self, path: Path) -> None:
+        """Initializes the MetadataStore object.
+
+        :param path: The path to the database file.
+        """
+        self.path = path
+
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Gets the connection to the database, creating the database if it does not exist."""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS tracks ('
+                'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime INTEGER NOT NULL, format TEXT, seconds REAL, '
+                'frame_rate INTEGER, channels INTEGER, valid INTEGER NOT NULL, error TEXT, loudness REAL, peak REAL, '
+                'waveform BLOB)',
+            )
+        return self._connection
+
+    def get(self, path: Path) -> TrackMetadata | None:
+        """Gets the stored metadata of a song.
+
+        :param path: The path to the song.
+
+        :returns: The metadata, or None if the song was not analyzed.
+        """
+        with self._lock:
+            row = self.connection.execute(
+                f'SELECT {", ".join(self.COLUMNS)} FROM tracks WHERE path = ?',  # noqa: S608
+                (str(path),),
+            ).fetchone()
+        if row is None:
+            return None
+
+        track = TrackMetadata(*row)
+        track.valid = bool(track.valid)
+        return track
+
+    def fingerprints(self) -> dict[str, tuple[int, int]]:
+        """Gets the size and the modification time of all the analyzed songs.
+
+        The songs whose duration was only seeded (see `seed`) are not included, so they are analyzed by the next scan.
+
+        :returns: The size and the modification time by path.
+        """
+        with self._lock:
+            return {
+                path: (size, mtime)
+                for path, size, mtime in self.connection.execute(
+                    'SELECT path, size, mtime FROM tracks WHERE valid = 1 OR error IS NOT NULL'
+                )
+            }
+
+    def durations(self, paths: list[str]) -> dict[str, tuple[int, int, float]]:
+        """Gets the stored durations of songs.
+
+        :param paths: The paths to the songs.
+
+        :returns: The size, the modification time and the duration of the songs whose duration is stored, by path.
+        """
+        if not paths:
+            return {}
+
+        with self._lock:
+            return {
+                path: (size, mtime, seconds)
+                for path, size, mtime, seconds in self.connection.execute(
+                    f'SELECT path, size, mtime, seconds FROM tracks '  # noqa: S608
+                    f'WHERE seconds IS NOT NULL AND path IN ({", ".join("?" * len(paths))})',
+                    paths,
+                )
+            }
+
+    def total_seconds(self, paths: list[str]) -> tuple[float, int]:
+        """Sums the stored durations of songs.
+
+        :param paths: The paths to the songs.
+
+        :returns: The total duration in seconds and the number of songs whose duration is stored.
+        """
+        if not paths:
+            return 0.0, 0
+
+        with self._lock:
+            total, count = self.connection.execute(
+                f'SELECT TOTAL(seconds), COUNT(seconds) FROM tracks WHERE path IN ({", ".join("?" * len(paths))})',  # noqa: S608
+                paths,
+            ).fetchone()
+        return total, count
+
+    def save(self, tracks: Iterable[TrackMetadata]) -> None:
+        """Inserts or replaces the metadata of songs.
+
+        :param tracks: The metadata of the songs.
+        """
+        with self._lock, self.connection:
+            self.connection.executemany(
+                f'INSERT OR REPLACE INTO tracks ({", ".join(self.COLUMNS)}) '  # noqa: S608
+                f'VALUES ({", ".join("?" * len(self.COLUMNS))})',
+                (astuple(track) for track in tracks),
+            )
+
+    def seed(self, tracks: Iterable[TrackMetadata]) -> None:
+        """Stores the durations of songs that were not analyzed, like the durations read from an imported playlist.
+
+        The seeded songs are neither valid nor in error, their metadata is replaced by the next scan and they never
+        replace the metadata of an analyzed song.
+
+        :param tracks: The path, the size, the modification time and the duration of the songs.
+        """
+        with self._lock, self.connection:
+            self.connection.executemany(
+                'INSERT INTO tracks (path, size, mtime, seconds, valid) VALUES (?, ?, ?, ?, 0) '
+                'ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, '
+                'seconds = excluded.seconds WHERE tracks.valid = 0 AND tracks.error IS NULL',
+                ((track.path, track.size, track.mtime, track.seconds) for track in tracks),
+            )
+
+    def close(self) -> None:
+        """Closes the connection to the database."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+METADATA = MetadataStore(Path(CONFIG.data.general.metadata.database).expanduser())
@@ -0,0 +1,380 @@
+"""Module that defines the Player class, the playback engine of the application.
+
+The player streams the songs through `pygame.mixer.music`, the songs that the mixer cannot stream are transcoded by a
+`TranscodeCache` before being played: the callers wait for the future returned by `prepare` before loading them, so the
+transcoding never blocks them. When the crossfade is enabled, the transitions between songs are crossfaded (see
+the `crossfade` module).
+
+By default the mixer keeps the format it was initialized with, and SDL resamples the songs whose format differs. With
+the native format output mode the mixer is initialized again with the sample rate and the channels of each song, when
+they differ from the previous song, so the songs are played without resampling.
+
+When the equalizer is enabled, the songs are streamed block by block through a mixer channel instead (see the `dsp`
+module), the crossfade is then disabled.
+"""
+
+import logging
+from collections.abc import Iterable
+from concurrent.futures import Future
+from pathlib import Path
+
+import pygame
+from pygame import mixer, sndarray
+
+from cplayer.src.elements import CONFIG
+from cplayer.src.elements.crossfade import MAX_CROSSFADE, fade_out
+from cplayer.src.elements.decoder_pool import DECODERS, PcmBlock
+from cplayer.src.elements.dsp import BlockOutput, BlockStats, can_stream, open_stream
+from cplayer.src.elements.equalizer import Equalizer
+from cplayer.src.elements.formats import is_streamable, probe
+from cplayer.src.elements.transcoder import TranscodeCache
+
+
+class Player:
+    """Local player that streams the songs through the mixer."""
+
+    autonomous = False
+
+    MAX_DECODED_SECONDS = 20 * 60
+    OUTPUT_CHANNELS = (1, 2, 4, 6)
+    RESERVED_CHANNELS = 2
+
+    def __init__(
+        self,
+        transcoder: TranscodeCache | None = None,
+        crossfade: float | None = None,
+        native_format: bool | None = None,
+    ) -> None:
+        """Initializes the Player object.
+
+        :param transcoder: The cache used to transcode the songs that the mixer cannot stream.
+        :param crossfade: The duration, in seconds, of the crossfade between songs (0 to disable it), by default it is
+            read from the configuration.
+        :param native_format: Whether to play each song with its own sample rate and channels, by default it is read
+            from the configuration.
+        """
+        self.transcoder = transcoder or TranscodeCache(
+            Path(CONFIG.data.general.transcoding.directory).expanduser(),
+            max_size=CONFIG.data.general.transcoding.max_size * 1024 * 1024,
+        )
+        self.crossfade = min(max(CONFIG.data.general.crossfade if crossfade is None else crossfade, 0), MAX_CROSSFADE)
+
+        self.native_format = CONFIG.data.general.output.native_format if native_format is None else native_format
+        self.buffer = CONFIG.data.general.output.buffer
+
+        self.equalizer_enabled = CONFIG.data.general.equalizer.enabled
+        self.equalizer_gains = list(CONFIG.data.general.equalizer.gains)
+        self.equalizer_preamp = CONFIG.data.general.equalizer.preamp
+        self.block_frames = CONFIG.data.general.equalizer.block
+        self.dsp_stats = BlockStats()
+
+        self.path: Path | None = None
+        self.paused = False
+        self.track_format: tuple[int, int] | None = None
+
+        self._requested_format: tuple[int, int] | None = None
+
+        self._start_position = 0.0
+
+        self._tail: Future[PcmBlock] | None = None
+        self._channel: mixer.Channel | None = None
+        self._fade_in = 0.0
+
+        self._stream_path: Path | None = None
+        self._output: BlockOutput | None = None
+        self._output_channel: mixer.Channel | None = None
+
+    def prepare(self, path: Path) -> Future[Path]:
+        """Prepares a song to be loaded, transcoding it in background if the mixer cannot stream it.
+
+        :param path: The path to the song.
+
+        :returns: A future resolved with the path of the playable song, the song can be loaded without waiting once it
+            is done.
+        """
+        if is_streamable(path):
+            future = Future[Path]()
+            future.set_result(path)
+            return future
+        return self.transcoder.prefetch(path)
+
+    def load(self, path: Path) -> None:
+        """Loads a song to be played, waiting for its transcoding if it was not prepared.
+
+        :param path: The path to the song.
+        """
+        playable_path = path if is_streamable(path) else self.transcoder.resolve(path)
+        info = probe(playable_path)
+        self.track_format = (info.frame_rate, info.channels) if info is not None else None
+
+        self._discard_tail()
+
+        self._stop_output()
+        streamed = self.equalizer_enabled and can_stream(playable_path)
+        if self.track_format is not None and (
+            self.native_format or (streamed and playable_path.suffix.lower() == '.wav')
+        ):
+            self._configure(*self.track_format)
+
+        self._stream_path = playable_path if streamed else None
+        if streamed:
+            mixer.music.stop()
+        else:
+            mixer.music.load(playable_path)
+        self.path = path
+
+        if not streamed and self.crossfade and info is not None and info.seconds <= self.MAX_DECODED_SECONDS:
+            self._tail = DECODERS.decode(playable_path, self.crossfade)
+
+    def _discard_tail(self) -> None:
+        """Cancels the decoding of the tail of the loaded song, or releases its samples if it is decoded."""
+        if self._tail is not None and not self._tail.cancel() and self._tail.exception() is None:
+            self._tail.result().close()
+        self._tail = None
+
+    def _configure(self, frame_rate: int, channels: int) -> None:
+        """Initializes the mixer again with the format of a song, if it differs from the format of the previous song.
+
+        The mixer is not initialized again while the tail of the previous song is faded out, the song is resampled.
+
+        :param frame_rate: The sample rate of the song.
+        :param channels: The number of channels of the song.
+        """
+        requested = (frame_rate, channels if channels in self.OUTPUT_CHANNELS else 2)
+        current = mixer.get_init()
+        if current is None or requested in {self._requested_format, (current[0], current[2])}:
+            return
+        if self._channel is not None and self._channel.get_busy():
+            logging.info('keeping the output format during the crossfade')
+            return
+
+        logging.info('initializing the mixer with %s Hz and %s channels...', *requested)
+        volume = mixer.music.get_volume()
+        mixer.music.stop()
+        mixer.music.unload()
+        self._channel = self._output_channel = None
+        mixer.quit()
+        try:
+            mixer.init(requested[0], current[1], requested[1], self.buffer)
+        except pygame.error:
+            logging.exception('the mixer cannot be initialized with %s Hz and %s channels', *requested)
+            mixer.init(current[0], current[1], current[2], self.buffer)
+        mixer.music.set_volume(volume)
+        self._requested_format = requested
+
+    @property
+    def output_format(self) -> tuple[int, int] | None:
+        """Gets the sample rate and the number of channels of the mixer."""
+        current = mixer.get_init()
+        return (current[0], current[2]) if current else None
+
+    def play(self, start: float = 0.0) -> None:
+        """Plays the loaded song.
+
+        :param start: The position, in seconds, where the playback starts.
+        """
+        self._start_position = start
+        self.paused = False
+
+        self._stop_output()
+        if self._stream_path is not None and self._play_stream(self._stream_path, start):
+            return
+
+        try:
+            mixer.music.play(0, start, int(self._fade_in * 1000))
+        except pygame.error:
+            if not start:
+                raise
+            logging.warning(
+                'the song "%s" cannot be played from %.1f seconds, playing it from the start', self.path, start
+            )
+            self._start_position = 0.0
+            mixer.music.play(0, 0.0, int(self._fade_in * 1000))
+        self._fade_in = 0.0
+
+    def _play_stream(self, path: Path, start: float) -> bool:
+        """Streams the loaded song through the equalizer.
+
+        :param path: The path to the song.
+        :param start: The position, in seconds, where the playback starts.
+
+        :returns: True if the song is streamed, False if it cannot be streamed (it is then loaded in the mixer).
+        """
+        frame_rate, _, channels = mixer.get_init()
+        stream = open_stream(path, frame_rate, channels, start)
+        if stream is None or (stream.frame_rate, stream.channels) != (frame_rate, channels):
+            if stream is not None:
+                stream.close()
+            logging.warning('the song "%s" cannot be streamed through the equalizer', path)
+            self._stream_path = None
+            mixer.music.load(path)
+            return False
+
+        if self._output_channel is None:
+            mixer.set_reserved(self.RESERVED_CHANNELS)
+            self._output_channel = mixer.Channel(1)
+        self._output_channel.set_volume(mixer.music.get_volume())
+
+        equalizer = Equalizer(self.equalizer_gains, self.equalizer_preamp, frame_rate, channels, self.block_frames)
+        self._output = BlockOutput(stream, equalizer, self._output_channel, self.dsp_stats, start)
+        self._output.play()
+        return True
+
+    def _stop_output(self) -> None:
+        """Stops the song streamed through the equalizer, if any."""
+        if self._output is not None:
+            self._output.stop()
+            self._output = None
+
+    def set_equalizer(self, enabled: bool, gains: list[float], preamp: float) -> None:  # noqa: FBT001
+        """Changes the equalizer settings, the song being played is streamed again if the equalizer is toggled.
+
+        :param enabled: Whether the equalizer is enabled.
+        :param gains: The gains of the bands, in decibels.
+        :param preamp: The gain applied to the whole spectrum, in decibels.
+        """
+        self.equalizer_gains, self.equalizer_preamp = list(gains), preamp
+        if self._output is not None:
+            self._output.equalizer.set_gains(gains, preamp)
+
+        if enabled != self.equalizer_enabled:
+            self.equalizer_enabled = enabled
+            if self.path is not None and (self.busy or self.paused):
+                position, paused = self.position, self.paused
+                self.load(self.path)
+                self.play(position)
+                if paused:
+                    self.pause()
+
+    def fade_out(self) -> bool:
+        """Starts the crossfade if the loaded song is close to its end, the caller must then play the next song.
+
+        The stream of the song is replaced by its tail, decoded in background when the song was loaded, that is faded
+        out through a mixer channel; the next played song is faded in.
+
+        :returns: True if the crossfade started, False otherwise.
+        """
+        if self._tail is None or not self._tail.done() or self.paused or not self.busy or self._output is not None:
+            return False
+
+        try:
+            tail = self._tail.result()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logging.exception('error decoding the tail of the song "%s"', self.path)
+            self._tail = None
+            return False
+
+        remaining = tail.seconds - self.position
+        if remaining > self.crossfade:
+            return False
+        self._tail = None
+
+        frames = min(int(remaining * mixer.get_init()[0]), len(tail.samples))
+        if frames <= 0:
+            tail.close()
+            return False
+
+        if self._channel is None:
+            mixer.set_reserved(1)
+            self._channel = mixer.Channel(0)
+        self._channel.set_volume(mixer.music.get_volume())
+        self._channel.play(sndarray.make_sound(fade_out(tail.samples[-frames:])))
+        tail.close()
+
+        mixer.music.stop()
+        self._fade_in = remaining
+        return True
+
+    def seek(self, position: float) -> None:
+        """Moves the playback to a position of the loaded song.
+
+        :param position: The position in seconds.
+        """
+        if self._channel is not None:
+            self._channel.stop()
+        self.play(position)
+
+    def pause(self) -> None:
+        """Pauses the playback."""
+        self.paused = True
+        mixer.music.pause()
+        if self._channel is not None:
+            self._channel.pause()
+        if self._output is not None:
+            self._output.pause()
+
+    def unpause(self) -> None:
+        """Resumes the paused playback."""
+        self.paused = False
+        mixer.music.unpause()
+        if self._channel is not None:
+            self._channel.unpause()
+        if self._output is not None:
+            self._output.unpause()
+
+    def stop(self) -> None:
+        """Stops the playback."""
+        self.paused = False
+        mixer.music.stop()
+        if self._channel is not None:
+            self._channel.stop()
+        self._stop_output()
+
+    @property
+    def busy(self) -> bool:
+        """Indicates whether a song is being played."""
+        if self._output is not None:
+            return self._output.busy and not self.paused
+        return mixer.music.get_busy()
+
+    @property
+    def position(self) -> float:
+        """Gets the playback position, in seconds, of the loaded song."""
+        if self._output is not None:
+            return self._output.position
+        return self._start_position + max(mixer.music.get_pos(), 0) / 1000.0
+
+    @property
+    def volume(self) -> float:
+        """Gets the playback volume."""
+        return mixer.music.get_volume()
+
+    @volume.setter
+    def volume(self, value: float) -> None:
+        mixer.music.set_volume(value)
+        if self._channel is not None:
+            self._channel.set_volume(value)
+        if self._output_channel is not None:
+            self._output_channel.set_volume(value)
+
+    def set_queue(self, paths: Iterable[Path]) -> None:
+        """Informs the player of the songs queued in the tracklist.
+
+        The local player is driven by the tracklist, so the queue is ignored.
+
+        :param paths: The paths of the queued songs, in playback order.
+        """
+
+    def remote_queue(self) -> tuple[list[Path], int | None]:
+        """Gets the queue of songs kept by the player.
+
+        The local player does not keep a queue.
+
+        :returns: The paths of the queued songs and the position of the current song.
+        """
+        return [], None
+
+    def prefetch(self, paths: Iterable[Path]) -> None:
+        """Prepares the upcoming songs, transcoding in background the ones that the mixer cannot stream.
+
+        :param paths: The paths of the upcoming songs.
+        """
+        for path in paths:
+            if not is_streamable(path) and path.is_file():
+                self.transcoder.prefetch(path)
+
+    def close(self) -> None:
+        """Releases the resources of the player."""
+        self._stop_output()
+        self._discard_tail()
+        self.transcoder.shutdown()
@@ -3,31 +3,41 @@
 import json
 from pathlib import Path
 
+from cplayer.src.elements.playlist_catalog import CATALOG
+
 
 class PlayList:
     """Playlist class."""
 
-    def __init__(self, path: Path) -> None:
+    def __init__(self, path: Path, songs: list[Path] | None = None) -> None:
         """Initializes the Widget object.
 
         :param path: The path to the playlist file.
+        :param songs: The songs of a new playlist, the playlist file is not read if they are given.
         """
         self.path = path
         self.name = self.path.stem
 
-        if self.path.exists():
+        if songs is not None:
+            self.selected = None
+            self.songs = songs
+            self.deleted_songs = set()
+        elif self.path.exists():
             data = json.loads(self.path.read_text(encoding='UTF-8'))
 
             self.selected: Path | None = data['selected']
             self.songs = [Path(song_path) for song_path in data['songs']]
-            self.deleted_songs = [Path(song_path) for song_path in data.get('deleted_songs', [])]
+            self.deleted_songs = {Path(song_path) for song_path in data.get('deleted_songs', [])}
         else:
             self.selected = None
             self.songs = []
-            self.deleted_songs = []
+            self.deleted_songs: set[Path] = set()
+
+    def save(self, played: bool = False) -> None:  # noqa: FBT002
+        """Saves the playlist data to the file and updates its summary in the playlist catalog.
 
-    def save(self) -> None:
-        """Saves the playlist data to the file."""
+        :param played: Whether a song of the playlist started playing.
+        """
         with self.path.open('w', encoding='UTF-8') as json_file:
             json.dump(
                 {
@@ -35,16 +45,18 @@ class PlayList:
                     'path': str(self.path),
                     'selected': str(self.selected) if self.selected else None,
                     'songs': [str(path.absolute()) for path in self.songs],
-                    'deleted_songs': [str(path.absolute()) for path in self.deleted_songs],
+                    'deleted_songs': sorted(str(path.absolute()) for path in self.deleted_songs),
                 },
                 json_file,
                 indent=2,
             )
 
+        CATALOG.update(self.path, self.songs, self.deleted_songs, played=played)
+
     def select(self, path: Path) -> None:
         """Sets the selected song in the playlist and save the playlist data.
 
         :param path: The path to the selected song.
         """
         self.selected = path
-        self.save()
+        self.save(played=True)
@@ -0,0 +1,248 @@
+"""Module that defines the PlaylistCatalog class, an index of the playlists and their summaries.
+
+The catalog is stored as a JSON file outside of the playlists directory. It is updated incrementally every time a
+playlist is saved, and it is reconciled with the directory only when the directory modification time changes (a
+playlist was added, removed or renamed), then only the new and modified playlists are read again. So the playlist picker
+is opened without reading the playlist files.
+"""
+
+import json
+import logging
+import os
+import time
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from cplayer.src.elements import CONFIG
+from cplayer.src.elements.metadata import METADATA
+
+
+PLAYLIST_SUFFIX = '.playlist'
+QUERY_BATCH_SIZE = 500
+
+
+@dataclass
+class PlaylistSummary:
+    """Summary of a playlist."""
+
+    name: str
+    mtime: int
+    songs: int
+    deleted: int = 0
+    seconds: float | None = None
+    timed: int = 0
+    last_played: float | None = None
+
+    @property
+    def complete_duration(self) -> bool:
+        """Indicates whether the duration of every song of the playlist is known."""
+        return self.timed >= self.songs
+
+    def describe(self, now: float | None = None) -> str:
+        """Describes the playlist content in a few words.
+
+        :param now: The current time, by default the time of the call.
+
+        :returns: The number of songs, the total duration if it is known and the last time the playlist was played.
+        """
+        details = [f'{self.songs} song{"" if self.songs == 1 else "s"}']
+
+        if self.seconds is not None:
+            hours, minutes = divmod(round(self.seconds / 60), 60)
+            duration = f'{hours}h {minutes:02}m' if hours else f'{minutes}m'
+            details.append(duration if self.complete_duration else f'≥ {duration}')
+
+        if self.last_played is not None:
+            elapsed = max((now or time.time()) - self.last_played, 0)
+            for unit, seconds in (('day', 86400), ('hour', 3600), ('minute', 60)):
+                if elapsed >= seconds:
+                    count = int(elapsed // seconds)
+                    details.append(f'played {count} {unit}{"" if count == 1 else "s"} ago')
+                    break
+            else:
+                details.append('played just now')
+
+        return ' · '.join(details)
+
+
+def _known_seconds(songs: Iterable[Path]) -> tuple[float | None, int]:
+    """Sums the durations of the songs stored in the metadata store.
+
+    :param songs: The paths to the songs.
+
+    :returns: The total duration in seconds (None if no duration is known) and the number of songs with a duration.
+    """
+    paths = [str(song) for song in songs]
+    total, timed = 0.0, 0
+    for start in range(0, len(paths), QUERY_BATCH_SIZE):
+        seconds, count = METADATA.total_seconds(paths[start : start + QUERY_BATCH_SIZE])
+        total += seconds
+        timed += count
+    return (total if timed else None), timed
+
+
+class PlaylistCatalog:
+    """Index of the playlists of a directory."""
+
+    def __init__(self, path: Path, directory: Path) -> None:
+        """Initializes the PlaylistCatalog object.
+
+        :param path: The path to the catalog file.
+        :param directory: The directory of the playlists.
+        """
+        self.path = path
+        self.directory = directory
+
+        self.summaries: dict[str, PlaylistSummary] = {}
+        self._directory_mtime: int | None = None
+        self._catalog_mtime: int | None = None
+
+    def _load(self) -> None:
+        """Loads the catalog file, if it was modified since it was last loaded."""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._catalog_mtime:
+            return
+
+        try:
+            data = json.loads(self.path.read_text(encoding='UTF-8'))
+            summaries = {name: PlaylistSummary(**summary) for name, summary in data['playlists'].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            logging.warning('playlist catalog "%s" is invalid, it will be rebuilt', self.path)
+            data, summaries = {}, {}
+
+        if data.get('directory') == str(self.directory):
+            self.summaries, self._directory_mtime = summaries, data['directory_mtime']
+        else:
+            self.summaries, self._directory_mtime = {}, None
+        self._catalog_mtime = mtime
+
+    def _write(self) -> None:
+        """Writes the catalog file atomically."""
+        temporary_path = self.path.with_suffix('.tmp')
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path.write_text(
+                json.dumps(
+                    {
+                        'directory': str(self.directory),
+                        'directory_mtime': self._directory_mtime,
+                        'playlists': {name: asdict(summary) for name, summary in self.summaries.items()},
+                    },
+                ),
+                encoding='UTF-8',
+            )
+            temporary_path.replace(self.path)
+            self._catalog_mtime = self.path.stat().st_mtime_ns
+        except OSError as error:
+            logging.warning('playlist catalog "%s" cannot be saved: %s', self.path, error)
+
+    @staticmethod
+    def _read(path: Path, mtime: int, previous: PlaylistSummary | None) -> PlaylistSummary | None:
+        """Reads the summary of a playlist file.
+
+        :param path: The path to the playlist file.
+        :param mtime: The modification time of the file.
+        :param previous: The previous summary of the playlist, whose last played time is kept.
+
+        :returns: The summary, or None if the file is not a valid playlist.
+        """
+        try:
+            data = json.loads(path.read_text(encoding='UTF-8'))
+            songs, deleted = data['songs'], set(data.get('deleted_songs', []))
+        except (OSError, ValueError, KeyError, TypeError):
+            logging.warning('playlist "%s" cannot be read', path)
+            return None
+
+        remaining = [Path(song) for song in songs if song not in deleted]
+        seconds, timed = _known_seconds(remaining)
+        return PlaylistSummary(
+            name=path.stem,
+            mtime=mtime,
+            songs=len(remaining),
+            deleted=len(deleted),
+            seconds=seconds,
+            timed=timed,
+            last_played=previous.last_played if previous else None,
+        )
+
+    def refresh(self) -> list[PlaylistSummary]:
+        """Gets the summaries of the playlists, reading only the playlists added or modified outside the catalog.
+
+        :returns: The summaries, the most recently played playlists first.
+        """
+        self._load()
+
+        try:
+            directory_mtime = self.directory.stat().st_mtime_ns
+        except OSError:
+            return []
+
+        if directory_mtime != self._directory_mtime:
+            summaries = {}
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(PLAYLIST_SUFFIX) or not entry.is_file():
+                        continue
+
+                    name = entry.name[: -len(PLAYLIST_SUFFIX)]
+                    mtime = entry.stat().st_mtime_ns
+                    summary = self.summaries.get(name)
+                    if summary is None or summary.mtime != mtime:
+                        summary = self._read(Path(entry.path), mtime, summary)
+                    if summary is not None:
+                        summaries[name] = summary
+
+            self.summaries, self._directory_mtime = summaries, directory_mtime
+            self._write()
+
+        return sorted(self.summaries.values(), key=lambda summary: (-(summary.last_played or 0), summary.name.lower()))
+
+    def update(self, path: Path, songs: list[Path], deleted_songs: set[Path], played: bool = False) -> None:  # noqa: FBT002
+        """Updates the summary of a saved playlist, without reading its file.
+
+        The durations of the songs are computed again only when the content of the playlist changed.
+
+        :param path: The path to the playlist file.
+        :param songs: The songs of the playlist.
+        :param deleted_songs: The deleted songs of the playlist.
+        :param played: Whether a song of the playlist started playing.
+        """
+        if path.absolute().parent != self.directory:
+            return
+
+        self._load()
+
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return
+
+        summary = self.summaries.get(path.stem)
+        remaining = len(songs) - (len(deleted_songs.intersection(songs)) if deleted_songs else 0)
+        if summary is None or (summary.songs, summary.deleted) != (remaining, len(deleted_songs)):
+            seconds, timed = _known_seconds(song for song in songs if song not in deleted_songs)
+            summary = PlaylistSummary(
+                name=path.stem,
+                mtime=mtime,
+                songs=remaining,
+                deleted=len(deleted_songs),
+                seconds=seconds,
+                timed=timed,
+                last_played=summary.last_played if summary else None,
+            )
+            self.summaries[path.stem] = summary
+
+        summary.mtime = mtime
+        if played:
+            summary.last_played = time.time()
+        self._write()
+
+
+CATALOG = PlaylistCatalog(
+    Path(CONFIG.data.general.playlist.catalog).expanduser(),
+    Path(CONFIG.data.general.playlist.directory).expanduser().absolute(),
+)
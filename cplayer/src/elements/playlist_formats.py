@@ -0,0 +1,309 @@
+"""Module to import and export the playlists as M3U, M3U8 and PLS files, the formats understood by other players.
+
+The files are read and written line by line, so the memory used by the readers and the writers does not depend on the
+size of the playlist. The relative paths are resolved against the directory of the playlist file, the remote entries
+(URLs other than `file://`) are skipped. The durations of the songs (`#EXTINF` and `LengthN` entries) are seeded into
+the metadata store when a playlist is imported, so the durations of the songs are known before they are analyzed.
+"""
+
+import logging
+import os
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TextIO
+from urllib.parse import unquote, urlsplit
+
+from cplayer.src.elements.metadata import METADATA, TrackMetadata
+from cplayer.src.elements.playlist import PlayList
+from cplayer.src.elements.playlist_catalog import QUERY_BATCH_SIZE
+
+
+EXCHANGE_SUFFIXES = ('.m3u', '.m3u8', '.pls')
+
+_EXTINF = re.compile(r'#EXTINF:\s*(-?\d+(?:\.\d*)?)(?:[^,"]|"[^"]*")*,?(.*)')
+_PLS_ENTRY = re.compile(r'(file|title|length)(\d+)=(.*)', re.IGNORECASE)
+_URL = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]+://')
+
+
+@dataclass
+class PlaylistEntry:
+    """Song of an exchanged playlist."""
+
+    path: Path
+    seconds: float | None = None
+    title: str | None = None
+
+
+def _open(path: Path, mode: str = 'r') -> TextIO:
+    """Opens a playlist file as text, the bytes that are not valid UTF-8 are kept as they are in the paths.
+
+    :param path: The path to the playlist file.
+    :param mode: The mode, `r` to read or `w` to write.
+
+    :returns: The text file object.
+    """
+    return path.open(mode, encoding='UTF-8-sig' if mode == 'r' else 'UTF-8', errors='surrogateescape', newline=None)
+
+
+def _resolve(location: str, directory: str) -> Path | None:
+    """Gets the path of a song from its location in a playlist file.
+
+    :param location: The location of the song: an absolute path, a path relative to the playlist or a `file://` URL.
+    :param directory: The absolute path to the directory of the playlist file.
+
+    :returns: The absolute path to the song, or None if the song is remote.
+    """
+    if _URL.match(location):
+        url = urlsplit(location)
+        if url.scheme.lower() != 'file':
+            return None
+        location = unquote(url.path, errors='surrogateescape')
+
+    return Path(os.path.normpath(os.path.join(directory, location)))  # noqa: PTH118
+
+
+def _seconds(value: str) -> float | None:
+    """Parses the duration of a song, a negative duration means that it is unknown.
+
+    :param value: The text of the duration, in seconds.
+
+    :returns: The duration in seconds, or None if it is unknown.
+    """
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    return seconds if seconds >= 0 else None
+
+
+def read_m3u(path: Path) -> Iterator[PlaylistEntry]:
+    """Reads the songs of an M3U or M3U8 file, extended (`#EXTM3U`) or not.
+
+    :param path: The path to the playlist file.
+
+    :yields: The songs of the playlist, with their `#EXTINF` duration and title.
+    """
+    directory = str(path.absolute().parent)
+    seconds = title = None
+    remote = 0
+    with _open(path) as lines:
+        for raw_line in lines:
+            line = raw_line.strip()
+            if not line:
+                continue
+
+            if line[0] == '#':
+                info = _EXTINF.match(line)
+                if info is not None:
+                    seconds, title = _seconds(info.group(1)), info.group(2).strip() or None
+                continue
+
+            song = _resolve(line, directory)
+            if song is None:
+                remote += 1
+            else:
+                yield PlaylistEntry(song, seconds, title)
+            seconds = title = None
+
+    if remote:
+        logging.info('%s remote entries of "%s" skipped', remote, path)
+
+
+def _pls_groups(lines: Iterable[str]) -> Iterator[dict[str, str]]:
+    """Groups the consecutive entries of a PLS file that have the same number.
+
+    :param lines: The lines of the PLS file.
+
+    :yields: The entries of a song, by lowercase key (`file`, `title` and `length`).
+    """
+    number, fields = None, {}
+    for line in lines:
+        entry = _PLS_ENTRY.match(line.strip())
+        if entry is None:
+            continue
+
+        if entry.group(2) != number:
+            if fields:
+                yield fields
+            number, fields = entry.group(2), {}
+        fields[entry.group(1).lower()] = entry.group(3).strip()
+
+    if fields:
+        yield fields
+
+
+def read_pls(path: Path) -> Iterator[PlaylistEntry]:
+    """Reads the songs of a PLS file.
+
+    The entries of a song (`FileN`, `TitleN` and `LengthN`) must be grouped, as written by the usual players.
+
+    :param path: The path to the playlist file.
+
+    :yields: The songs of the playlist, with their duration and title.
+    """
+    directory = str(path.absolute().parent)
+    remote = 0
+    with _open(path) as lines:
+        for fields in _pls_groups(lines):
+            if 'file' not in fields:
+                continue
+
+            song = _resolve(fields['file'], directory)
+            if song is None:
+                remote += 1
+            else:
+                yield PlaylistEntry(song, _seconds(fields.get('length', '')), fields.get('title') or None)
+
+    if remote:
+        logging.info('%s remote entries of "%s" skipped', remote, path)
+
+
+def read_playlist(path: Path) -> Iterator[PlaylistEntry]:
+    """Reads the songs of an M3U, M3U8 or PLS file, the format is chosen by the file extension.
+
+    :param path: The path to the playlist file.
+
+    :returns: The iterator over the songs of the playlist.
+
+    :raises ValueError: If the file extension is not supported.
+    """
+    suffix = path.suffix.lower()
+    if suffix not in EXCHANGE_SUFFIXES:
+        message = f'unsupported playlist format "{path.suffix}", expected one of {", ".join(EXCHANGE_SUFFIXES)}'
+        raise ValueError(message)
+    return read_pls(path) if suffix == '.pls' else read_m3u(path)
+
+
+def write_m3u(path: Path, entries: Iterable[PlaylistEntry]) -> int:
+    """Writes an extended M3U file (M3U8 is the same format, always encoded in UTF-8).
+
+    :param path: The path to the playlist file.
+    :param entries: The songs of the playlist.
+
+    :returns: The number of written songs.
+    """
+    count = 0
+    with _open(path, 'w') as stream:
+        stream.write('#EXTM3U\n')
+        for entry in entries:
+            seconds = -1 if entry.seconds is None else round(entry.seconds)
+            stream.write(f'#EXTINF:{seconds},{entry.title or entry.path.stem}\n{entry.path}\n')
+            count += 1
+    return count
+
+
+def write_pls(path: Path, entries: Iterable[PlaylistEntry]) -> int:
+    """Writes a PLS file.
+
+    :param path: The path to the playlist file.
+    :param entries: The songs of the playlist.
+
+    :returns: The number of written songs.
+    """
+    count = 0
+    with _open(path, 'w') as stream:
+        stream.write('[playlist]\n')
+        for count, entry in enumerate(entries, start=1):
+            seconds = -1 if entry.seconds is None else round(entry.seconds)
+            stream.write(
+                f'File{count}={entry.path}\nTitle{count}={entry.title or entry.path.stem}\nLength{count}={seconds}\n'
+            )
+        stream.write(f'NumberOfEntries={count}\nVersion=2\n')
+    return count
+
+
+def write_playlist(path: Path, entries: Iterable[PlaylistEntry]) -> int:
+    """Writes an M3U, M3U8 or PLS file, the format is chosen by the file extension.
+
+    :param path: The path to the playlist file.
+    :param entries: The songs of the playlist.
+
+    :returns: The number of written songs.
+
+    :raises ValueError: If the file extension is not supported.
+    """
+    suffix = path.suffix.lower()
+    if suffix not in EXCHANGE_SUFFIXES:
+        message = f'unsupported playlist format "{path.suffix}", expected one of {", ".join(EXCHANGE_SUFFIXES)}'
+        raise ValueError(message)
+    return write_pls(path, entries) if suffix == '.pls' else write_m3u(path, entries)
+
+
+def _seed_durations(entries: list[PlaylistEntry]) -> int:
+    """Seeds the metadata store with the durations of the songs that exist.
+
+    :param entries: The songs with a duration.
+
+    :returns: The number of seeded songs.
+    """
+    tracks = []
+    for entry in entries:
+        try:
+            stat = entry.path.stat()
+        except OSError:
+            continue
+        tracks.append(TrackMetadata(str(entry.path), stat.st_size, stat.st_mtime_ns, seconds=entry.seconds))
+
+    METADATA.seed(tracks)
+    return len(tracks)
+
+
+def import_playlist(source: Path, destination: Path) -> PlayList:
+    """Imports an M3U, M3U8 or PLS file as a playlist.
+
+    :param source: The path to the file to import.
+    :param destination: The path to the playlist file that is written.
+
+    :returns: The imported playlist.
+
+    :raises ValueError: If the file extension is not supported.
+    """
+    playlist = PlayList(destination, songs=[])
+
+    timed: list[PlaylistEntry] = []
+    seeded = 0
+    for entry in read_playlist(source):
+        playlist.songs.append(entry.path)
+        if entry.seconds is not None:
+            timed.append(entry)
+            if len(timed) >= QUERY_BATCH_SIZE:
+                seeded += _seed_durations(timed)
+                timed.clear()
+    seeded += _seed_durations(timed)
+
+    playlist.save()
+    logging.info(
+        'playlist "%s" imported from "%s": %s songs, %s durations seeded',
+        playlist.name,
+        source,
+        len(playlist.songs),
+        seeded,
+    )
+    return playlist
+
+
+def export_playlist(playlist: PlayList, target: Path) -> int:
+    """Exports a playlist as an M3U, M3U8 or PLS file, with the durations stored in the metadata store.
+
+    :param playlist: The playlist to export, its deleted songs are not exported.
+    :param target: The path to the file to write.
+
+    :returns: The number of exported songs.
+
+    :raises ValueError: If the file extension is not supported.
+    """
+
+    def entries() -> Iterator[PlaylistEntry]:
+        songs = [song for song in playlist.songs if song not in playlist.deleted_songs]
+        for start in range(0, len(songs), QUERY_BATCH_SIZE):
+            batch = songs[start : start + QUERY_BATCH_SIZE]
+            durations = METADATA.durations([str(song) for song in batch])
+            for song in batch:
+                stored = durations.get(str(song))
+                yield PlaylistEntry(song, stored[2] if stored else None)
+
+    count = write_playlist(target, entries())
+    logging.info('playlist "%s" exported to "%s": %s songs', playlist.name, target, count)
+    return count
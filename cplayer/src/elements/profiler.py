@@ -0,0 +1,129 @@
+"""Module that defines the SessionProfiler class, used to profile a whole session of the application.
+
+The profiler runs the session under `cProfile` and `tracemalloc`, and on exit it writes a plain text report with the
+top functions, the top allocation sites and the peak memory, plus the raw `cProfile` statistics (that can be opened
+with `snakeviz`, `gprof2dot`, etc.), so the users can send an actionable profile without installing extra tooling.
+"""
+
+import cProfile
+import io
+import logging
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import TracebackType
+
+from cplayer import __version__
+from cplayer.src.elements.instrumentation import resident_memory
+
+
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+
+
+class SessionProfiler:
+    """Context manager that profiles the CPU time and the memory allocations of a session."""
+
+    TOP_FUNCTIONS = 40
+    TOP_ALLOCATIONS = 25
+    TRACEBACK_FRAMES = 5
+
+    def __init__(self, directory: Path) -> None:
+        """Initializes the SessionProfiler object.
+
+        :param directory: The directory where the reports are written.
+        """
+        timestamp = time.strftime('%Y%m%d-%H%M%S')
+        self.report_path = directory.joinpath(f'profile-{timestamp}.txt')
+        self.stats_path = directory.joinpath(f'profile-{timestamp}.prof')
+
+        self._profile = cProfile.Profile()
+        self._started = 0.0
+
+    def __enter__(self) -> Self:
+        """Starts profiling the session.
+
+        :returns: The profiler.
+        """
+        tracemalloc.start(self.TRACEBACK_FRAMES)
+        self._started = time.monotonic()
+        self._profile.enable()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stops profiling the session and writes the reports."""
+        self._profile.disable()
+        elapsed = time.monotonic() - self._started
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__),
+                tracemalloc.Filter(inclusive=False, filename_pattern='<frozen importlib._bootstrap*>'),
+            ),
+        )
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.report_path.parent.mkdir(parents=True, exist_ok=True)
+        self._profile.dump_stats(self.stats_path)
+        self.report_path.write_text(
+            self._report(elapsed, snapshot, current_memory, peak_memory, exc_type),
+            encoding='UTF-8',
+        )
+        logging.info('profile report written to "%s"', self.report_path)
+
+    def _report(
+        self,
+        elapsed: float,
+        snapshot: tracemalloc.Snapshot,
+        current_memory: int,
+        peak_memory: int,
+        exc_type: type[BaseException] | None,
+    ) -> str:
+        """Builds the text report of the session.
+
+        :param elapsed: The duration of the session in seconds.
+        :param snapshot: The snapshot of the memory allocations taken at the end of the session.
+        :param current_memory: The memory, in bytes, traced at the end of the session.
+        :param peak_memory: The peak of the traced memory, in bytes.
+        :param exc_type: The type of the exception that ended the session, if any.
+
+        :returns: The report content.
+        """
+        report = io.StringIO()
+        report.write(
+            f'cplayer {__version__} profile\n'
+            f'python: {platform.python_version()} ({sys.executable})\n'
+            f'platform: {platform.platform()}\n'
+            f'session duration: {elapsed:.1f} s\n'
+            f'session result: {exc_type.__name__ if exc_type else "ok"}\n'
+            f'traced memory at exit: {current_memory / (1024 * 1024):.1f} MiB\n'
+            f'traced memory peak: {peak_memory / (1024 * 1024):.1f} MiB\n'
+            f'resident memory at exit: {resident_memory() / (1024 * 1024):.1f} MiB\n'
+            f'raw statistics: {self.stats_path}\n',
+        )
+
+        report.write(f'\n## Top {self.TOP_FUNCTIONS} functions by cumulative time\n\n')
+        stats = pstats.Stats(self._profile, stream=report)
+        stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.TOP_FUNCTIONS)
+
+        report.write(f'\n## Top {self.TOP_FUNCTIONS} functions by internal time\n\n')
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(self.TOP_FUNCTIONS)
+
+        report.write(f'\n## Top {self.TOP_ALLOCATIONS} allocation sites still alive at exit\n\n')
+        for index, statistic in enumerate(snapshot.statistics('traceback')[: self.TOP_ALLOCATIONS], start=1):
+            report.write(f'#{index}: {statistic.size / 1024:.1f} KiB in {statistic.count} blocks\n')
+            for line in statistic.traceback.format(most_recent_first=True):
+                report.write(f'    {line}\n')
+
+        return report.getvalue()
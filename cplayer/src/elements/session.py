@@ -0,0 +1,191 @@
+"""Module that defines the SessionSnapshot class, the state of the tracklist saved to resume a session instantly.
+
+The snapshot is a compact binary file made of a fixed header (cursor, current song, playback position and modification
+time of the source), the source (the playlist file or the directory of the songs) and the filter query, the paths of the
+songs separated by NUL bytes, the positions of the displayed songs when the tracklist is filtered, and the status of the
+rows that were visible. It is written on exit and periodically, and it is restored
+on startup only if its source was not modified since, so the playlist file is neither read nor its songs checked before
+the tracklist is displayed.
+"""
+
+import logging
+import math
+import struct
+from collections.abc import Iterable
+from dataclasses import dataclass
+from itertools import accumulate
+from pathlib import Path
+
+import numpy as np
+
+
+MAGIC = b'CPSS'
+VERSION = 1
+
+MISSING_UNKNOWN = 2
+
+_PLAYLIST_FLAG = 0x01
+_NO_VIEW = 0xFFFFFFFF
+_HEADER = struct.Struct('<4sHBxqqqdIIQII')
+
+
+@dataclass
+class SessionSnapshot:  # pylint: disable=too-many-instance-attributes
+    """State of the tracklist of a session."""
+
+    source: Path
+    playlist: bool
+    source_mtime: int
+    songs: bytes
+    index: int = 0
+    current: int = -1
+    position: float = 0.0
+    query: str = ''
+    view: np.ndarray | None = None
+    rows_missing: np.ndarray | None = None
+    rows_seconds: np.ndarray | None = None
+
+    @staticmethod
+    def encode_songs(locations: Iterable[str]) -> bytes:
+        """Encodes the paths of the songs.
+
+        :param locations: The paths of the songs.
+
+        :returns: The paths, encoded in UTF-8 and separated by NUL bytes.
+        """
+        return '\0'.join(locations).encode('UTF-8', errors='surrogateescape')
+
+    def locations(self) -> list[str]:
+        """Decodes the paths of the songs.
+
+        :returns: The paths of the songs, in the order of the tracklist before filtering it.
+        """
+        return self.songs.decode('UTF-8', errors='surrogateescape').split('\0') if self.songs else []
+
+    @staticmethod
+    def source_status(source: Path) -> int | None:
+        """Gets the modification time of the source of a tracklist.
+
+        :param source: The path to the playlist file or the directory of the songs.
+
+        :returns: The modification time in nanoseconds, or None if the source does not exist.
+        """
+        try:
+            return source.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    @property
+    def valid(self) -> bool:
+        """Indicates whether the source of the tracklist was not modified since the snapshot was taken."""
+        return self.source_status(self.source) == self.source_mtime
+
+    def to_bytes(self) -> bytes:
+        """Serializes the snapshot.
+
+        :returns: The content of the snapshot file.
+        """
+        source = str(self.source).encode('UTF-8', errors='surrogateescape')
+        query = self.query.encode('UTF-8', errors='surrogateescape')
+        view = np.empty(0, dtype='<i4') if self.view is None else self.view.astype('<i4', copy=False)
+        rows_missing = np.empty(0, dtype=np.uint8) if self.rows_missing is None else self.rows_missing
+        rows_seconds = np.empty(0, dtype='<f4') if self.rows_seconds is None else self.rows_seconds.astype('<f4')
+
+        header = _HEADER.pack(
+            MAGIC,
+            VERSION,
+            _PLAYLIST_FLAG if self.playlist else 0,
+            self.source_mtime,
+            self.index,
+            self.current,
+            self.position,
+            len(source),
+            len(query),
+            len(self.songs),
+            len(view) if self.view is not None else _NO_VIEW,
+            len(rows_missing),
+        )
+        return b''.join(
+            (header, source, query, self.songs, view.tobytes(), rows_missing.tobytes(), rows_seconds.tobytes())
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'SessionSnapshot':
+        """Deserializes a snapshot, the arrays are views over the data.
+
+        :param data: The content of the snapshot file.
+
+        :returns: The snapshot.
+
+        :raises ValueError: If the data is not a valid snapshot.
+        """
+        if len(data) < _HEADER.size:
+            message = 'truncated header'
+            raise ValueError(message)
+
+        magic, version, flags, source_mtime, index, current, position, *sizes = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            message = f'unsupported snapshot (magic {magic!r}, version {version})'
+            raise ValueError(message)
+
+        source_size, query_size, songs_size, view_count, rows_count = sizes
+        has_view = view_count != _NO_VIEW
+        view_count = view_count if has_view else 0
+        offsets = list(
+            accumulate([_HEADER.size, source_size, query_size, songs_size, 4 * view_count, rows_count, 4 * rows_count])
+        )
+        if offsets[-1] != len(data):
+            message = f'invalid size ({len(data)} bytes, {offsets[-1]} expected)'
+            raise ValueError(message)
+
+        buffer = memoryview(data)
+        return cls(
+            source=Path(bytes(buffer[offsets[0] : offsets[1]]).decode('UTF-8', errors='surrogateescape')),
+            playlist=bool(flags & _PLAYLIST_FLAG),
+            source_mtime=source_mtime,
+            songs=bytes(buffer[offsets[2] : offsets[3]]),
+            index=index,
+            current=current,
+            position=position if math.isfinite(position) else 0.0,
+            query=bytes(buffer[offsets[1] : offsets[2]]).decode('UTF-8', errors='surrogateescape'),
+            view=np.frombuffer(data, dtype='<i4', count=view_count, offset=offsets[3]) if has_view else None,
+            rows_missing=np.frombuffer(data, dtype=np.uint8, count=rows_count, offset=offsets[4]),
+            rows_seconds=np.frombuffer(data, dtype='<f4', count=rows_count, offset=offsets[5]),
+        )
+
+    def save(self, path: Path, previous: bytes | None = None) -> bytes:
+        """Writes the snapshot file atomically, unless its content did not change.
+
+        :param path: The path to the snapshot file.
+        :param previous: The content of the snapshot file written previously, if any.
+
+        :returns: The content of the snapshot file.
+        """
+        data = self.to_bytes()
+        if data == previous:
+            return data
+
+        temporary_path = path.with_suffix('.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path.write_bytes(data)
+            temporary_path.replace(path)
+        except OSError as error:
+            logging.warning('session snapshot "%s" cannot be saved: %s', path, error)
+        return data
+
+    @classmethod
+    def load(cls, path: Path) -> 'SessionSnapshot | None':
+        """Reads a snapshot file.
+
+        :param path: The path to the snapshot file.
+
+        :returns: The snapshot, or None if the file does not exist or is not valid.
+        """
+        try:
+            return cls.from_bytes(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as error:
+            logging.warning('session snapshot "%s" cannot be read: %s', path, error)
+            return None
@@ -0,0 +1,384 @@
+"""Module that defines the TrackTable class, the columnar metadata of the songs of a tracklist, and its query language.
+
+The metadata is kept in NumPy arrays (one row per song) so the filters are evaluated as vectorized boolean masks. The
+names are concatenated in a single byte buffer, searched with NumPy as well. A query is made of terms, all of them must
+match (a term prefixed with `-` must not match):
+
+* `dur>5m`, `dur<=3:30`: duration (`s`, `m` or `h` units, or `minutes:seconds`).
+* `size>10mb`: file size (`b`, `kb`, `mb` or `gb` units).
+* `age<7d`: time since the last modification (`s`, `m`, `h`, `d` or `w` units).
+* `ext:flac`, `ext:mp3,ogg`: file extension.
+* `dir:live`: text contained in the directory path.
+* `intro`, `"live intro"`: text contained in the file name.
+
+The terms are case-insensitive. Unknown values (duration not read yet, file not found) never match a comparison, even
+a negated one. The terms that cannot be parsed as a predicate are searched in the file names.
+"""
+
+import math
+import re
+import shlex
+import time
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+import numpy as np
+
+
+SEPARATOR = 0
+
+_COMPARISON = re.compile(r'^(dur|size|age)(<=|>=|<|>|=)(.+)$')
+_MEMBERSHIP = re.compile(r'^(ext|dir):(.+)$')
+
+_DURATION_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600}
+_SIZE_UNITS = {'': 1, 'b': 1, 'kb': 1024, 'mb': 1024**2, 'gb': 1024**3}
+_AGE_UNITS = {'': 86400, 's': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+_OPERATORS: dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '=': np.equal,
+}
+
+
+def _parse_quantity(value: str, units: dict[str, float]) -> float:
+    """Parses a quantity with an optional unit, like `5m` or `10mb`.
+
+    :param value: The text of the quantity.
+    :param units: The factors of the accepted units.
+
+    :returns: The quantity in the base unit.
+
+    :raises ValueError: If the quantity is not valid.
+    """
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([a-z]*)', value)
+    if match is None or match.group(2) not in units:
+        message = f'invalid quantity "{value}"'
+        raise ValueError(message)
+    return float(match.group(1)) * units[match.group(2)]
+
+
+def _parse_duration(value: str) -> float:
+    """Parses a duration, like `90`, `5m` or `3:30`.
+
+    :param value: The text of the duration.
+
+    :returns: The duration in seconds.
+
+    :raises ValueError: If the duration is not valid.
+    """
+    if ':' in value:
+        seconds = 0.0
+        for part in value.split(':'):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    return _parse_quantity(value, _DURATION_UNITS)
+
+
+class TrackTable:
+    """Columnar metadata of a list of songs.
+
+    The names, the extensions and the directories (stored as identifiers) are extracted from the paths when the table is
+    built, the sizes, the modification times and the durations are unknown (NaN) until they are filled by `update`.
+    """
+
+    ROW_SCAN_RATIO = 64
+
+    def __init__(self, paths: Sequence[Path | str]) -> None:
+        """Initializes the TrackTable object.
+
+        :param paths: The paths to the songs.
+        """
+        self._extension_ids: dict[str, int] = {}
+        self._directory_ids: dict[str, int] = {}
+
+        self.size = np.empty(0, dtype=np.float64)
+        self.mtime = np.empty(0, dtype=np.float64)
+        self.seconds = np.empty(0, dtype=np.float32)
+        self.extension = np.empty(0, dtype=np.int32)
+        self.directory = np.empty(0, dtype=np.int32)
+        self.names = np.empty(0, dtype=np.uint8)
+        self.name_starts = np.empty(0, dtype=np.int64)
+        self.byte_counts = np.zeros(256, dtype=np.int64)
+
+        self.extend(paths)
+
+    def __len__(self) -> int:
+        """Gets the number of songs of the table.
+
+        :returns: The number of rows.
+        """
+        return len(self.extension)
+
+    def extend(self, paths: Sequence[Path | str]) -> None:
+        """Appends songs to the table.
+
+        :param paths: The paths to the new songs.
+        """
+        count = len(paths)
+        if not count:
+            return
+
+        parts = [str(path).rpartition('/') for path in paths]
+        names = [name for _, _, name in parts]
+
+        directory_ids = self._directory_ids
+        directories = np.fromiter(
+            (directory_ids.setdefault(directory, len(directory_ids)) for directory, _, _ in parts),
+            dtype=np.int32,
+            count=count,
+        )
+
+        extension_ids = self._extension_ids
+        extensions = np.fromiter(
+            (
+                extension_ids.setdefault(
+                    name[name.rfind('.') + 1 :].lower() if name.rfind('.') > 0 else '', len(extension_ids)
+                )
+                for name in names
+            ),
+            dtype=np.int32,
+            count=count,
+        )
+
+        encoded = '\0'.join(names).lower().encode('UTF-8', errors='replace') + b'\0'
+        buffer = np.frombuffer(encoded, dtype=np.uint8)
+        separators = np.flatnonzero(buffer == SEPARATOR)
+        starts = np.concatenate(([0], separators[:-1] + 1))
+
+        self.name_starts = np.concatenate((self.name_starts, starts + len(self.names)))
+        self.names = np.concatenate((self.names, buffer))
+        self.byte_counts += np.bincount(buffer, minlength=256)
+        self.extension = np.concatenate((self.extension, extensions))
+        self.directory = np.concatenate((self.directory, directories))
+        self.size = np.concatenate((self.size, np.full(count, np.nan)))
+        self.mtime = np.concatenate((self.mtime, np.full(count, np.nan)))
+        self.seconds = np.concatenate((self.seconds, np.full(count, np.nan, dtype=np.float32)))
+
+    def _copy(self) -> 'TrackTable':
+        """Builds an empty table sharing the identifiers of the extensions and the directories of the table.
+
+        :returns: The empty table.
+        """
+        table = TrackTable([])
+        table._extension_ids = dict(self._extension_ids)  # pylint: disable=protected-access
+        table._directory_ids = dict(self._directory_ids)  # pylint: disable=protected-access
+        return table
+
+    def take(self, rows: Sequence[int] | np.ndarray) -> 'TrackTable':
+        """Builds a table with some songs of the table, in any order, the table itself is not modified.
+
+        :param rows: The rows of the songs of the new table, in their new order.
+
+        :returns: The new table.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = np.diff(np.append(self.name_starts, len(self.names)))[rows]
+        starts = np.cumsum(lengths) - lengths
+
+        table = self._copy()
+        table.names = self.names[np.repeat(self.name_starts[rows] - starts, lengths) + np.arange(lengths.sum())]
+        table.name_starts = starts
+        table.byte_counts = np.bincount(table.names, minlength=256).astype(np.int64)
+        table.size = self.size[rows]
+        table.mtime = self.mtime[rows]
+        table.seconds = self.seconds[rows]
+        table.extension = self.extension[rows]
+        table.directory = self.directory[rows]
+        return table
+
+    def with_songs(self, position: int, paths: Sequence[Path | str]) -> 'TrackTable':
+        """Builds a copy of the table with new songs, the table itself is not modified.
+
+        :param position: The row of the first new song.
+        :param paths: The paths to the new songs.
+
+        :returns: The new table.
+        """
+        added = self._copy()
+        added.extend(paths)
+
+        position = min(max(position, 0), len(self))
+        split = self.name_starts[position] if position < len(self) else len(self.names)
+
+        table = added._copy()  # noqa: SLF001  # pylint: disable=protected-access
+        table.names = np.concatenate((self.names[:split], added.names, self.names[split:]))
+        table.name_starts = np.concatenate(
+            (self.name_starts[:position], added.name_starts + split, self.name_starts[position:] + len(added.names))
+        )
+        table.byte_counts = self.byte_counts + added.byte_counts
+        for column in ('size', 'mtime', 'seconds', 'extension', 'directory'):
+            values = getattr(self, column)
+            setattr(table, column, np.concatenate((values[:position], getattr(added, column), values[position:])))
+        return table
+
+    def without(self, rows: Sequence[int]) -> 'TrackTable':
+        """Builds a copy of the table without some songs, the table itself is not modified.
+
+        :param rows: The rows of the removed songs.
+
+        :returns: The table of the remaining songs, in the same order.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.asarray(rows, dtype=np.int64)] = False
+        lengths = np.diff(np.append(self.name_starts, len(self.names)))
+
+        table = self._copy()
+        names_keep = np.repeat(keep, lengths)
+        table.names = self.names[names_keep]
+        table.name_starts = np.cumsum(lengths[keep]) - lengths[keep]
+        table.byte_counts = self.byte_counts - np.bincount(self.names[~names_keep], minlength=256)
+        table.size = self.size[keep]
+        table.mtime = self.mtime[keep]
+        table.seconds = self.seconds[keep]
+        table.extension = self.extension[keep]
+        table.directory = self.directory[keep]
+        return table
+
+    def swap(self, first: int, second: int) -> None:
+        """Swaps two songs of the table in place, only the names between them are moved.
+
+        :param first: The row of a song.
+        :param second: The row of the other song.
+        """
+        first, second = sorted((first, second))
+        if first == second:
+            return
+
+        for column in (self.size, self.mtime, self.seconds, self.extension, self.directory):
+            column[[first, second]] = column[[second, first]]
+
+        start, first_end, second_start = self.name_starts[[first, first + 1, second]].tolist()
+        end = int(self.name_starts[second + 1]) if second + 1 < len(self) else len(self.names)
+        self.names[start:end] = np.concatenate(
+            (self.names[second_start:end], self.names[first_end:second_start], self.names[start:first_end])
+        )
+        self.name_starts[first + 1 : second + 1] += (end - second_start) - (first_end - start)
+
+    def update(self, index: int, size: float, mtime: float, seconds: float | None) -> None:
+        """Sets the file metadata of a song.
+
+        :param index: The row of the song.
+        :param size: The size of the file in bytes (NaN if the file was not found).
+        :param mtime: The modification time of the file as a timestamp (NaN if the file was not found).
+        :param seconds: The duration of the song, None if it is unknown.
+        """
+        self.size[index] = size
+        self.mtime[index] = mtime
+        self.seconds[index] = math.nan if seconds is None else seconds
+
+    def contains(self, text: str, rows: np.ndarray | None = None) -> np.ndarray:
+        """Finds the songs whose name contains a text (case-insensitive).
+
+        The positions of the least frequent byte of the text are found with a single comparison over the buffer of
+        names, and the candidates are narrowed by comparing the other bytes only at the remaining positions. When the
+        rows to check are few, their names are checked one by one instead.
+
+        :param text: The text to search.
+        :param rows: The rows to check, by default all of them.
+
+        :returns: The mask of the matching songs, only meaningful for the checked rows.
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        pattern = text.lower().encode('UTF-8', errors='replace')
+
+        if rows is not None and len(rows) * self.ROW_SCAN_RATIO <= len(self):
+            ends = np.append(self.name_starts[1:], len(self.names)) - 1
+            for row, start, end in zip(
+                rows.tolist(), self.name_starts[rows].tolist(), ends[rows].tolist(), strict=True
+            ):
+                mask[row] = pattern in self.names[start:end].tobytes()
+            return mask
+
+        if not pattern:
+            mask[:] = True
+            return mask
+
+        anchor = min(range(len(pattern)), key=lambda offset: self.byte_counts[pattern[offset]])
+        candidates = np.flatnonzero(self.names == pattern[anchor]) - anchor
+        candidates = candidates[(candidates >= 0) & (candidates <= len(self.names) - len(pattern))]
+        for offset, byte in enumerate(pattern):
+            if not len(candidates):
+                break
+            if offset != anchor:
+                candidates = candidates[self.names[candidates + offset] == byte]
+
+        mask[np.searchsorted(self.name_starts, candidates, side='right') - 1] = True
+        return mask
+
+    def _predicate(self, term: str, negated: bool, now: float) -> np.ndarray | None:
+        """Evaluates a predicate term of a query (case-insensitive).
+
+        :param term: The term, without negation.
+        :param negated: Whether the songs must not match the term, the unknown values match neither way.
+        :param now: The current time, as a timestamp.
+
+        :returns: The mask of the matching songs, or None if the term is a text to search in the names.
+        """
+        term = term.lower()
+
+        comparison = _COMPARISON.match(term)
+        if comparison is not None:
+            field, operator, value = comparison.groups()
+            try:
+                if field == 'dur':
+                    column, operand = self.seconds, _parse_duration(value)
+                elif field == 'size':
+                    column, operand = self.size, _parse_quantity(value, _SIZE_UNITS)
+                else:
+                    column, operand = now - self.mtime, _parse_quantity(value, _AGE_UNITS)
+            except ValueError:
+                return None
+            matches = _OPERATORS[operator](column, operand)
+            return ~matches & ~np.isnan(column) if negated else matches
+
+        membership = _MEMBERSHIP.match(term)
+        if membership is not None:
+            field, value = membership.groups()
+            if field == 'ext':
+                selected = np.zeros(len(self._extension_ids), dtype=bool)
+                selected[[self._extension_ids[ext] for ext in value.split(',') if ext in self._extension_ids]] = True
+            else:
+                selected = np.fromiter(
+                    (value in directory.lower() for directory in self._directory_ids),
+                    dtype=bool,
+                    count=len(self._directory_ids),
+                )
+            matches = selected[self.directory if field == 'dir' else self.extension]
+            return ~matches if negated else matches
+
+        return None
+
+    def query(self, query: str) -> np.ndarray:
+        """Evaluates a query (see the module documentation for its syntax).
+
+        The predicates are evaluated first, so the texts are only searched in the names of the remaining songs.
+
+        :param query: The query.
+
+        :returns: The mask of the matching songs.
+        """
+        try:
+            terms = shlex.split(query)
+        except ValueError:
+            terms = query.split()
+
+        now = time.time()
+        mask = np.ones(len(self), dtype=bool)
+        texts = []
+        with np.errstate(invalid='ignore'):
+            for term in terms:
+                negated = term.startswith('-') and len(term) > 1
+                predicate = self._predicate(term[1:] if negated else term, negated, now)
+                if predicate is None:
+                    texts.append((negated, term[1:] if negated else term))
+                else:
+                    mask &= predicate
+
+        for negated, text in texts:
+            rows = np.flatnonzero(mask)
+            matches = self.contains(text, rows)
+            mask &= ~matches if negated else matches
+        return mask
@@ -0,0 +1,160 @@
+"""Module that defines the TranscodeCache class, an on-disk cache of songs transcoded to a streamable format.
+
+`pygame.mixer.music` cannot stream some containers (e.g. m4a/AAC or WMA). These songs are transcoded by the decoder
+pool to FLAC, ahead of time when they are coming up in the tracklist, and stored in a size-bounded cache directory.
+The cached files are keyed by the source path and its modification time, and evicted in least recently used order.
+"""
+
+import contextlib
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import Future, InvalidStateError
+from pathlib import Path
+
+from cplayer.src.elements.decoder_pool import DECODERS, DecoderPool
+
+
+class TranscodeCache:
+    """Size-bounded cache of transcoded songs with LRU eviction."""
+
+    FORMAT = 'flac'
+
+    def __init__(self, directory: Path, max_size: int, decoders: DecoderPool | None = None) -> None:
+        """Initializes the TranscodeCache object.
+
+        :param directory: The directory where the transcoded songs are stored.
+        :param max_size: The maximum size of the cache directory in bytes.
+        :param decoders: The pool whose workers transcode the songs, by default the shared decoder pool.
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.decoders = decoders or DECODERS
+
+        self._pending: dict[Path, Future[Path]] = {}
+        self._jobs: dict[Path, Future[str]] = {}
+        self._lock = threading.Lock()
+
+    def _cache_path(self, path: Path) -> Path:
+        """Gets the path of the cached file associated with a song.
+
+        :param path: The path to the source song.
+
+        :returns: The path of the transcoded song in the cache directory.
+        """
+        key = hashlib.sha1(f'{path.absolute()}:{path.stat().st_mtime_ns}'.encode(), usedforsecurity=False)
+        return self.directory.joinpath(key.hexdigest()).with_suffix(f'.{self.FORMAT}')
+
+    def get(self, path: Path) -> Path | None:
+        """Gets the cached transcoded song, if it exists.
+
+        :param path: The path to the source song.
+
+        :returns: The path of the transcoded song, or None if the song is not cached.
+        """
+        cache_path = self._cache_path(path)
+        if cache_path.exists():
+            os.utime(cache_path)
+            return cache_path
+        return None
+
+    def prefetch(self, path: Path) -> Future[Path]:
+        """Transcodes a song in background if it is not cached yet.
+
+        :param path: The path to the source song.
+
+        :returns: A future resolved with the path of the transcoded song.
+        """
+        with self._lock:
+            future = self._pending.get(path)
+            if future is None:
+                cache_path = self.get(path)
+                if cache_path is not None:
+                    future = Future[Path]()
+                    future.set_result(cache_path)
+                else:
+                    logging.info('transcoding "%s" in background...', path)
+                    future = self._transcode(path)
+                    self._pending[path] = future
+                    future.add_done_callback(lambda _: self._forget(path))
+            return future
+
+    def _forget(self, path: Path) -> None:
+        """Forgets the transcoding of a song once it is finished.
+
+        :param path: The path to the source song.
+        """
+        self._pending.pop(path, None)
+        self._jobs.pop(path, None)
+
+    def resolve(self, path: Path) -> Path:
+        """Gets the transcoded song, waiting for its transcoding if it is not ready yet.
+
+        The callers that must not wait use the future returned by `prefetch` instead.
+
+        :param path: The path to the source song.
+
+        :returns: The path of the transcoded song.
+        """
+        return self.prefetch(path).result()
+
+    def shutdown(self) -> None:
+        """Cancels the pending transcodings and their jobs in the decoder pool."""
+        with self._lock:
+            pending = list(self._pending.values())
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+        for future in pending:
+            future.cancel()
+
+    def _transcode(self, path: Path) -> Future[Path]:
+        """Transcodes a song into the cache directory, the song is moved to the cache once it is transcoded.
+
+        :param path: The path to the source song.
+
+        :returns: A future resolved with the path of the transcoded song.
+        """
+        cache_path = self._cache_path(path)
+        temporary_path = cache_path.with_suffix('.part')
+        future = Future[Path]()
+
+        def finish(job: Future[str]) -> None:
+            try:
+                job.result()
+                temporary_path.replace(cache_path)
+            except Exception as error:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+                temporary_path.unlink(missing_ok=True)
+                with contextlib.suppress(InvalidStateError):
+                    future.set_exception(error)
+                return
+
+            self._evict(keep=cache_path)
+            with contextlib.suppress(InvalidStateError):
+                future.set_result(cache_path)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        job = self.decoders.transcode(path, temporary_path, self.FORMAT)
+        self._jobs[path] = job
+        job.add_done_callback(finish)
+        return future
+
+    def _evict(self, keep: Path) -> None:
+        """Removes the least recently used songs until the cache fits in its maximum size.
+
+        :param keep: A cached song that must not be removed.
+        """
+        entries = sorted(
+            (entry.stat().st_mtime, entry.stat().st_size, Path(entry.path))
+            for entry in os.scandir(self.directory)
+            if entry.is_file() and entry.name.endswith(f'.{self.FORMAT}')
+        )
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            if path != keep:
+                logging.info('evicting transcoded song "%s"', path)
+                path.unlink(missing_ok=True)
+                total_size -= size
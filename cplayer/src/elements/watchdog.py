@@ -0,0 +1,156 @@
+"""Module that defines the StallWatchdog class, used to find the handlers that block the event loop.
+
+The event loop of the user interface ticks the watchdog with a timer, and a background thread checks when it ticked for
+the last time. When the event loop did not tick for longer than the threshold, the stack of the thread running the
+event loop is captured while it is still blocked and logged, so the blocking handler is known. The stall is recorded
+with its duration when the event loop ticks again (only the last stalls are kept), and the summary of the stalls is
+reported on exit.
+"""
+
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass
+from pathlib import Path
+
+from cplayer.src.elements.instrumentation import METRICS
+
+
+PACKAGE_PATH = str(Path(__file__).parents[2])
+
+
+@dataclass
+class Stall:
+    """Period during which the event loop did not tick."""
+
+    started: float
+    duration: float
+    stack: traceback.StackSummary
+
+    @property
+    def location(self) -> str:
+        """Gets the innermost frame of the application in the captured stack, the handler blocking the event loop."""
+        frame = next(
+            (frame for frame in reversed(self.stack) if frame.filename.startswith(PACKAGE_PATH)),
+            self.stack[-1] if self.stack else None,
+        )
+        return f'{frame.name} ({frame.filename}:{frame.lineno})' if frame is not None else 'unknown'
+
+
+class StallWatchdog:
+    """Thread that detects the stalls of the event loop and captures the stack of the blocked handlers."""
+
+    MAX_STALLS = 1000
+    TOP_LOCATIONS = 10
+
+    def __init__(self, threshold: float) -> None:
+        """Initializes the StallWatchdog object.
+
+        :param threshold: The duration, in seconds, without tick of the event loop that is considered a stall.
+        """
+        self.threshold = threshold
+        self.interval = threshold / 4
+        self.stalls: deque[Stall] = deque(maxlen=self.MAX_STALLS)
+
+        self._loop_thread: int | None = None
+        self._last_tick = time.monotonic()
+        self._current: Stall | None = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        """Indicates whether the watchdog is watching the event loop."""
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Starts watching the event loop, it must be called from the thread running the event loop."""
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._watch, name='cplayer-watchdog', daemon=True)
+        self._thread.start()
+
+    def tick(self) -> None:
+        """Informs the watchdog that the event loop is running, the current stall (if any) is recorded."""
+        now = time.monotonic()
+        with self._lock:
+            stall, self._current = self._current, None
+            elapsed = now - self._last_tick
+            self._last_tick = now
+
+        if stall is not None:
+            self._record(stall, elapsed)
+
+    def _record(self, stall: Stall, duration: float) -> None:
+        """Records a stall once it is over.
+
+        :param stall: The stall.
+        :param duration: The duration of the stall, in seconds.
+        """
+        stall.duration = duration
+        self.stalls.append(stall)
+        logging.warning('event loop stalled for %.3f seconds in %s', duration, stall.location)
+        if METRICS.enabled:
+            METRICS.record('event_loop.stall', duration)
+
+    def _watch(self) -> None:
+        """Captures the stack of the event loop thread when it stalls, it is executed by the watchdog thread."""
+        while not self._stopped.wait(self.interval):
+            with self._lock:
+                elapsed = time.monotonic() - self._last_tick
+                if self._current is not None or elapsed <= self.threshold:
+                    continue
+
+                frame = sys._current_frames().get(self._loop_thread)  # noqa: SLF001  # pylint: disable=protected-access
+                stack = traceback.extract_stack(frame) if frame is not None else traceback.StackSummary()
+                self._current = Stall(time.time() - elapsed, elapsed, stack)
+
+            logging.warning(
+                'event loop blocked for %.3f seconds, stack of the event loop thread:\n%s',
+                elapsed,
+                ''.join(stack.format()),
+            )
+
+    def stop(self) -> None:
+        """Stops watching the event loop, a stall in progress is recorded with its duration so far."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        with self._lock:
+            stall, self._current = self._current, None
+        if stall is not None:
+            self._record(stall, time.monotonic() - self._last_tick)
+
+    def summary(self) -> str:
+        """Summarizes the recorded stalls.
+
+        :returns: The number and the durations of the stalls, and the locations that stalled the event loop the most.
+        """
+        if not self.stalls:
+            return f'no event loop stall longer than {self.threshold:.3f} seconds'
+
+        durations: Counter[str] = Counter()
+        counts: Counter[str] = Counter()
+        for stall in self.stalls:
+            durations[stall.location] += stall.duration
+            counts[stall.location] += 1
+
+        lines = [
+            (
+                f'{len(self.stalls)} event loop stalls longer than {self.threshold:.3f} seconds: '
+                f'{sum(durations.values()):.3f} seconds in total, '
+                f'{max(stall.duration for stall in self.stalls):.3f} seconds for the longest'
+            ),
+        ]
+        lines.extend(
+            f'    {duration:8.3f} s  {counts[location]:5} stalls  {location}'
+            for location, duration in durations.most_common(self.TOP_LOCATIONS)
+        )
+        return '\n'.join(lines)
@@ -29,10 +29,10 @@ class HelpPage(PageBase):
         yield MarkdownViewer(self._CONTENT, show_table_of_contents=True)
 
     def focus(self, scroll_visible: bool = True) -> Self:  # noqa: FBT002
-        """Focus on the MarkdownViewer widget.
+        """Focus on the MarkdownViewer widget, once the page is composed.
 
         :param scroll_visible: Whether to make the scroll visible when focusing.
         """
-        viewer = self.query_one(MarkdownViewer)
-        viewer.focus(scroll_visible)
+        for viewer in self.query(MarkdownViewer):
+            viewer.focus(scroll_visible)
         return self
@@ -1,15 +1,23 @@
 """Module that contains the implementation of a music player application."""
 
+import asyncio
 import logging
-from collections.abc import Callable
+import time
+from collections.abc import Callable, Coroutine
+from concurrent.futures import Future
+from functools import cached_property
 from pathlib import Path
-from typing import ClassVar
+from typing import ClassVar, TypeVar
 
+import pygame
 from pygame import mixer
+from textual import work
 from textual.app import ComposeResult
 from textual.binding import Binding, BindingType
 from textual.containers import Horizontal, Middle, Vertical
+from textual.widget import Widget
 
+from cplayer.src.components.equalizer import EqualizerWidget
 from cplayer.src.components.file_explorer import FileExplorerWidget
 from cplayer.src.components.hidden_widget import HiddenWidget
 from cplayer.src.components.input_label import InputLabelWidget
@@ -17,9 +25,17 @@ from cplayer.src.components.notification import NotificationWidget
 from cplayer.src.components.options_list import Option, OptionsListWidget
 from cplayer.src.components.progress_bar import ProgressStatusWidget
 from cplayer.src.components.status_song import StatusSong
-from cplayer.src.components.tracklist import PlaylistOrder, Song, TracklistWidget
+from cplayer.src.components.tracklist import ChangeKind, PlaylistOrder, Song, TracklistChange, TracklistWidget
 from cplayer.src.elements import CONFIG
+from cplayer.src.elements.daemon import RemotePlayer
+from cplayer.src.elements.formats import is_supported
+from cplayer.src.elements.instrumentation import METRICS
+from cplayer.src.elements.metadata import METADATA
+from cplayer.src.elements.player import Player
 from cplayer.src.elements.playlist import PlayList
+from cplayer.src.elements.playlist_catalog import CATALOG, PLAYLIST_SUFFIX
+from cplayer.src.elements.playlist_formats import EXCHANGE_SUFFIXES, export_playlist, import_playlist
+from cplayer.src.elements.session import SessionSnapshot
 from cplayer.src.pages.base import PageBase
 
 
@@ -29,6 +45,9 @@ except ImportError:
     from typing_extensions import Self
 
 
+_W = TypeVar('_W', bound=HiddenWidget)
+
+
 class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-many-public-methods
     """HomePage Class that represents the home page of the application."""
 
@@ -40,6 +59,7 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         Binding(CONFIG.data.general.shortcuts.songs.increase_volume, 'increase_volume', 'Increase Volume', show=True),
         Binding(CONFIG.data.general.shortcuts.songs.restart, 'reset', 'Restart', show=True),
         Binding(CONFIG.data.general.shortcuts.songs.mute, 'mute_song', 'Mute', show=True),
+        Binding(CONFIG.data.general.shortcuts.songs.equalizer, 'equalizer', 'Equalizer', show=False),
         Binding(CONFIG.data.general.shortcuts.playlist.load, 'load_playlist', 'Load Playlist', show=False),
         Binding(CONFIG.data.general.shortcuts.playlist.file_explorer, 'load_path', 'File Explorer', show=False),
         Binding(CONFIG.data.general.shortcuts.playlist.load_directory, 'load_directory', 'Load Directory', show=False),
@@ -55,6 +75,11 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         Binding(CONFIG.data.general.shortcuts.playlist.change_order, 'change_order', 'Playlist order', show=False),
         Binding(CONFIG.data.general.shortcuts.playlist.go_to_position, 'go_to_position', 'Go to position', show=False),
         Binding(CONFIG.data.general.shortcuts.playlist.synchronize, 'synchronize', 'Synchronize directory', show=False),
+        Binding(CONFIG.data.general.shortcuts.playlist.export, 'export_playlist', 'Export playlist', show=False),
+        Binding(CONFIG.data.general.shortcuts.playlist.mark, 'mark_song', 'Mark song', show=False),
+        Binding(
+            CONFIG.data.general.shortcuts.playlist.move_to_position, 'move_to_position', 'Move to position', show=False
+        ),
     ]
 
     def __init__(
@@ -62,10 +87,12 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         path: Path | None,
         change_title: Callable[[str], None],
         start_hidden: bool = True,  # noqa: FBT002
+        player: Player | None = None,
     ) -> None:
         """Initializes the Page object.
 
         :param path: The initial songs path to be loaded.
+        :param player: The player used to play the songs, a local player is used by default.
         :param *args: Variable length argument list.
         :param **kwargs: Arbitrary keyword arguments.
         """
@@ -74,11 +101,12 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         self.playlists_directory = Path(CONFIG.data.general.playlist.directory).expanduser()
         self.playlists_directory.mkdir(parents=True, exist_ok=True)
 
-        self._start_position = 0
         self._playing = False
         self._volume = 0.75
 
-        self._song: mixer.Sound | None = None
+        self._song_seconds = 0.0
+
+        self.player = player or Player()
 
         self.status_song_widget = StatusSong(self._volume, start_hidden=False)
         self.tracklist_widget = TracklistWidget(
@@ -91,56 +119,140 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
                 PlaylistOrder.ASCENDING,
             ),
             fixed_size=11 if CONFIG.data.appearance.style.footer else 8,
+            on_change=self.on_tracklist_change,
         )
-        self.file_explorer_widget = FileExplorerWidget(
-            path=Path('~').expanduser(),
-            on_select=self.on_select_path,
-            on_quit=lambda: setattr(self.tracklist_widget, 'display', True),
-        )
-
         self.notification_widget = NotificationWidget('')
+        self.input_bar = Horizontal(classes='full-width')
+
+        self.selected_directory = path
+        self.selected_playlist: PlayList | None = None
+
+        self.session_path = Path(CONFIG.data.general.session.path).expanduser()
+        self._session_source: tuple[Path, bool] | None = None
+        self._session_data: bytes | None = None
+        self._resume: tuple[Song, float] | None = None
+
+    def _mount_overlay(self, widget: _W, container: Widget | None = None, **position: Widget) -> _W:
+        """Mounts a widget that is created the first time it is used.
 
-        self.select_playlist_widget = OptionsListWidget('Select a playlist:', self.on_quit, self.select_playlist)
-        self.select_order_widget = OptionsListWidget('Select an order:', self.on_quit, self.select_order)
+        :param widget: The widget to mount.
+        :param container: The container of the widget, by default the home page.
+        :param position: The `before` or `after` sibling of the widget.
 
-        self.goto_position_widget = InputLabelWidget(
-            f'{CONFIG.data.appearance.style.icons.go_to_position} go to position',
-            on_enter=self.on_go_to_position,
-            on_quit=self.on_quit,
+        :returns: The widget.
+        """
+        (container or self).mount(widget, **position)
+        return widget
+
+    def _overlay_displayed(self, name: str) -> bool:
+        """Indicates whether a widget created the first time it is used is displayed, without creating it.
+
+        :param name: The name of the property of the widget.
+
+        :returns: True if the widget was created and is displayed, False otherwise.
+        """
+        return name in self.__dict__ and self.__dict__[name].display
+
+    @cached_property
+    def file_explorer_widget(self) -> FileExplorerWidget:
+        """Gets the file explorer, created and mounted the first time it is used."""
+        return self._mount_overlay(
+            FileExplorerWidget(
+                path=Path('~').expanduser(),
+                on_select=self.on_select_path,
+                on_quit=lambda: setattr(self.tracklist_widget, 'display', True),
+            ),
+            after=self.tracklist_widget,
         )
-        self.filter_widget = InputLabelWidget(
-            f'{CONFIG.data.appearance.style.icons.filter} filter text',
-            on_enter=self.filter_songs,
-            on_quit=self.on_quit,
+
+    @cached_property
+    def equalizer_widget(self) -> EqualizerWidget:
+        """Gets the equalizer, created and mounted the first time it is used."""
+        return self._mount_overlay(
+            EqualizerWidget(
+                on_change=lambda *settings: self.player.set_equalizer(*settings),  # noqa: PLW0108
+                on_quit=self.on_quit_equalizer,
+                get_stats=lambda: self.player.dsp_stats,
+            ),
+            after=self.tracklist_widget,
         )
-        self.search_widget = InputLabelWidget(
-            f'{CONFIG.data.appearance.style.icons.search} search text',
-            on_enter=self.search_songs,
-            on_quit=self.on_quit,
+
+    @cached_property
+    def select_playlist_widget(self) -> OptionsListWidget:
+        """Gets the playlist selector, created and mounted the first time it is used."""
+        return self._mount_overlay(
+            OptionsListWidget('Select a playlist:', self.on_quit, self.select_playlist),
+            before=self.tracklist_widget,
         )
-        self.directory_widget = InputLabelWidget(
-            f'{CONFIG.data.appearance.style.icons.directory} directory path',
-            on_enter=self.load_directory,
-            on_quit=self.on_quit,
+
+    @cached_property
+    def select_order_widget(self) -> OptionsListWidget:
+        """Gets the order selector, created and mounted the first time it is used."""
+        return self._mount_overlay(
+            OptionsListWidget('Select an order:', self.on_quit, self.select_order),
+            before=self.tracklist_widget,
         )
-        self.playlist_name_widget = InputLabelWidget(
-            f'{CONFIG.data.appearance.style.icons.save} playlist name',
-            on_enter=self.enter_playlist_name,
-            on_quit=self.on_quit,
+
+    def _input_overlay(self, label: str, on_enter: Callable[[], Coroutine[None, None, None]]) -> InputLabelWidget:
+        """Creates and mounts an input of the bottom bar.
+
+        :param label: The placeholder of the input.
+        :param on_enter: The coroutine function called when the input is submitted.
+
+        :returns: The input widget.
+        """
+        return self._mount_overlay(InputLabelWidget(label, on_enter=on_enter, on_quit=self.on_quit), self.input_bar)
+
+    @cached_property
+    def goto_position_widget(self) -> InputLabelWidget:
+        """Gets the position input, created and mounted the first time it is used."""
+        return self._input_overlay(
+            f'{CONFIG.data.appearance.style.icons.go_to_position} go to position', self.on_go_to_position
         )
-        self.add_songs_widget = InputLabelWidget(
-            f'{CONFIG.data.appearance.style.icons.add_songs} add songs (directory)',
-            on_enter=self.add_songs,
-            on_quit=self.on_quit,
+
+    @cached_property
+    def move_position_widget(self) -> InputLabelWidget:
+        """Gets the destination position input, created and mounted the first time it is used."""
+        return self._input_overlay(
+            f'{CONFIG.data.appearance.style.icons.go_to_position} move to position', self.on_move_to_position
         )
-        self.synchronize_widget = InputLabelWidget(
-            f'{CONFIG.data.appearance.style.icons.directory} Synchronize from directory path',
-            on_enter=self.synchronize_directory,
-            on_quit=self.on_quit,
+
+    @cached_property
+    def filter_widget(self) -> InputLabelWidget:
+        """Gets the filter input, created and mounted the first time it is used."""
+        return self._input_overlay(f'{CONFIG.data.appearance.style.icons.filter} filter text', self.filter_songs)
+
+    @cached_property
+    def search_widget(self) -> InputLabelWidget:
+        """Gets the search input, created and mounted the first time it is used."""
+        return self._input_overlay(f'{CONFIG.data.appearance.style.icons.search} search text', self.search_songs)
+
+    @cached_property
+    def directory_widget(self) -> InputLabelWidget:
+        """Gets the directory input, created and mounted the first time it is used."""
+        return self._input_overlay(
+            f'{CONFIG.data.appearance.style.icons.directory} directory path', self.load_directory
         )
 
-        self.selected_directory = path
-        self.selected_playlist: PlayList | None = None
+    @cached_property
+    def playlist_name_widget(self) -> InputLabelWidget:
+        """Gets the playlist name input, created and mounted the first time it is used."""
+        return self._input_overlay(f'{CONFIG.data.appearance.style.icons.save} playlist name', self.enter_playlist_name)
+
+    @cached_property
+    def add_songs_widget(self) -> InputLabelWidget:
+        """Gets the songs directory input, created and mounted the first time it is used."""
+        return self._input_overlay(
+            f'{CONFIG.data.appearance.style.icons.add_songs} add songs (directory)', self.add_songs
+        )
+
+    @cached_property
+    def synchronize_widget(self) -> InputLabelWidget:
+        """Gets the synchronization directory input, created and mounted the first time it is used."""
+        return self._input_overlay(
+            f'{CONFIG.data.appearance.style.icons.directory} Synchronize from directory path',
+            self.synchronize_directory,
+        )
 
     def action_go_to_position(self) -> None:
         """Opens position navigator widget."""
@@ -163,31 +275,35 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
 
     def action_decrease_volume(self) -> None:
         """Decreases the volume level."""
-        self._volume = (mixer.music.get_volume() - 0.1) if (mixer.music.get_volume() > 0) else 0
-        mixer.music.set_volume(self._volume)
+        self._volume = (self.player.volume - 0.1) if (self.player.volume > 0) else 0
+        if self.player.autonomous:
+            self._volume = self.player.volume or self._volume
+            self.status_song_widget.volume.update(progress=self._volume)
+        else:
+            self.player.volume = self._volume
 
         self.status_song_widget.volume.update(progress=self._volume)
 
     def action_increase_volume(self) -> None:
         """Increases the volume level."""
-        self._volume = 1 if (mixer.music.get_volume() > 1) else (mixer.music.get_volume() + 0.1)
-        mixer.music.set_volume(self._volume)
+        self._volume = 1 if (self.player.volume > 1) else (self.player.volume + 0.1)
+        if self.player.autonomous:
+            self._volume = self.player.volume or self._volume
+            self.status_song_widget.volume.update(progress=self._volume)
+        else:
+            self.player.volume = self._volume
 
         self.status_song_widget.volume.update(progress=self._volume)
 
     def action_cursor_left(self, seconds: int = 5) -> None:
         """Move the playback position `seconds` backward."""
-        if mixer.music.get_busy():
-            self._start_position = max(int(self._start_position + mixer.music.get_pos() / 1000.0 - seconds), 0)
-            mixer.music.play(0, self._start_position)
+        if self.player.busy:
+            self.player.seek(max(int(self.player.position - seconds), 0))
 
     def action_cursor_right(self, seconds: int = 5) -> None:
         """Move the playback position `seconds` forward."""
-        if mixer.music.get_busy() and self._song:
-            self._start_position = min(
-                int(self._start_position + mixer.music.get_pos() / 1000.0 + seconds), int(self._song.get_length())
-            )
-            mixer.music.play(0, self._start_position)
+        if self.player.busy and self._song_seconds:
+            self.player.seek(min(int(self.player.position + seconds), int(self._song_seconds)))
 
     def action_filter(self) -> None:
         """Opens a input text to filter songs in the current playlist."""
@@ -204,47 +320,73 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
 
     def action_mute_song(self) -> None:
         """Mutes the songs."""
-        mixer.music.set_volume(0 if mixer.music.get_volume() else self._volume)
+        self.player.volume = 0 if self.player.volume else self._volume
 
-        self.status_song_widget.volume.muted = mixer.music.get_volume() == 0
-        self.status_song_widget.volume.update(progress=mixer.music.get_volume())
+        self.status_song_widget.volume.muted = self.player.volume == 0
+        self.status_song_widget.volume.update(progress=self.player.volume)
 
     def action_play_pause(self) -> None:
         """Toggles play/pause for the currently playing song."""
-        self._playing = not mixer.music.get_busy()
+        self._playing = not self.player.busy
         if self._playing:
-            position = mixer.music.get_pos()
-            if position > 0:
+            if self.player.paused:
                 self.status_song_widget.progress.set_status(ProgressStatusWidget.Status.PLAYING)
-                mixer.music.unpause()
+                self.player.unpause()
+            elif self._resume is not None:
+                self.play_song(self._resume[0])
             elif self.selected_playlist and self.selected_playlist.selected:
                 self.tracklist_widget.action_select_cursor()
         else:
             self.status_song_widget.progress.set_status(ProgressStatusWidget.Status.PAUSED)
-            mixer.music.pause()
+            self.player.pause()
 
     def play_song(self, song: Song) -> None:
         """Plays the selected song.
 
         :param song: The song to be played.
         """
-        if song.seconds:
+        if not song.exists():
+            self._skip_song()
+            return
+
+        track = METADATA.get(song.path)
+        if track is not None and not track.valid and track.matches(song.path):
+            logging.warning('skipping the song "%s", it cannot be decoded: %s', song.path, track.error)
+            self._skip_song()
+            return
+
+        ready = self.player.prepare(song.path)
+        if not ready.done():
+            self._playing = False
+            self.player.stop()
+            self.status_song_widget.progress.set_status(ProgressStatusWidget.Status.TRANSCODING)
+            self.status_song_widget.song.update(song.path.name)
+            self._play_transcoded(song, ready)
+            return
+
+        start = time.perf_counter()
+        if song.seconds != 0:
             try:
-                self._start_position = 0
-                self._song = mixer.Sound(song.path)
+                self._show_duration(song)
+
+                self.player.set_queue(item.path for item in self.tracklist_widget.items)
+                self.player.load(song.path)
+                self.player.play(self._resume[1] if self._resume is not None and self._resume[0] is song else 0.0)
+                self._resume = None
 
-                mixer.music.load(song.path)
-                mixer.music.play()
+                if METRICS.enabled:
+                    METRICS.record('playback.first_sound', time.perf_counter() - start)
 
                 self._playing = True
 
                 self.status_song_widget.progress.set_status(ProgressStatusWidget.Status.PLAYING)
-                self.status_song_widget.progress.total_seconds = (
-                    f'{(int(song.seconds) // 60):02}:{(int(song.seconds) % 60):02}'
-                )
 
                 if self.selected_playlist:
                     self.selected_playlist.select(song.path)
+
+                self.player.prefetch(
+                    item.path for item in self.tracklist_widget.upcoming(CONFIG.data.general.transcoding.prefetch)
+                )
             except Exception:  # pylint: disable=broad-exception-caught
                 logging.exception('error playing the song "%s"', song.path)
 
@@ -255,11 +397,33 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         else:
             logging.warning('invalid song: %s', song)
 
+    @work(exclusive=True, group='transcoding')
+    async def _play_transcoded(self, song: Song, ready: Future[Path]) -> None:
+        """Plays a song once it is transcoded, the worker is cancelled if another song is played in the meantime.
+
+        :param song: The song to be played.
+        :param ready: The future of the transcoding of the song.
+        """
+        try:
+            await asyncio.wrap_future(ready)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logging.exception('error transcoding the song "%s"', song.path)
+            self._skip_song()
+            return
+
+        if self.tracklist_widget.current_song is song:
+            self.play_song(song)
+
+    def _skip_song(self) -> None:
+        """Plays the next song, if any, after skipping a song that cannot be played."""
+        self.tracklist_widget.draw()
+        if self.tracklist_widget.index < self.tracklist_widget.items_length - 1:
+            self.call_later(self.tracklist_widget.next_song)
+
     def action_reset(self) -> None:
         """Resets the currently selected song."""
-        if mixer.music.get_busy():
-            self._start_position = 0
-            mixer.music.play(0, 0)
+        if self.player.busy:
+            self.player.seek(0)
 
     def on_quit(self, widget: HiddenWidget) -> None:
         """Handles quit event for the input widget.
@@ -313,6 +477,21 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         self.tracklist_widget.display = False
         self.file_explorer_widget.show()
 
+    def action_equalizer(self) -> None:
+        """Opens the equalizer."""
+        self.tracklist_widget.display = False
+        self.equalizer_widget.show()
+
+    def on_quit_equalizer(self) -> None:
+        """Saves the equalizer settings when the equalizer is closed."""
+        CONFIG.data.general.equalizer.enabled = self.equalizer_widget.enabled
+        CONFIG.data.general.equalizer.preamp = self.equalizer_widget.preamp
+        CONFIG.data.general.equalizer.gains = list(self.equalizer_widget.gains)
+        CONFIG.save()
+
+        self.tracklist_widget.display = True
+        self.tracklist_widget.focus()
+
     def on_select_path(self, path: Path) -> None:
         """Handles the selection of a file path.
 
@@ -344,9 +523,8 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         if path.exists():
             self.directory_widget.hide()
 
-            self.tracklist_widget.set_songs(
-                [song for song in path.iterdir() if song.suffix in ('.mp3', '.wav')], sort=True
-            )
+            self.tracklist_widget.set_songs([song for song in path.iterdir() if is_supported(song)], sort=True)
+            self._session_source = (path.absolute(), False)
 
             self.tracklist_widget.display = True
             self.tracklist_widget.focus()
@@ -376,17 +554,13 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         if directory_path.exists() and self.selected_playlist:
             self.synchronize_widget.hide()
 
-            current_songs = [song.path for song in self.tracklist_widget.items]
-            deleted_songs = [Path(path) for path in self.selected_playlist.deleted_songs]
+            known_songs = {song.location for song in self.tracklist_widget.items_unfilter}
+            known_songs.update(str(song) for song in self.selected_playlist.deleted_songs)
 
-            current_songs.extend(
-                [
-                    path
-                    for path in directory_path.iterdir()
-                    if (path not in deleted_songs) and (path not in current_songs) and path.suffix in ('.mp3', '.wav')
-                ],
+            self.tracklist_widget.add(
+                [path for path in directory_path.iterdir() if (str(path) not in known_songs) and is_supported(path)],
             )
-            self.tracklist_widget.set_songs(current_songs, sort=True)
+            self.tracklist_widget.reorder()
 
             self.tracklist_widget.display = True
             self.tracklist_widget.focus()
@@ -399,15 +573,94 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         """Called automatically to advance the progress bar."""
         if self.tracklist_widget.current_song is not None and self._playing:
             song = self.tracklist_widget.current_song
-            current_position = int((mixer.music.get_pos() / 1000) + self._start_position)
+            if self.player.autonomous and self.player.path is not None and self.player.path != song.path:
+                self._follow_player(self.player.path)
+                song = self.tracklist_widget.current_song or song
+
+            if not self._song_seconds and song.cached_seconds:
+                self._show_duration(song)
+
+            current_position = int(self.player.position)
 
             self.status_song_widget.progress.set_progress(current_position)
 
             self.status_song_widget.song.update(song.path.name)
+            self.status_song_widget.set_format(self.player.track_format, self.player.output_format)
 
-            if not mixer.music.get_busy() and self.tracklist_widget.index is not None:
+            if (
+                not self.player.autonomous
+                and self.tracklist_widget.index is not None
+                and (not self.player.busy or self.player.fade_out())
+            ):
                 self.tracklist_widget.next_song()
 
+    def _follow_player(self, path: Path) -> None:
+        """Highlights the song played by an autonomous player (e.g. the daemon) after it changed the song by itself.
+
+        :param path: The path to the song being played.
+        """
+        self.tracklist_widget.set_current(path)
+
+        song = self.tracklist_widget.current_song
+        if song is not None and song.path == path:
+            self._show_duration(song)
+
+    def _show_duration(self, song: Song) -> None:
+        """Shows the duration of the song being played, or a placeholder while the song is decoded to know it.
+
+        :param song: The song being played.
+        """
+        seconds = song.seconds
+        self._song_seconds = seconds or 0.0
+        self.status_song_widget.progress.total_seconds = (
+            f'{(int(seconds) // 60):02}:{(int(seconds) % 60):02}' if seconds is not None else '--:--'
+        )
+
+    def _detach_player(self) -> None:
+        """Plays the songs with a local player once the daemon is not reachable anymore, the tracklist is kept.
+
+        The disconnected player is kept if the audio device cannot be opened, the songs cannot be played then.
+        """
+        self._playing = False
+        self.status_song_widget.progress.set_status(ProgressStatusWidget.Status.PAUSED)
+        try:
+            if not mixer.get_init():
+                mixer.init(buffer=CONFIG.data.general.output.buffer)
+        except pygame.error as error:
+            logging.exception('the audio device cannot be opened, the songs cannot be played')
+            self.notification_widget.show(
+                message=f'[#FFFF00] [#CC0000]the playback daemon stopped, the audio device cannot be opened: {error}',
+                focus=False,
+            )
+            return
+
+        self.player.close()
+        self.player = Player()
+        self.player.volume = self._volume
+        self.notification_widget.show(
+            message='[#FFFF00] [#CC0000]the playback daemon stopped, the songs are played locally', focus=False
+        )
+
+    def _attach_player(self) -> bool:
+        """Restores the queue of songs of an autonomous player (e.g. the daemon) in the tracklist.
+
+        :returns: True if the player had a queue of songs, False otherwise.
+        """
+        queue, index = self.player.remote_queue()
+        if not queue:
+            return False
+
+        self.tracklist_widget.set_songs(queue)
+        if index is not None and self.player.path is not None:
+            self._playing = True
+            self._follow_player(self.player.path)
+            self.status_song_widget.progress.set_status(
+                ProgressStatusWidget.Status.PAUSED if self.player.paused else ProgressStatusWidget.Status.PLAYING
+            )
+
+        self.change_title(f'{CONFIG.data.appearance.style.icons.playlist} daemon')
+        return True
+
     def action_save_playlist(self) -> None:
         """Saves the current playlist."""
         self.status_song_widget.hide()
@@ -418,17 +671,64 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         self.playlist_name_widget.show()
 
     def action_load_playlist(self) -> None:
-        """Opens the playlists selector widget."""
+        """Opens the playlists selector widget.
+
+        The M3U, M3U8 and PLS files of the playlists directory that were not imported yet are listed after the
+        playlists, they are imported when they are selected.
+        """
         self.tracklist_widget.display = False
 
+        now = time.time()
+        importable = sorted(
+            path
+            for path in self.playlists_directory.iterdir()
+            if path.suffix.lower() in EXCHANGE_SUFFIXES and not path.with_suffix(PLAYLIST_SUFFIX).exists()
+        )
         self.select_playlist_widget.list_view.update(
             [
-                Option(path, f'{CONFIG.data.appearance.style.icons.playlist} ', lambda path: path.stem)
-                for path in self.playlists_directory.glob('*.playlist')
+                *(
+                    Option(
+                        self.playlists_directory.joinpath(summary.name).with_suffix(PLAYLIST_SUFFIX),
+                        f'{CONFIG.data.appearance.style.icons.playlist} ',
+                        lambda path, summary=summary: f'{path.stem} [dim]({summary.describe(now)})[/dim]',
+                        lambda path: path.stem,
+                    )
+                    for summary in CATALOG.refresh()
+                ),
+                *(
+                    Option(
+                        path,
+                        f'{CONFIG.data.appearance.style.icons.playlist} ',
+                        lambda path: f'{path.stem} [dim](import {path.suffix[1:].upper()})[/dim]',
+                        lambda path: path.stem,
+                    )
+                    for path in importable
+                ),
             ],
         )
         self.select_playlist_widget.show()
 
+    def action_export_playlist(self) -> None:
+        """Exports the playlist highlighted in the playlists selector, or the current playlist, as an M3U8 file."""
+        if self._overlay_displayed('select_playlist_widget'):
+            option = self.select_playlist_widget.list_view.highlighted
+            path = Path(option.data) if option is not None else None
+        else:
+            path = self.selected_playlist.path if self.selected_playlist else None
+
+        if path is None or path.suffix != PLAYLIST_SUFFIX or not path.exists():
+            self.notification_widget.show(message='[#FFFF00] [#CC0000]no saved playlist to export', focus=False)
+            return
+
+        target = path.with_suffix('.m3u8')
+        try:
+            count = export_playlist(PlayList(path), target)
+        except OSError as error:
+            logging.exception('playlist "%s" cannot be exported', path)
+            self.notification_widget.show(message=f'[#FFFF00] [#CC0000]{error}', focus=False)
+        else:
+            self.notification_widget.show(message=f'{count} songs exported to "{target}"', focus=False)
+
     def select_order(self, option: Path | str) -> None:
         """Selects the playlist order.
 
@@ -442,7 +742,7 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         CONFIG.data.general.playlist.order = self.tracklist_widget.order.value
         CONFIG.save()
 
-        self.tracklist_widget.set_songs([song.path for song in self.tracklist_widget.items], sort=True)
+        self.tracklist_widget.reorder()
         self.tracklist_widget.display = True
         self.tracklist_widget.focus()
 
@@ -466,23 +766,55 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
 
         :param path: The selected playlist path.
         """
-        self.selected_playlist = PlayList(Path(path))
+        self.select_playlist_widget.hide()
+
+        path = Path(path)
+        if path.suffix.lower() in EXCHANGE_SUFFIXES:
+            self.tracklist_widget.display = True
+            self.tracklist_widget.focus()
+            self.notification_widget.show(message=f'importing "{path.name}"...', focus=False)
+            self._import_playlist(path)
+            return
+
+        self.selected_playlist = PlayList(path)
+        self.load_playlist()
+
+    @work(thread=True, exclusive=True, group='import-playlist', exit_on_error=False)
+    def _import_playlist(self, source: Path) -> None:
+        """Imports in background an M3U, M3U8 or PLS file of the playlists directory, then loads it.
+
+        :param source: The path to the file to import.
+        """
+        try:
+            playlist = import_playlist(source, source.with_suffix(PLAYLIST_SUFFIX))
+        except (OSError, ValueError) as error:
+            logging.exception('playlist "%s" cannot be imported', source)
+            self.app.call_from_thread(self.notification_widget.show, message=f'[#FFFF00] [#CC0000]{error}', focus=False)
+            return
+
+        self.app.call_from_thread(self._load_imported_playlist, playlist)
+
+    def _load_imported_playlist(self, playlist: PlayList) -> None:
+        """Loads an imported playlist.
+
+        :param playlist: The imported playlist.
+        """
+        self.notification_widget.hide()
+        self.selected_playlist = playlist
         self.load_playlist()
 
     def load_playlist(self) -> None:
         """Loads the selected playlist."""
         if self.selected_playlist and self.selected_playlist.path.exists():
-            self.select_playlist_widget.hide()
-
             songs = [Path(path) for path in self.selected_playlist.songs]
 
             self.change_title(f'{CONFIG.data.appearance.style.icons.playlist} {self.selected_playlist.name}')
 
             logging.info('loading playlist "%s" with %s items...', self.selected_playlist.name, len(songs))
 
-            self.tracklist_widget.set_songs(
-                [song for song in songs if song not in self.selected_playlist.deleted_songs],
-            )
+            deleted_songs = self.selected_playlist.deleted_songs
+            self.tracklist_widget.set_songs([song for song in songs if song not in deleted_songs])
+            self._session_source = (self.selected_playlist.path.absolute(), True)
             self.tracklist_widget.display = True
             self.tracklist_widget.focus()
 
@@ -519,19 +851,44 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         self.status_song_widget.show()
 
     async def action_up_song_position(self) -> None:
-        """Moves the selected song up in the playlist."""
-        await self.tracklist_widget.swap(self.tracklist_widget.index - 1)
+        """Moves the selected song, or the marked songs, up in the playlist."""
+        positions = self.tracklist_widget.marked_positions
+        if positions:
+            self.tracklist_widget.move(positions, positions[0] - 1)
 
     async def action_down_song_position(self) -> None:
-        """Moves the selected song down in the playlist."""
-        await self.tracklist_widget.swap(self.tracklist_widget.index + 1)
+        """Moves the selected song, or the marked songs, down in the playlist."""
+        positions = self.tracklist_widget.marked_positions
+        if positions:
+            self.tracklist_widget.move(positions, positions[0] + 1)
+
+    def action_mark_song(self) -> None:
+        """Marks or unmarks the highlighted song, to move or delete several songs at once."""
+        self.tracklist_widget.toggle_mark()
+
+    def action_move_to_position(self) -> None:
+        """Opens the input of the position where the selected song, or the marked songs, are moved."""
+        self.status_song_widget.hide()
+
+        self.move_position_widget.value = ''
+        self.move_position_widget.show()
+
+    async def on_move_to_position(self) -> None:
+        """Moves the selected song, or the marked songs, to the indicated position."""
+        self.move_position_widget.hide()
+        self.status_song_widget.show()
+        try:
+            value = self.move_position_widget.value.strip()
+            target = self.tracklist_widget.items_length if (value == '$') else int(value)
+            self.tracklist_widget.move(self.tracklist_widget.marked_positions, target - 1)
+        except ValueError:
+            logging.exception('invalid position value: %s', self.move_position_widget.value)
+
+        self.tracklist_widget.focus()
 
     async def action_delete_song(self) -> None:
-        """Deletes the selected song from the playlist."""
-        deleted_song = self.tracklist_widget.delete_selected_song()
-        if deleted_song and self.selected_playlist:
-            self.selected_playlist.deleted_songs.append(deleted_song)
-            self.selected_playlist.save()
+        """Deletes the selected song, or the marked songs, from the playlist."""
+        self.tracklist_widget.remove(self.tracklist_widget.marked_positions)
 
     async def action_add_songs(self) -> None:
         """Opens input widget to add songs to the playlist."""
@@ -546,14 +903,8 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
 
         path = Path(self.add_songs_widget.value)
         if path.exists():
-            songs = [path] if path.is_file() else [song for song in path.iterdir() if song.suffix in ('.mp3', '.wav')]
+            songs = [path] if path.is_file() else [song for song in path.iterdir() if is_supported(song)]
             if songs:
-                if self.selected_playlist:
-                    self.selected_playlist.deleted_songs = [
-                        path for path in self.selected_playlist.deleted_songs if Path(path) not in songs
-                    ]
-                    self.selected_playlist.save()
-
                 self.add_songs_widget.hide()
                 self.tracklist_widget.add(songs)
                 self.tracklist_widget.focus()
@@ -563,6 +914,22 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
         else:
             self.notification_widget.show(message=f'[#FFFF00] [#CC0000]file "{path}" not found')
 
+    def on_tracklist_change(self, change: TracklistChange) -> None:
+        """Records the removed and the added songs in the selected playlist.
+
+        :param change: The change of the songs of the tracklist.
+        """
+        if not self.selected_playlist or change.kind not in {ChangeKind.INSERT, ChangeKind.REMOVE, ChangeKind.REPLACE}:
+            return
+
+        deleted_songs = self.selected_playlist.deleted_songs
+        count = len(deleted_songs)
+        inserted = {song.location for song in change.inserted}
+        deleted_songs.update(song.path for song in change.removed if song.location not in inserted)
+        deleted_songs.difference_update(song.path for song in change.inserted)
+        if len(deleted_songs) != count or (change.removed and change.inserted):
+            self.selected_playlist.save()
+
     def on_change_position(self, index: int, total: int) -> None:
         """Updates the position indicator widget."""
         self.status_song_widget.position.update(f'{index + 1}/{total}')
@@ -572,24 +939,12 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
 
         :returns: The composed elements for the home page.
         """
-        yield self.select_playlist_widget
-        yield self.select_order_widget
-
         yield self.tracklist_widget
-        yield self.file_explorer_widget
 
         with Middle(classes='bottom bottom-size full-width'), Vertical(classes='bottom full-width panel'):
-            with Horizontal(classes='full-width'):
+            with self.input_bar:
                 yield self.status_song_widget
 
-                yield self.goto_position_widget
-                yield self.filter_widget
-                yield self.search_widget
-                yield self.directory_widget
-                yield self.playlist_name_widget
-                yield self.add_songs_widget
-                yield self.synchronize_widget
-
             yield self.notification_widget
 
     def on_mount(self) -> None:
@@ -598,8 +953,15 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
 
         self.set_interval(0.5, self.make_progress, pause=False)
 
+        if isinstance(self.player, RemotePlayer):
+            self.player.on_disconnect = lambda: self.call_later(self._detach_player)
+
         if self.selected_directory is not None:
             self._load_directory(self.selected_directory)
+        elif self.player.autonomous and self._attach_player():
+            logging.info('attached to the queue of the player')
+        elif self._restore_session():
+            logging.info('session restored from "%s"', self.session_path)
         elif CONFIG.data.general.playlist.selected:
             self.selected_playlist = PlayList(Path(CONFIG.data.general.playlist.selected))
             self.load_playlist()
@@ -608,7 +970,94 @@ class HomePage(PageBase):  # pylint: disable=too-many-instance-attributes,too-ma
             self._load_directory(path)
             self.change_title(f'{CONFIG.data.appearance.style.icons.directory} {path.absolute()}')
 
-        mixer.music.set_volume(self._volume)
+        if self.player.autonomous:
+            self._volume = self.player.volume or self._volume
+            self.status_song_widget.volume.update(progress=self._volume)
+        else:
+            self.player.volume = self._volume
+
+        if CONFIG.data.general.session.enabled and CONFIG.data.general.session.interval > 0:
+            self.set_interval(CONFIG.data.general.session.interval, self.save_session)
+
+    def _restore_session(self) -> bool:
+        """Restores the tracklist of the previous session, if its playlist or directory was not modified since.
+
+        The playlist file is read in background, the tracklist is displayed from the snapshot meanwhile.
+
+        :returns: True if the session was restored, False otherwise.
+        """
+        if not CONFIG.data.general.session.enabled or self.player.autonomous:
+            return False
+
+        selected = CONFIG.data.general.playlist.selected
+        source = Path(selected or '').absolute()
+        snapshot = SessionSnapshot.load(self.session_path)
+        if snapshot is None or snapshot.source != source or snapshot.playlist != bool(selected) or not snapshot.valid:
+            return False
+
+        self.tracklist_widget.restore(snapshot)
+        self.tracklist_widget.display = True
+        self.tracklist_widget.focus()
+        self._session_source = (source, snapshot.playlist)
+
+        if snapshot.playlist:
+            self.change_title(f'{CONFIG.data.appearance.style.icons.playlist} {source.stem}')
+            self._load_session_playlist(source)
+        else:
+            self.change_title(f'{CONFIG.data.appearance.style.icons.directory} {source}')
+
+        song = self.tracklist_widget.current_song
+        if song is not None:
+            self._resume = (song, snapshot.position)
+
+            seconds = song.cached_seconds or 0
+            self.status_song_widget.progress.total_seconds = f'{(int(seconds) // 60):02}:{(int(seconds) % 60):02}'
+            self.status_song_widget.progress.set_progress(int(snapshot.position))
+            self.status_song_widget.progress.set_status(ProgressStatusWidget.Status.PAUSED)
+            self.status_song_widget.song.update(song.path.name)
+        return True
+
+    @work(thread=True, exclusive=True, group='session-playlist', exit_on_error=False)
+    def _load_session_playlist(self, path: Path) -> None:
+        """Reads in background the playlist of a restored session.
+
+        :param path: The path to the playlist file.
+        """
+        playlist = PlayList(path)
+        self.app.call_from_thread(self._adopt_session_playlist, playlist)
+
+    def _adopt_session_playlist(self, playlist: PlayList) -> None:
+        """Selects the playlist of a restored session, unless another playlist or directory was loaded meanwhile.
+
+        :param playlist: The playlist of the restored session.
+        """
+        if self.selected_playlist is None and self._session_source == (playlist.path.absolute(), True):
+            self.selected_playlist = playlist
+
+    def save_session(self) -> None:
+        """Saves the snapshot of the tracklist, to restore it in the next session."""
+        if not CONFIG.data.general.session.enabled or self.player.autonomous or self._session_source is None:
+            return
+
+        source, playlist = self._session_source
+        source_mtime = SessionSnapshot.source_status(source)
+        if source_mtime is None:
+            return
+
+        if self._resume is not None:
+            position = self._resume[1]
+        elif self._playing or self.player.paused:
+            position = self.player.position
+        else:
+            position = 0.0
+
+        snapshot = self.tracklist_widget.snapshot(source, playlist, source_mtime, position)
+        self._session_data = snapshot.save(self.session_path, self._session_data)
+
+    def on_unmount(self) -> None:
+        """Handles events on the unmounting of the home page."""
+        self.save_session()
+        self.player.close()
 
     def focus(self, scroll_visible: bool = True) -> Self:  # noqa: FBT002
         """Sets the focus on the home page.
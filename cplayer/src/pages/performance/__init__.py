@@ -0,0 +1,146 @@
+"""Performance Page Module."""
+
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from rich.console import Group
+from rich.table import Table
+from rich.text import Text
+from textual.app import ComposeResult
+from textual.containers import VerticalScroll
+from textual.widgets import Static
+
+from cplayer.src.elements import CONFIG
+from cplayer.src.elements.instrumentation import METRICS, Histogram, resident_memory
+from cplayer.src.pages.base import PageBase
+
+
+if TYPE_CHECKING:
+    from textual.timer import Timer
+
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+
+
+class PerformancePage(PageBase):
+    """PerformancePage Class that displays the live counters and latency histograms of the application."""
+
+    DEFAULT_CSS = Path(__file__).parent.joinpath('styles.css').read_text(encoding='UTF-8')
+
+    REFRESH_INTERVAL = 1.0
+    SPARKLINE = ' ▁▂▃▄▅▆▇█'
+
+    def __init__(
+        self,
+        change_title: Callable[[str], None],
+        start_hidden: bool = True,  # noqa: FBT002
+    ) -> None:
+        """Initializes the Page object.
+
+        :param change_title: A callable function to change the title of the page.
+        :param start_hidden: Whether the page should start as hidden.
+        """
+        super().__init__(change_title=change_title, start_hidden=start_hidden)
+
+        self.content = Static('')
+        self.scroll = VerticalScroll(self.content)
+
+        self._timer: Timer | None = None
+        self._previous_counts: dict[str, int] = {}
+        self._previous_time = time.monotonic()
+
+    def compose(self) -> ComposeResult:
+        """Composes the layout for the Page.
+
+        :yields: Widget displaying the performance counters.
+        """
+        yield self.scroll
+
+    def on_mount(self) -> None:
+        """Handles events on the mounting of the performance page."""
+        self._timer = self.set_interval(self.REFRESH_INTERVAL, self.draw, pause=True)
+
+        super().on_mount()
+
+    def show(self, focus: bool = True) -> None:  # noqa: FBT002
+        """Shows the page and starts refreshing the counters."""
+        super().show(focus)
+
+        self.draw()
+        if self._timer is not None:
+            self._timer.resume()
+
+    def hide(self) -> None:
+        """Hides the page and stops refreshing the counters."""
+        super().hide()
+
+        if self._timer is not None:
+            self._timer.pause()
+
+    def _sparkline(self, histogram: Histogram) -> str:
+        """Draws the distribution of a histogram.
+
+        :param histogram: The latency histogram.
+
+        :returns: The sparkline of the non-empty buckets range.
+        """
+        used = [index for index, count in enumerate(histogram.buckets) if count]
+        if not used:
+            return ''
+
+        buckets = histogram.buckets[used[0] : used[-1] + 1]
+        highest = max(buckets)
+        return ''.join(self.SPARKLINE[round(count / highest * (len(self.SPARKLINE) - 1))] for count in buckets)
+
+    def draw(self) -> None:
+        """Draws the current counters and histograms."""
+        if not METRICS.enabled:
+            self.content.update(
+                'The instrumentation is disabled, enable it with the "development.instrumentation" option of the '
+                'configuration file.',
+            )
+            return
+
+        now = time.monotonic()
+        elapsed = max(now - self._previous_time, 1e-9)
+
+        table = Table('metric', 'count', 'rate/s', 'mean (ms)', 'p50 (ms)', 'p95 (ms)', 'max (ms)', 'distribution')
+        table.header_style = f'bold {CONFIG.data.appearance.style.colors.primary}'
+        for name, histogram in sorted(METRICS.histograms.items()):
+            rate = (histogram.count - self._previous_counts.get(name, 0)) / elapsed
+            self._previous_counts[name] = histogram.count
+            table.add_row(
+                name,
+                str(histogram.count),
+                f'{rate:.1f}',
+                f'{histogram.mean * 1000:.3f}',
+                f'{histogram.percentile(50) * 1000:.3f}',
+                f'{histogram.percentile(95) * 1000:.3f}',
+                f'{histogram.maximum * 1000:.3f}',
+                self._sparkline(histogram),
+            )
+        self._previous_time = now
+
+        hit_rate = METRICS.ratio('metadata.hit', 'metadata.miss')
+        summary = Text.assemble(
+            ('resident memory: ', 'bold'),
+            f'{resident_memory() / (1024 * 1024):.1f} MiB    ',
+            ('metadata cache hit rate: ', 'bold'),
+            f'{hit_rate * 100:.1f}%    ' if hit_rate is not None else '-    ',
+            ('uptime: ', 'bold'),
+            f'{int(now - METRICS.started)} s',
+        )
+
+        self.content.update(Group(summary, Text(), table))
+
+    def focus(self, scroll_visible: bool = True) -> Self:  # noqa: FBT002
+        """Focus on the scrollable content.
+
+        :param scroll_visible: Whether to make the scroll visible when focusing.
+        """
+        self.scroll.focus(scroll_visible)
+        return self
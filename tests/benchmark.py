@@ -0,0 +1,299 @@
+"""Microbenchmarks of the tracklist, playlist and directory scanning hot paths.
+
+The suite generates a synthetic library of tiny WAV files and playlists of increasing sizes, drives the application
+headless (without terminal nor audio device) and reports the timings as JSON, so they can be compared between runs:
+
+    $ python tests/benchmark.py --sizes 1000,10000 --output before.json
+    $ python tests/benchmark.py --sizes 1000,10000 --output after.json --compare before.json
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import click
+from assertpy import assert_that
+from rich.console import Console
+from rich.table import Table
+
+from library import generate_playlist, generate_songs
+
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings of a benchmark, in seconds."""
+
+    name: str
+    size: int
+    repeat: int
+    minimum: float
+    median: float
+    mean: float
+
+
+class BenchmarkSuite:
+    """Benchmark suite of the application hot paths."""
+
+    def __init__(self, workspace: Path, songs: int, repeat: int) -> None:
+        """Initializes the BenchmarkSuite object.
+
+        :param workspace: The directory where the synthetic library is generated.
+        :param songs: The number of songs of the synthetic library.
+        :param repeat: The number of times each benchmark is repeated.
+        """
+        self.workspace = workspace
+        self.repeat = repeat
+        self.results: list[BenchmarkResult] = []
+
+        self.library = workspace.joinpath('library')
+        self.songs = generate_songs(self.library, songs)
+
+        self.playlists = workspace.joinpath('playlists')
+        self.playlists.mkdir(parents=True, exist_ok=True)
+
+    async def measure(
+        self,
+        name: str,
+        size: int,
+        function: Callable[[], Any],
+        setup: Callable[[], Any] | None = None,
+    ) -> None:
+        """Measures the execution time of a function.
+
+        :param name: The name of the benchmark.
+        :param size: The size of the data processed by the function.
+        :param function: The function (or coroutine function) to measure.
+        :param setup: An optional function called before each repetition, it is not measured.
+        """
+        timings = []
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+
+            start = time.perf_counter()
+            result = function()
+            if inspect.isawaitable(result):
+                await result
+            timings.append(time.perf_counter() - start)
+
+        self.results.append(
+            BenchmarkResult(name, size, self.repeat, min(timings), statistics.median(timings), statistics.mean(timings))
+        )
+
+    async def run(self, sizes: tuple[int, ...]) -> list[BenchmarkResult]:
+        """Runs all the benchmarks.
+
+        :param sizes: The sizes of the playlists.
+
+        :returns: The results of the benchmarks.
+        """
+        from cplayer.__main__ import Application  # noqa: PLC0415
+        from cplayer.src.components.options_list import Option  # noqa: PLC0415
+        from cplayer.src.elements.config import Config  # noqa: PLC0415
+        from cplayer.src.elements.playlist import PlayList  # noqa: PLC0415
+        from pygame import mixer  # noqa: PLC0415
+
+        mixer.init()
+
+        default_config = Path(inspect.getfile(Application)).parent.joinpath('resources/config/default.yaml')
+        config_path = self.workspace.joinpath('config.yaml')
+        await self.measure('config.load', 1, lambda: Config(config_path, default_data=default_config))
+
+        app = Application(self.library)
+        async with app.run_test(headless=True, size=(120, 40)) as pilot:
+            await pilot.pause()
+
+            home = app.home_page
+            tracklist = home.tracklist_widget
+
+            await self.measure('home.load_directory', len(self.songs), lambda: home._load_directory(self.library))  # noqa: SLF001
+
+            home.selected_playlist = PlayList(self.playlists.joinpath('synchronize.playlist'))
+            await self.measure(
+                'home.synchronize_directory',
+                len(self.songs),
+                lambda: home._synchronize_directory(self.library),  # noqa: SLF001
+                setup=lambda: tracklist.set_songs(self.songs[: len(self.songs) // 2]),
+            )
+
+            for size in sizes:
+                playlist_path = generate_playlist(self.playlists.joinpath(f'{size}.playlist'), self.songs, size)
+
+                await self.measure('playlist.load', size, lambda path=playlist_path: PlayList(path))
+
+                playlist = PlayList(playlist_path)
+                await self.measure('playlist.save', size, playlist.save)
+
+                await self.measure('tracklist.set_songs', size, lambda songs=playlist.songs: tracklist.set_songs(songs))
+                await self.measure('tracklist.draw', size, tracklist.draw)
+                while tracklist.table is None:
+                    await pilot.pause()
+                await self.measure('tracklist.filter', size, lambda: tracklist.filter(self.songs[-1].name))
+                await self.measure('tracklist.filter.reset', size, lambda: tracklist.filter(''))
+                await self.measure('tracklist.search', size, lambda: tracklist.search(self.songs[-1].name))
+                await self.measure('tracklist.select', size, lambda: tracklist.select(self.library.joinpath('missing')))
+                await self.measure(
+                    'tracklist.swap',
+                    size,
+                    lambda: tracklist.swap(1),
+                    setup=lambda: setattr(tracklist, 'index', 0),
+                )
+                await self.measure('tracklist.move', size, lambda size=size: tracklist.move([size - 1], 0))
+                await self.measure(
+                    'tracklist.move.block',
+                    size,
+                    lambda size=size: tracklist.move(list(range(size // 2, min(size // 2 + 100, size))), 0),
+                )
+                await self.measure('tracklist.remove', size, lambda size=size: tracklist.remove([size // 2]))
+                await self.measure(
+                    'tracklist.insert', size, lambda size=size: tracklist.insert(size // 2, self.songs[:10])
+                )
+                await self.measure(
+                    'tracklist.replace',
+                    size,
+                    lambda size=size: tracklist.replace(size // 2, size // 2 + 10, self.songs[10:20]),
+                )
+                await self.measure('tracklist.reorder', size, tracklist.reorder)
+
+            options_list = home.select_order_widget.list_view
+            options = [Option(song, '', lambda path: f'{path.stem} [dim]({path.suffix})[/dim]') for song in self.songs]
+            await self.measure('options.update', len(options), lambda: options_list.update(options))
+            await self.measure('options.cursor', len(options), options_list.action_cursor_down)
+            await self.measure(
+                'options.filter',
+                len(options),
+                lambda: options_list.filter(self.songs[-1].stem[:3]),
+                setup=lambda: options_list.filter(None),
+            )
+
+        return self.results
+
+
+def _prepare_environment(workspace: Path) -> None:
+    """Isolates the application from the user configuration and the audio device.
+
+    It must be called before importing the application modules.
+
+    :param workspace: The directory used as home directory.
+    """
+    os.environ['HOME'] = str(workspace)
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'
+
+
+def _report(results: list[BenchmarkResult]) -> dict[str, Any]:
+    """Builds the machine-readable report of the results.
+
+    :param results: The results of the benchmarks.
+
+    :returns: The report data.
+    """
+    from cplayer import __version__  # noqa: PLC0415
+
+    return {
+        'metadata': {
+            'version': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+        },
+        'results': [asdict(result) for result in results],
+    }
+
+
+def _compare(report: dict[str, Any], previous: dict[str, Any]) -> None:
+    """Prints the comparison between the results of two runs.
+
+    :param report: The report of the current run.
+    :param previous: The report of the previous run.
+    """
+    previous_results = {(result['name'], result['size']): result for result in previous['results']}
+
+    table = Table('benchmark', 'size', 'previous (ms)', 'current (ms)', 'ratio')
+    for result in report['results']:
+        previous_result = previous_results.get((result['name'], result['size']))
+        if previous_result:
+            ratio = result['median'] / previous_result['median'] if previous_result['median'] else float('inf')
+            table.add_row(
+                result['name'],
+                str(result['size']),
+                f'{previous_result["median"] * 1000:.3f}',
+                f'{result["median"] * 1000:.3f}',
+                f'[{"red" if ratio > 1.1 else "green"}]{ratio:.2f}x',  # noqa: PLR2004
+            )
+
+    Console(stderr=True).print(table)
+
+
+def test_benchmark_suite(tmp_path: Path) -> None:
+    """Test that the benchmark suite runs headless and reports all the benchmarks, in an isolated process."""
+    output = tmp_path.joinpath('report.json')
+    result = subprocess.run(
+        [sys.executable, __file__, '--sizes', '100', '--songs', '10', '--repeat', '1', '--output', str(output)],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    assert_that(result.returncode).described_as(result.stderr).is_equal_to(0)
+    report = json.loads(output.read_text(encoding='UTF-8'))
+    assert_that([result['name'] for result in report['results']]).contains(
+        'config.load',
+        'home.load_directory',
+        'home.synchronize_directory',
+        'playlist.load',
+        'playlist.save',
+        'tracklist.set_songs',
+        'tracklist.draw',
+        'tracklist.filter',
+        'tracklist.search',
+        'tracklist.select',
+        'tracklist.swap',
+    )
+
+
+@click.command()
+@click.option(
+    '--sizes',
+    default=','.join(str(size) for size in DEFAULT_SIZES),
+    show_default=True,
+    help='Comma separated sizes of the benchmarked playlists.',
+)
+@click.option('--songs', default=200, show_default=True, help='Number of WAV files of the synthetic library.')
+@click.option('--repeat', default=5, show_default=True, help='Number of repetitions of each benchmark.')
+@click.option('--output', type=click.Path(path_type=Path), help='Path of the JSON report (stdout by default).')
+@click.option('--compare', type=click.Path(exists=True, path_type=Path), help='JSON report of a previous run.')
+def main(sizes: str, songs: int, repeat: int, output: Path | None, compare: Path | None) -> None:
+    """Runs the benchmark suite."""
+    with tempfile.TemporaryDirectory(prefix='cplayer-benchmark-') as temporary_directory:
+        workspace = Path(temporary_directory)
+        _prepare_environment(workspace)
+
+        suite = BenchmarkSuite(workspace, songs=songs, repeat=repeat)
+        report = _report(asyncio.run(suite.run(tuple(int(size) for size in sizes.split(',')))))
+
+    if output:
+        output.write_text(json.dumps(report, indent=2), encoding='UTF-8')
+    else:
+        sys.stdout.write(f'{json.dumps(report, indent=2)}\n')
+
+    if compare:
+        _compare(report, json.loads(compare.read_text(encoding='UTF-8')))
+
+
+if __name__ == '__main__':
+    main()  # pylint: disable=no-value-for-parameter
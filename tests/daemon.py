@@ -0,0 +1,230 @@
+"""Tests for the protocol of the playback daemon."""
+
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future
+from pathlib import Path
+
+import pygame
+import pytest
+from assertpy import assert_that
+from cplayer.src.elements.daemon import DaemonClient, DaemonError, PlaybackDaemon, RemotePlayer
+from cplayer.src.elements.dsp import BlockStats
+
+from library import generate_songs
+
+
+class FakePlayer:
+    """Player that pretends to play the songs, and fails to load the broken ones."""
+
+    def __init__(self) -> None:
+        """Initializes the FakePlayer object."""
+        self.path: Path | None = None
+        self.paused = False
+        self.busy = False
+        self.volume = 1.0
+        self.position = 0.0
+        self.track_format: tuple[int, int] | None = None
+        self.output_format: tuple[int, int] | None = (44100, 2)
+        self.equalizer_enabled = False
+        self.equalizer: tuple[list[float], float] = ([], 0.0)
+        self.dsp_stats = BlockStats()
+        self.broken: set[Path] = set()
+        self.closed = False
+
+    def prepare(self, path: Path) -> Future[Path]:
+        """The songs are always ready to be played."""
+        future = Future[Path]()
+        future.set_result(path)
+        return future
+
+    def load(self, path: Path) -> None:
+        """Loads a song, unless it is broken."""
+        if path in self.broken:
+            message = f'unable to load "{path}"'
+            raise pygame.error(message)
+        self.path = path
+
+    def play(self, start: float = 0.0) -> None:
+        """Pretends to play the loaded song."""
+        self.busy, self.paused, self.position = True, False, start
+
+    def pause(self) -> None:
+        """Pauses the playback."""
+        self.paused = True
+
+    def unpause(self) -> None:
+        """Resumes the playback."""
+        self.paused = False
+
+    def stop(self) -> None:
+        """Stops the playback."""
+        self.busy = self.paused = False
+
+    def seek(self, position: float) -> None:
+        """Moves the playback position."""
+        self.position = position
+
+    def fade_out(self) -> bool:
+        """The fake player never crossfades."""
+        return False
+
+    def set_equalizer(self, enabled: bool, gains: list[float], preamp: float) -> None:
+        """Changes the equalizer settings."""
+        self.equalizer_enabled = enabled
+        self.equalizer = (gains, preamp)
+
+    def prefetch(self, paths: Iterable[Path]) -> None:
+        """Ignores the upcoming songs."""
+
+    def close(self) -> None:
+        """Releases the player."""
+        self.closed = True
+
+
+@pytest.fixture
+def daemon(tmp_path: Path) -> Iterator[tuple[PlaybackDaemon, DaemonClient]]:
+    """Serves a daemon with a fake player in a thread, and connects a client to it."""
+    daemon = PlaybackDaemon(tmp_path.joinpath('daemon.sock'), FakePlayer())  # type: ignore[arg-type]
+    daemon.POLLING_INTERVAL = 0.05
+    thread = threading.Thread(target=daemon.serve, daemon=True)
+    thread.start()
+
+    client = DaemonClient(daemon.socket_path)
+    deadline = time.monotonic() + 5
+    while not client.is_running() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    yield daemon, client
+
+    client.close()
+    if daemon._server is not None:  # noqa: SLF001
+        daemon._server.shutdown()  # noqa: SLF001
+    thread.join(5)
+
+
+def test_play_queue(daemon: tuple[PlaybackDaemon, DaemonClient], tmp_path: Path) -> None:
+    """Test loading a directory, playing, seeking and moving through its songs, then changing the equalizer."""
+    playback_daemon, client = daemon
+    songs = generate_songs(tmp_path.joinpath('library'), 3)
+
+    assert_that(client.request('load_directory', path=str(songs[0].parent))).is_equal_to({'total': 3})
+
+    status = client.request('play', index=1)
+    assert_that(status).contains_entry({'path': str(songs[1])}, {'index': 1}, {'total': 3}, {'busy': True})
+    assert_that(status['seconds']).is_close_to(0.1, 0.001)
+
+    assert_that(client.request('seek', position=0.05)['position']).is_equal_to(0.05)
+    assert_that(client.request('pause')['paused']).is_true()
+    assert_that(client.request('next')).contains_entry({'path': str(songs[2])}, {'index': 2}, {'paused': False})
+    assert_that(client.request('queue')).is_equal_to({'paths': [str(song) for song in songs], 'index': 2})
+
+    assert_that(client.request('equalizer', enabled=True, gains=[3] * 10, preamp=-3)['equalizer']).is_true()
+    assert_that(playback_daemon.player.equalizer).is_equal_to(([3.0] * 10, -3.0))  # type: ignore[attr-defined]
+
+
+def test_error_replies(daemon: tuple[PlaybackDaemon, DaemonClient], tmp_path: Path) -> None:
+    """Test that the invalid requests are answered with an error, and that the connection remains usable."""
+    _, client = daemon
+    generate_songs(tmp_path.joinpath('library'), 2)
+    client.request('load_directory', path=str(tmp_path.joinpath('library')))
+
+    for command, arguments, error in (
+        ('rewind', {}, 'unknown command: rewind'),
+        ('play', {'index': -1}, 'there is no song at index -1'),
+        ('play', {'index': 2}, 'there is no song at index 2'),
+        ('volume', {'level': 1}, 'unexpected keyword argument'),
+        ('load_playlist', {'path': str(tmp_path.joinpath('missing.playlist'))}, 'not found'),
+    ):
+        with pytest.raises(DaemonError, match=error):
+            client.request(command, **arguments)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(str(tmp_path.joinpath('daemon.sock')))
+        reader = connection.makefile('rb')
+        connection.sendall(b'{"command": \n[1, 2]\n')
+        assert_that(reader.readline().decode()).contains('"ok": false', 'invalid request: ')
+        assert_that(reader.readline().decode()).contains('"ok": false', 'invalid request"')
+        reader.close()
+
+    assert_that(client.request('status')['total']).is_equal_to(2)
+
+
+def test_skip_broken_song(daemon: tuple[PlaybackDaemon, DaemonClient], tmp_path: Path) -> None:
+    """Test that a song failing to load is reported, then skipped by the daemon which keeps playing the queue."""
+    playback_daemon, client = daemon
+    songs = generate_songs(tmp_path.joinpath('library'), 2)
+    playback_daemon.player.broken.add(songs[0])  # type: ignore[attr-defined]
+    client.request('load_directory', path=str(songs[0].parent))
+
+    with pytest.raises(DaemonError, match='unable to load'):
+        client.request('play', index=0)
+
+    deadline = time.monotonic() + 5
+    while client.request('status')['index'] != 1 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert_that(client.request('status')).contains_entry({'path': str(songs[1])}, {'busy': True})
+
+
+def test_shutdown(daemon: tuple[PlaybackDaemon, DaemonClient]) -> None:
+    """Test that the daemon stops listening and closes the player once it is shut down."""
+    playback_daemon, client = daemon
+
+    assert_that(client.request('shutdown')).is_empty()
+
+    deadline = time.monotonic() + 5
+    while not playback_daemon.player.closed and time.monotonic() < deadline:  # type: ignore[attr-defined]
+        time.sleep(0.01)
+    assert_that(playback_daemon.socket_path.exists()).is_false()
+    assert_that(playback_daemon.player.closed).is_true()  # type: ignore[attr-defined]
+
+
+def test_remote_player_disconnect(tmp_path: Path) -> None:
+    """Test that an attached player reports a stopped playback, without raising, once the daemon is shut down."""
+    songs = generate_songs(tmp_path.joinpath('library'), 2)
+    socket_path = tmp_path.joinpath('daemon.sock')
+    process = subprocess.Popen([sys.executable, __file__, str(socket_path)], env={**os.environ, 'HOME': str(tmp_path)})
+    try:
+        client = DaemonClient(socket_path)
+        deadline = time.monotonic() + 30
+        while not client.is_running() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        player = RemotePlayer(DaemonClient(socket_path))
+        disconnections: list[bool] = []
+        player.on_disconnect = lambda: disconnections.append(True)
+
+        player.load(songs[0])
+        player.play()
+        assert_that(player.path).is_equal_to(songs[0])
+        assert_that(player.busy).is_true()
+        with pytest.raises(DaemonError, match='could not convert'):
+            player.seek('end')  # type: ignore[arg-type]
+        assert_that(player.connected).is_true()
+
+        client.request('shutdown')
+        process.wait(30)
+        time.sleep(RemotePlayer.STATUS_TTL)
+
+        assert_that(player.busy).is_false()
+        assert_that((player.path, player.position, player.paused)).is_equal_to((None, 0.0, False))
+        assert_that(player.connected).is_false()
+
+        player.load(songs[1])
+        player.play()
+        player.pause()
+        player.volume = 0.5
+        assert_that(player.remote_queue()).is_equal_to(([], None))
+        assert_that(disconnections).is_length(1)
+    finally:
+        process.kill()
+        process.wait()
+
+
+if __name__ == '__main__':
+    PlaybackDaemon(Path(sys.argv[1]), FakePlayer()).serve()  # type: ignore[arg-type]
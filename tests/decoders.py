@@ -0,0 +1,99 @@
+"""Tests for the pool of decoder workers."""
+
+import wave
+from concurrent.futures import CancelledError
+from pathlib import Path
+
+import numpy as np
+import pytest
+from assertpy import assert_that
+from cplayer.src.elements.decoder_pool import DecoderPool, PcmBlock
+
+
+MIXER_FORMAT = (8000, -16, 2)
+SHARED_MEMORY = Path('/dev/shm')  # noqa: S108
+
+
+def _ramp(path: Path, seconds: float, frame_rate: int = 8000) -> np.ndarray:
+    """Writes a stereo WAV file whose samples are distinct, so any offset of the decoded frames is noticed."""
+    frames = np.arange(int(seconds * frame_rate), dtype=np.int16)
+    samples = np.stack((frames, -frames), axis=1)
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(frame_rate)
+        wav_file.writeframes(samples.tobytes())
+    return samples
+
+
+def _shared_memory(block: PcmBlock) -> Path:
+    """Gets the path of the shared memory block of decoded samples."""
+    return SHARED_MEMORY.joinpath(block.memory.name.lstrip('/'))
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    """Test that the songs and their tails are decoded in shared memory blocks, which are freed by the parent."""
+    path = tmp_path.joinpath('song.wav')
+    samples = _ramp(path, 2.0)
+    pool = DecoderPool(1)
+    try:
+        info = pool.probe(path).result(timeout=30)
+        assert_that(info.seconds).is_close_to(2.0, 0.001)
+        assert_that((info.frame_rate, info.channels)).is_equal_to((8000, 2))
+
+        song = pool.submit('decode', str(path), MIXER_FORMAT).result(timeout=30)
+        tail = pool.submit('decode', str(path), MIXER_FORMAT, 0.5).result(timeout=30)
+
+        assert_that(np.array_equal(song.samples, samples)).is_true()
+        assert_that(np.array_equal(tail.samples, samples[-4000:])).is_true()
+        assert_that((song.seconds, tail.seconds, tail.frame_rate)).is_equal_to((2.0, 2.0, 8000))
+
+        for block in (song, tail):
+            assert_that(_shared_memory(block).exists()).is_false()
+            block.close()
+            assert_that(block.samples.shape).is_equal_to((0, 2))
+    finally:
+        pool.shutdown()
+
+
+def test_errors(tmp_path: Path) -> None:
+    """Test that the errors of the jobs are raised by their futures, and that the workers keep running."""
+    path = tmp_path.joinpath('song.wav')
+    _ramp(path, 0.1)
+    pool = DecoderPool(1)
+    try:
+        with pytest.raises(KeyError):
+            pool.submit('play', str(path)).result(timeout=30)
+        with pytest.raises(Exception, match=r'missing\.wav'):
+            pool.submit('decode', str(tmp_path.joinpath('missing.wav')), MIXER_FORMAT).result(timeout=30)
+
+        assert_that(pool.probe(path).result(timeout=30).seconds).is_close_to(0.1, 0.001)
+    finally:
+        pool.shutdown()
+
+    with pytest.raises(RuntimeError, match='shut down'):
+        pool.probe(path)
+
+
+def test_cancel(tmp_path: Path) -> None:
+    """Test that the cancelled jobs are skipped by the worker, without leaking their shared memory blocks."""
+    path = tmp_path.joinpath('song.wav')
+    _ramp(path, 2.0)
+    shared = set(SHARED_MEMORY.iterdir())
+    pool = DecoderPool(1)
+    try:
+        futures = [pool.submit('decode', str(path), MIXER_FORMAT) for _ in range(20)]
+        cancelled = [future for future in futures[1:] if future.cancel()]
+        blocks = [future.result(timeout=30) for future in futures if future not in cancelled]
+
+        assert_that(cancelled).is_not_empty()
+        for future in cancelled:
+            with pytest.raises(CancelledError):
+                future.result()
+        for block in blocks:
+            block.close()
+        assert_that(pool.probe(path).result(timeout=30).seconds).is_close_to(2.0, 0.001)
+    finally:
+        pool.shutdown()
+
+    assert_that(set(SHARED_MEMORY.iterdir()) - shared).is_empty()
@@ -0,0 +1,232 @@
+"""Tests for the audio formats registry."""
+
+import os
+import struct
+import wave
+from pathlib import Path
+
+import numpy as np
+from assertpy import assert_that
+from cplayer.src.elements.audio_buffer import AudioBuffer
+from cplayer.src.elements.formats import (
+    _ASF_AUDIO_MEDIA,
+    _ASF_FILE_PROPERTIES_OBJECT,
+    _ASF_HEADER_OBJECT,
+    _ASF_STREAM_PROPERTIES_OBJECT,
+    SUPPORTED_EXTENSIONS,
+    is_supported,
+    probe,
+)
+from cplayer.src.elements.playlist_formats import PlaylistEntry, read_playlist, write_playlist
+from cplayer.src.elements.session import SessionSnapshot
+
+
+def _ogg_page(granule: int, packet: bytes) -> bytes:
+    """Builds a minimal Ogg page containing a single packet."""
+    return b'OggS' + struct.pack('<BBqIIIB', 0, 0, granule, 1, 0, 0, 1) + bytes([len(packet)]) + packet
+
+
+def test_supported_extensions() -> None:
+    """Test that the registry accepts the supported extensions regardless of their case."""
+    assert_that(SUPPORTED_EXTENSIONS).contains('.mp3', '.wav', '.flac', '.ogg', '.opus')
+    assert_that(is_supported(Path('song.FLAC'))).is_true()
+    assert_that(is_supported(Path('song.txt'))).is_false()
+
+
+def test_probe_wav(tmp_path: Path) -> None:
+    """Test the duration probing of a WAV file."""
+    path = tmp_path.joinpath('song.wav')
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(8000)
+        wav_file.writeframes(b'\x00' * 8000 * 4 * 2)
+
+    info = probe(path)
+
+    assert_that(info).is_not_none()
+    assert_that(info.seconds).is_close_to(2.0, 0.001)
+    assert_that(info.frame_rate).is_equal_to(8000)
+    assert_that(info.channels).is_equal_to(2)
+
+
+def test_probe_flac(tmp_path: Path) -> None:
+    """Test the duration probing of a FLAC file from its STREAMINFO block."""
+    packed = (96000 << 44) | (1 << 41) | (23 << 36) | (96000 * 3)
+    streaminfo = b'\x00' * 10 + packed.to_bytes(8, 'big') + b'\x00' * 16
+    path = tmp_path.joinpath('song.flac')
+    path.write_bytes(b'fLaC' + b'\x80' + len(streaminfo).to_bytes(3, 'big') + streaminfo)
+
+    info = probe(path)
+
+    assert_that(info).is_not_none()
+    assert_that(info.seconds).is_close_to(3.0, 0.001)
+    assert_that(info.frame_rate).is_equal_to(96000)
+    assert_that(info.channels).is_equal_to(2)
+
+
+def test_probe_ogg_vorbis(tmp_path: Path) -> None:
+    """Test the duration probing of an Ogg Vorbis file from its last granule position."""
+    identification = b'\x01vorbis' + struct.pack('<IBI', 0, 2, 44100) + b'\x00' * 12
+    path = tmp_path.joinpath('song.ogg')
+    path.write_bytes(_ogg_page(0, identification) + _ogg_page(44100 * 5, b'\x00' * 8))
+
+    info = probe(path)
+
+    assert_that(info).is_not_none()
+    assert_that(info.seconds).is_close_to(5.0, 0.001)
+    assert_that(info.frame_rate).is_equal_to(44100)
+
+
+def test_probe_opus(tmp_path: Path) -> None:
+    """Test the duration probing of an Opus file, discarding the pre-skip samples."""
+    identification = b'OpusHead' + struct.pack('<BBHIhB', 1, 2, 312, 44100, 0, 0)
+    path = tmp_path.joinpath('song.opus')
+    path.write_bytes(_ogg_page(0, identification) + _ogg_page(48000 * 4 + 312, b'\x00' * 8))
+
+    info = probe(path)
+
+    assert_that(info).is_not_none()
+    assert_that(info.seconds).is_close_to(4.0, 0.001)
+    assert_that(info.frame_rate).is_equal_to(48000)
+
+
+def test_probe_mp3_cbr(tmp_path: Path) -> None:
+    """Test the duration estimation of a constant bitrate MP3 file."""
+    frame = b'\xff\xfb\x90\x00' + b'\x00' * 413
+    path = tmp_path.joinpath('song.mp3')
+    path.write_bytes(frame * 100)
+
+    info = probe(path)
+
+    assert_that(info).is_not_none()
+    assert_that(info.seconds).is_close_to(len(frame) * 100 * 8 / 128000, 0.001)
+    assert_that(info.frame_rate).is_equal_to(44100)
+
+
+def _asf_header(header_size: int | None = None) -> bytes:
+    """Builds the header object of a WMA file, 3 seconds long at 44100 Hz, with a file and an audio stream object."""
+    file_properties = struct.pack('<QQQ', 30_000_000 + 2_000 * 10_000, 0, 2_000) + b'\x00' * 16
+    file_properties = b'\x00' * 40 + file_properties
+    stream_properties = _ASF_AUDIO_MEDIA + b'\x00' * 38 + struct.pack('<HHI', 0x161, 2, 44100) + b'\x00' * 10
+    objects = b''.join(
+        guid + struct.pack('<Q', len(body) + 24) + body
+        for guid, body in (
+            (_ASF_FILE_PROPERTIES_OBJECT, file_properties),
+            (_ASF_STREAM_PROPERTIES_OBJECT, stream_properties),
+        )
+    )
+    size = len(objects) + 30 if header_size is None else header_size
+    return _ASF_HEADER_OBJECT + struct.pack('<QIH', size, 2, 0) + objects
+
+
+def test_probe_asf(tmp_path: Path) -> None:
+    """Test the duration probing of a WMA file from its header objects, the preroll being excluded."""
+    path = tmp_path.joinpath('song.wma')
+    path.write_bytes(_asf_header() + b'\x00' * 1024)
+
+    info = probe(path)
+
+    assert_that(info).is_not_none()
+    assert_that(info.seconds).is_close_to(3.0, 0.001)
+    assert_that(info.frame_rate).is_equal_to(44100)
+    assert_that(info.channels).is_equal_to(2)
+
+
+def test_probe_asf_invalid_header_size(tmp_path: Path) -> None:
+    """Test that a WMA file whose header size is smaller than the header object or larger than the file is rejected."""
+    path = tmp_path.joinpath('song.wma')
+    for header_size in (0, 29, 2**63):
+        path.write_bytes(_asf_header(header_size) + b'\x00' * 1024)
+
+        assert_that(probe(path)).described_as(str(header_size)).is_none()
+
+
+def test_probe_invalid_file(tmp_path: Path) -> None:
+    """Test that probing a file with invalid headers returns None."""
+    path = tmp_path.joinpath('song.flac')
+    path.write_bytes(b'not a flac file')
+
+    assert_that(probe(path)).is_none()
+
+
+def test_wav_buffer(tmp_path: Path) -> None:
+    """Test that the samples of a WAV file are memory-mapped as frames by channels."""
+    samples = np.arange(-500, 500, dtype=np.int16).reshape(-1, 2)
+    path = tmp_path.joinpath('song.wav')
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(8000)
+        wav_file.writeframes(samples.tobytes())
+
+    buffer = AudioBuffer.from_wav(path)
+
+    assert_that(buffer.samples).is_instance_of(np.memmap)
+    assert_that(buffer.samples.tolist()).is_equal_to(samples.tolist())
+    assert_that(buffer.seconds).is_close_to(500 / 8000, 0.001)
+    assert_that(float(buffer.to_float().min())).is_close_to(-500 / 32768, 0.0001)
+
+
+def test_playlist_exchange(tmp_path: Path) -> None:
+    """Test the reading of M3U and PLS playlists, and their round trip."""
+    tmp_path.joinpath('list.m3u8').write_text(
+        '#EXTM3U\n#EXTINF:-1 tvg-name="a, b",First\nmusic/a.mp3\nhttp://radio/stream\n'
+        '#EXTINF:12.5,Second\nfile:///songs/b%20c.flac\n\n/songs/../songs/d.ogg\n',
+        encoding='UTF-8',
+    )
+    entries = list(read_playlist(tmp_path.joinpath('list.m3u8')))
+
+    assert_that([entry.path for entry in entries]).is_equal_to(
+        [tmp_path.joinpath('music/a.mp3'), Path('/songs/b c.flac'), Path('/songs/d.ogg')]
+    )
+    assert_that([entry.seconds for entry in entries]).is_equal_to([None, 12.5, None])
+    assert_that(entries[0].title).is_equal_to('First')
+
+    for suffix in ('.m3u', '.pls'):
+        path = tmp_path.joinpath(f'copy{suffix}')
+        assert_that(write_playlist(path, [*entries, PlaylistEntry(Path('/songs/e.wav'), 61.0)])).is_equal_to(4)
+        copies = list(read_playlist(path))
+        assert_that([entry.path for entry in copies]).is_equal_to(
+            [*(entry.path for entry in entries), Path('/songs/e.wav')]
+        )
+        assert_that([entry.seconds for entry in copies]).is_equal_to([None, 12.0, None, 61.0])
+
+
+def test_session_snapshot(tmp_path: Path) -> None:
+    """Test the round trip of a session snapshot, and its invalidation by a modification of its source."""
+    source = tmp_path.joinpath('songs.playlist')
+    source.write_text('{}', encoding='UTF-8')
+    locations = ['/songs/a.mp3', '/songs/b\udcff.flac', '/songs/c.ogg']
+
+    snapshot = SessionSnapshot(
+        source=source,
+        playlist=True,
+        source_mtime=source.stat().st_mtime_ns,
+        songs=SessionSnapshot.encode_songs(locations),
+        index=1,
+        current=2,
+        position=42.5,
+        query='ext:flac',
+        view=np.array([2, 1], dtype=np.int32),
+        rows_missing=np.array([0, 2], dtype=np.uint8),
+        rows_seconds=np.array([12.5, np.nan], dtype=np.float32),
+    )
+    data = snapshot.save(tmp_path.joinpath('session.snapshot'))
+    copy = SessionSnapshot.load(tmp_path.joinpath('session.snapshot'))
+
+    assert_that(copy).is_not_none()
+    assert_that(copy.locations()).is_equal_to(locations)
+    assert_that((copy.source, copy.playlist, copy.index, copy.current, copy.position, copy.query)).is_equal_to(
+        (source, True, 1, 2, 42.5, 'ext:flac')
+    )
+    assert_that(copy.view.tolist()).is_equal_to([2, 1])
+    assert_that(copy.rows_missing.tolist()).is_equal_to([0, 2])
+    assert_that(copy.rows_seconds[0]).is_equal_to(12.5)
+    assert_that(copy.valid).is_true()
+
+    tmp_path.joinpath('session.snapshot').write_bytes(data[:-1])
+    assert_that(SessionSnapshot.load(tmp_path.joinpath('session.snapshot'))).is_none()
+
+    os.utime(source, ns=(snapshot.source_mtime, snapshot.source_mtime + 1))
+    assert_that(copy.valid).is_false()
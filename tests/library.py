@@ -0,0 +1,55 @@
+"""Synthetic music library generator used by the benchmark suite."""
+
+import json
+import wave
+from itertools import cycle, islice
+from pathlib import Path
+
+
+def generate_songs(directory: Path, count: int, seconds: float = 0.1, frame_rate: int = 8000) -> list[Path]:
+    """Writes tiny silent WAV files into a directory.
+
+    :param directory: The directory where the songs are written.
+    :param count: The number of songs.
+    :param seconds: The duration of each song.
+    :param frame_rate: The sample rate of each song.
+
+    :returns: The paths of the generated songs, sorted by name.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+
+    frames = b'\x00\x00' * int(seconds * frame_rate)
+    paths = []
+    for index in range(count):
+        path = directory.joinpath(f'song_{index:07}.wav')
+        with wave.open(str(path), 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(frame_rate)
+            wav_file.writeframes(frames)
+        paths.append(path)
+    return paths
+
+
+def generate_playlist(path: Path, songs: list[Path], size: int) -> Path:
+    """Writes a playlist file with a number of entries, cycling over the given songs.
+
+    :param path: The path of the playlist file.
+    :param songs: The songs referenced by the playlist.
+    :param size: The number of entries of the playlist.
+
+    :returns: The path of the playlist file.
+    """
+    path.write_text(
+        json.dumps(
+            {
+                'name': path.stem,
+                'path': str(path),
+                'selected': None,
+                'songs': [str(song) for song in islice(cycle(songs), size)],
+                'deleted_songs': [],
+            },
+        ),
+        encoding='UTF-8',
+    )
+    return path
@@ -0,0 +1,398 @@
+"""Memory regression suite of the long-running scenarios of the application.
+
+The suite generates a synthetic library of tiny WAV files and drives the application headless (without terminal nor
+audio device, the songs are "played" by a stub player) through the scenarios of a long-running session: loading a
+directory, filtering, playing, switching playlists and synchronizing a directory. Each scenario is run once to warm up
+the caches, then repeated while `tracemalloc` measures the peak of the Python allocations and the memory retained once
+the scenario finished (after a garbage collection): the structures replaced by each run were allocated while tracing,
+so only the growth is retained. The growth of the resident set size is measured too.
+
+A scenario fails when it exceeds its budgets, the code locations whose retained memory grew the most are then reported:
+
+    $ python tests/memory.py --songs 5000 --repeat 10
+"""
+
+import asyncio
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable, Iterable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import click
+from assertpy import assert_that
+from rich.console import Console
+from rich.table import Table
+
+from library import generate_playlist, generate_songs
+
+
+TRACEBACK_FRAMES = 5
+TOP_GROWTH_SITES = 10
+PLAYED_SONGS = 20
+KIB = 1024
+MIB = 1024 * KIB
+
+
+@dataclass
+class MemoryBudget:
+    """Memory budgets of a scenario, in bytes.
+
+    The peak and the resident set size budgets have a part per song of the library, the retained memory budget does
+    not: once the scenario is warmed up, running it again must not grow the memory with the size of the library.
+    """
+
+    peak: int
+    retained: int
+    rss: int
+    peak_per_song: int = 0
+    rss_per_song: int = 0
+
+    def limits(self, songs: int) -> tuple[int, int, int]:
+        """Computes the budgets for a library size.
+
+        :param songs: The number of songs of the library.
+
+        :returns: The peak, the retained memory and the resident set size growth budgets.
+        """
+        return self.peak + self.peak_per_song * songs, self.retained, self.rss + self.rss_per_song * songs
+
+
+@dataclass
+class MemoryResult:
+    """Memory usage of a scenario, in bytes."""
+
+    name: str
+    songs: int
+    repeat: int
+    peak: int
+    retained: int
+    rss: int
+    budget: MemoryBudget
+    growth: list[str] = field(default_factory=list)
+
+    @property
+    def exceeded(self) -> list[str]:
+        """Gets the budgets exceeded by the scenario."""
+        peak, retained, rss = self.budget.limits(self.songs)
+        return [
+            f'{name} {value / MIB:.2f} MiB > {limit / MIB:.2f} MiB'
+            for name, value, limit in (
+                ('peak', self.peak, peak),
+                ('retained', self.retained, retained),
+                ('rss', self.rss, rss),
+            )
+            if value > limit
+        ]
+
+    def describe(self) -> str:
+        """Describes the exceeded budgets and the top growth sites of the scenario.
+
+        :returns: The description.
+        """
+        return '\n'.join([f'{self.name}: {", ".join(self.exceeded)}', *(f'    {site}' for site in self.growth)])
+
+
+def _growth_sites(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> list[str]:
+    """Finds the code locations whose retained memory grew the most.
+
+    :param before: The snapshot taken before the scenario.
+    :param after: The snapshot taken after the scenario.
+
+    :returns: The descriptions of the top growth sites.
+    """
+    filters = (
+        tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__),
+        tracemalloc.Filter(inclusive=False, filename_pattern='<frozen importlib._bootstrap*>'),
+    )
+    statistics = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'traceback')
+    return [
+        f'{statistic.size_diff / KIB:+.1f} KiB ({statistic.count_diff:+} blocks) '
+        f'{" <- ".join(f"{frame.filename}:{frame.lineno}" for frame in reversed(statistic.traceback[-3:]))}'
+        for statistic in statistics[:TOP_GROWTH_SITES]
+        if statistic.size_diff > 0
+    ]
+
+
+class StubPlayer:
+    """Player that pretends to play the songs, without mixer nor audio device."""
+
+    autonomous = False
+
+    def __init__(self) -> None:
+        """Initializes the StubPlayer object."""
+        from cplayer.src.elements.dsp import BlockStats  # noqa: PLC0415
+
+        self.path: Path | None = None
+        self.paused = False
+        self.track_format: tuple[int, int] | None = (44100, 2)
+        self.output_format: tuple[int, int] | None = (44100, 2)
+        self.equalizer_enabled = False
+        self.dsp_stats = BlockStats()
+        self.volume = 1.0
+        self.played = 0
+
+        self._playing = False
+        self._start = 0.0
+
+    def prepare(self, path: Path) -> Future[Path]:
+        """The songs are always ready to be played."""
+        future = Future[Path]()
+        future.set_result(path)
+        return future
+
+    def load(self, path: Path) -> None:
+        """Loads a song."""
+        self.path = path
+
+    def play(self, start: float = 0.0) -> None:
+        """Pretends to play the loaded song."""
+        self._playing, self.paused = True, False
+        self._start = time.monotonic() - start
+        self.played += 1
+
+    def pause(self) -> None:
+        """Pauses the playback."""
+        self.paused = True
+
+    def unpause(self) -> None:
+        """Resumes the playback."""
+        self.paused = False
+
+    def stop(self) -> None:
+        """Stops the playback."""
+        self._playing = self.paused = False
+
+    def seek(self, position: float) -> None:
+        """Moves the playback position."""
+        self.play(position)
+
+    def fade_out(self) -> bool:
+        """The stub player never crossfades."""
+        return False
+
+    @property
+    def busy(self) -> bool:
+        """Indicates whether a song is being played."""
+        return self._playing and not self.paused
+
+    @property
+    def position(self) -> float:
+        """Gets the playback position, in seconds."""
+        return time.monotonic() - self._start if self._playing else 0.0
+
+    def set_equalizer(self, enabled: bool, gains: list[float], preamp: float) -> None:
+        """Ignores the equalizer settings."""
+
+    def set_queue(self, paths: Iterable[Path]) -> None:
+        """Ignores the queued songs."""
+
+    def remote_queue(self) -> tuple[list[Path], int | None]:
+        """The stub player does not keep a queue."""
+        return [], None
+
+    def prefetch(self, paths: Iterable[Path]) -> None:
+        """Ignores the upcoming songs."""
+
+    def close(self) -> None:
+        """Releases nothing."""
+
+
+class MemorySuite:
+    """Memory regression suite of the application scenarios."""
+
+    def __init__(self, workspace: Path, songs: int, repeat: int) -> None:
+        """Initializes the MemorySuite object.
+
+        :param workspace: The directory where the synthetic library is generated, also used as home directory.
+        :param songs: The number of songs of the synthetic library.
+        :param repeat: The number of times each scenario is repeated while it is measured.
+        """
+        self.workspace = workspace
+        self.repeat = repeat
+        self.results: list[MemoryResult] = []
+
+        self.library = workspace.joinpath('library')
+        self.songs = generate_songs(self.library, songs)
+
+    async def measure(self, name: str, scenario: Callable[[], Awaitable[None]], budget: MemoryBudget) -> None:
+        """Measures the memory used by a scenario.
+
+        :param name: The name of the scenario.
+        :param scenario: The coroutine function that runs the scenario once.
+        :param budget: The memory budgets of the scenario.
+        """
+        from cplayer.src.elements.instrumentation import resident_memory  # noqa: PLC0415
+
+        tracemalloc.start(TRACEBACK_FRAMES)
+        try:
+            await scenario()
+            gc.collect()
+
+            rss = resident_memory()
+            baseline, _ = tracemalloc.get_traced_memory()
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+
+            for _ in range(self.repeat):
+                await scenario()
+
+            _, peak = tracemalloc.get_traced_memory()
+            gc.collect()
+            current, _ = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+
+        result = MemoryResult(
+            name,
+            len(self.songs),
+            self.repeat,
+            peak - baseline,
+            current - baseline,
+            max(resident_memory() - rss, 0),
+            budget,
+        )
+        if result.exceeded:
+            result.growth = _growth_sites(before, after)
+        self.results.append(result)
+
+    async def run(self) -> list[MemoryResult]:
+        """Runs all the scenarios.
+
+        :returns: The results of the scenarios.
+        """
+        from cplayer.__main__ import Application  # noqa: PLC0415
+        from cplayer.src.elements import CONFIG  # noqa: PLC0415
+        from cplayer.src.elements.playlist import PlayList  # noqa: PLC0415
+
+        CONFIG.data.general.session.enabled = False
+
+        player = StubPlayer()
+        app = Application(self.library, player=player)  # type: ignore[arg-type]
+        async with app.run_test(headless=True, size=(120, 40)) as pilot:
+            await pilot.pause()
+
+            home = app.home_page
+            tracklist = home.tracklist_widget
+
+            playlists = [
+                generate_playlist(
+                    home.playlists_directory.joinpath(f'memory_{index}.playlist'), self.songs[index::2], len(self.songs)
+                )
+                for index in range(2)
+            ]
+
+            async def load_directory() -> None:
+                home._load_directory(self.library)  # noqa: SLF001
+                await pilot.pause()
+
+            async def filter_songs() -> None:
+                for query in ('song_0', 'song_00', 'dur<1', ''):
+                    tracklist.filter(query)
+                    await pilot.pause()
+
+            async def play_songs() -> None:
+                tracklist.index = 0
+                for _ in range(min(len(self.songs), PLAYED_SONGS)):
+                    tracklist.next_song()
+                    await pilot.pause()
+
+            async def switch_playlists() -> None:
+                for path in playlists:
+                    home.action_load_playlist()
+                    await pilot.pause()
+                    home.select_playlist(path)
+                    await pilot.pause()
+
+            async def synchronize_directory() -> None:
+                home.selected_playlist = PlayList(playlists[0])
+                home.load_playlist()
+                home._synchronize_directory(self.library)  # noqa: SLF001
+                await pilot.pause()
+
+            await self.measure(
+                'load_directory', load_directory, MemoryBudget(2 * MIB, 512 * KIB, 16 * MIB, 2 * KIB, 8 * KIB)
+            )
+            await self.measure('filter', filter_songs, MemoryBudget(2 * MIB, 512 * KIB, 16 * MIB, KIB, 4 * KIB))
+            await self.measure('play', play_songs, MemoryBudget(4 * MIB, 512 * KIB, 16 * MIB))
+            await self.measure(
+                'switch_playlists', switch_playlists, MemoryBudget(4 * MIB, 512 * KIB, 16 * MIB, 3 * KIB, 8 * KIB)
+            )
+            await self.measure(
+                'synchronize', synchronize_directory, MemoryBudget(2 * MIB, 512 * KIB, 16 * MIB, 3 * KIB, 8 * KIB)
+            )
+
+            assert_that(player.played).is_greater_than(0)
+
+        return self.results
+
+
+def _prepare_environment(workspace: Path) -> None:
+    """Isolates the application from the user configuration and the audio device.
+
+    It must be called before importing the application modules.
+
+    :param workspace: The directory used as home directory.
+    """
+    os.environ['HOME'] = str(workspace)
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'
+
+
+def _print(results: list[MemoryResult]) -> None:
+    """Prints the memory usage of the scenarios.
+
+    :param results: The results of the scenarios.
+    """
+    table = Table('scenario', 'songs', 'peak (MiB)', 'retained (KiB)', 'rss (MiB)', 'budgets')
+    for result in results:
+        table.add_row(
+            result.name,
+            str(result.songs),
+            f'{result.peak / MIB:.2f}',
+            f'{result.retained / KIB:.1f}',
+            f'{result.rss / MIB:.2f}',
+            f'[red]{", ".join(result.exceeded)}' if result.exceeded else '[green]ok',
+        )
+
+    console = Console(stderr=True, width=120)
+    console.print(table)
+    for result in results:
+        if result.exceeded:
+            console.print(result.describe(), markup=False, highlight=False)
+
+
+def test_memory_budgets() -> None:
+    """Test that the long-running scenarios stay within their memory budgets, in an isolated process."""
+    result = subprocess.run(
+        [sys.executable, __file__, '--songs', '200', '--repeat', '2'], capture_output=True, text=True, check=False
+    )
+
+    assert_that(result.returncode).described_as(result.stderr).is_equal_to(0)
+    assert_that(result.stderr).contains('load_directory', 'filter', 'play', 'switch_playlists', 'synchronize')
+
+
+@click.command()
+@click.option('--songs', default=2000, show_default=True, help='Number of WAV files of the synthetic library.')
+@click.option('--repeat', default=5, show_default=True, help='Number of repetitions of each scenario.')
+def main(songs: int, repeat: int) -> None:
+    """Runs the memory regression suite."""
+    with tempfile.TemporaryDirectory(prefix='cplayer-memory-') as temporary_directory:
+        workspace = Path(temporary_directory)
+        _prepare_environment(workspace)
+
+        results = asyncio.run(MemorySuite(workspace, songs=songs, repeat=repeat).run())
+
+    _print(results)
+    sys.exit(1 if any(result.exceeded for result in results) else 0)
+
+
+if __name__ == '__main__':
+    main()  # pylint: disable=no-value-for-parameter
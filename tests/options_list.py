@@ -0,0 +1,112 @@
+"""Tests for the options list and its type-ahead filter."""
+
+import asyncio
+from pathlib import Path
+
+from assertpy import assert_that
+from cplayer.src.components.options_list import CustomListView, Option
+from cplayer.src.elements.label_index import LabelIndex
+from textual.app import App, ComposeResult
+
+
+PLAYLISTS = ['Rock classics', 'Hard rock', 'Jazz', 'Rockabilly', 'road trip']
+
+
+def test_label_index_search() -> None:
+    """Test that the labels starting with the query come first, then the labels containing it, in their order."""
+    index = LabelIndex(PLAYLISTS)
+
+    assert_that(index.prefixed('rock')).is_equal_to([0, 3])
+    assert_that(index.containing('rock')).is_equal_to([0, 1, 3])
+    assert_that(index.search('ROCK')).is_equal_to([0, 3, 1])
+    assert_that(index.search('ro')).is_equal_to([0, 3, 4, 1])
+    assert_that(index.search('zz')).is_equal_to([2])
+    assert_that(index.search('k c')).is_equal_to([0])
+    assert_that(index.search('pop')).is_empty()
+    assert_that(index.search('')).is_equal_to([0, 1, 2, 3, 4])
+
+
+def test_label_index_candidates() -> None:
+    """Test that a query extending the previous one only searches the labels that matched it."""
+    index = LabelIndex(PLAYLISTS)
+
+    assert_that(index.search('rock', [1, 3])).is_equal_to([3, 1])
+    assert_that(index.search('rock', [])).is_empty()
+    assert_that(index.search('a\0b')).is_empty()
+    assert_that(index.search('k\0h')).is_empty()
+
+
+def test_option_label() -> None:
+    """Test that the label of an option is its plain text without its prefix, unless it has its own label."""
+    option = Option(Path('/playlists/Rock.playlist'), '> ', lambda path: f'[bold]{path.stem}[/bold] [dim](3 songs)')
+    labelled = Option(
+        Path('/playlists/Rock.playlist'), '> ', lambda path: f'{path.stem} (3 songs)', lambda path: path.stem
+    )
+
+    assert_that(option.label).is_equal_to('Rock (3 songs)')
+    assert_that(labelled.label).is_equal_to('Rock')
+
+
+class _OptionsApp(App[None]):
+    """Application hosting only a list of playlist options, as the playlists selector displays them."""
+
+    def __init__(self) -> None:
+        """Initializes the _OptionsApp object."""
+        super().__init__()
+        self.selected: list[Path | str] = []
+        self.filters: list[tuple[str | None, int, int]] = []
+        self.list_view = CustomListView(
+            lambda: None, self.selected.append, on_filter=lambda *arguments: self.filters.append(arguments)
+        )
+
+    def compose(self) -> ComposeResult:
+        """Composes the application."""
+        yield self.list_view
+
+    def on_mount(self) -> None:
+        """Lists the playlists, with a summary and an icon as the playlists selector."""
+        self.list_view.update(
+            [
+                Option(
+                    Path(f'/playlists/{name}.playlist'),
+                    '♫ ',
+                    lambda path, index=index: f'{path.stem} [dim]({index + 10} songs · played 3 days ago)[/dim]',
+                    lambda path: path.stem,
+                )
+                for index, name in enumerate(PLAYLISTS)
+            ],
+        )
+        self.list_view.focus()
+
+
+def test_type_ahead() -> None:
+    """Test that the typed query filters the labels, without the icons and the summaries, and selects an option."""
+
+    async def run() -> None:
+        app = _OptionsApp()
+        async with app.run_test(headless=True, size=(80, 20)) as pilot:
+            list_view = app.list_view
+
+            await pilot.press('slash', 'r', 'o', 'c', 'k')
+            assert_that(list_view.query).is_equal_to('rock')
+            assert_that([list_view.options[position].data.stem for position in list_view.displayed]).is_equal_to(
+                ['Rock classics', 'Rockabilly', 'Hard rock']
+            )
+            assert_that(app.filters[-1]).is_equal_to(('rock', 3, 5))
+
+            await pilot.press('backspace', 'backspace', 'backspace')
+            assert_that(list_view.displayed).is_equal_to([0, 3, 4, 1])
+
+            for query in ('songs', 'played', '1', '♫'):
+                list_view.filter(query)
+                assert_that(list_view.displayed).described_as(query).is_empty()
+
+            list_view.filter('jaz')
+            await pilot.press('enter')
+            assert_that(app.selected).is_equal_to([Path('/playlists/Jazz.playlist')])
+
+            await pilot.press('escape')
+            assert_that(list_view.query).is_none()
+            assert_that(list_view.displayed).is_equal_to([0, 1, 2, 3, 4])
+
+    asyncio.run(run())
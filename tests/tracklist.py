@@ -0,0 +1,284 @@
+"""Tests for the tracklist and its metadata table."""
+
+import asyncio
+import math
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from assertpy import assert_that
+from cplayer.src.components.tracklist import ChangeKind, PlaylistOrder, Song, TracklistChange, TracklistWidget
+from cplayer.src.elements.track_table import TrackTable
+from textual.app import App, ComposeResult
+
+from library import generate_songs
+
+
+def _table() -> TrackTable:
+    """Builds a table of four songs, the last one with unknown file metadata."""
+    table = TrackTable(['/music/Live/Intro.FLAC', '/music/Studio/intro.mp3', '/music/Studio/Outro.ogg', '/music/x.wav'])
+    now = time.time()
+    table.update(0, 20 * 1024**2, now - 86400, 400)
+    table.update(1, 5 * 1024**2, now - 30 * 86400, 200)
+    table.update(2, 8 * 1024**2, now - 3600, 3 * 60 + 30)
+    table.update(3, math.nan, math.nan, None)
+    return table
+
+
+def _matches(table: TrackTable, query: str) -> list[int]:
+    """Gets the rows of the songs matching a query."""
+    return table.query(query).nonzero()[0].tolist()
+
+
+def test_query_comparisons() -> None:
+    """Test the duration, size and age comparisons, with their units."""
+    table = _table()
+
+    assert_that(_matches(table, 'dur>5m')).is_equal_to([0])
+    assert_that(_matches(table, 'dur<=3:30')).is_equal_to([1, 2])
+    assert_that(_matches(table, 'dur=200')).is_equal_to([1])
+    assert_that(_matches(table, 'size>10mb')).is_equal_to([0])
+    assert_that(_matches(table, 'size<6144kb')).is_equal_to([1])
+    assert_that(_matches(table, 'age<7d')).is_equal_to([0, 2])
+    assert_that(_matches(table, 'age>2w')).is_equal_to([1])
+
+
+def test_query_terms() -> None:
+    """Test the extension, directory and name terms, and their combination."""
+    table = _table()
+
+    assert_that(_matches(table, 'ext:flac')).is_equal_to([0])
+    assert_that(_matches(table, 'ext:mp3,ogg')).is_equal_to([1, 2])
+    assert_that(_matches(table, 'dir:studio')).is_equal_to([1, 2])
+    assert_that(_matches(table, 'intro')).is_equal_to([0, 1])
+    assert_that(_matches(table, 'intro dir:studio')).is_equal_to([1])
+    assert_that(_matches(table, '"o.o"')).is_equal_to([2])
+    assert_that(_matches(table, 'dur>abc')).is_empty()
+
+
+def test_query_case_insensitive() -> None:
+    """Test that the fields, the units and the values of the terms are case-insensitive."""
+    table = _table()
+
+    assert_that(_matches(table, 'ext:FLAC')).is_equal_to([0])
+    assert_that(_matches(table, 'dir:Live')).is_equal_to([0])
+    assert_that(_matches(table, 'INTRO')).is_equal_to([0, 1])
+    assert_that(_matches(table, 'DUR>5M')).is_equal_to([0])
+
+
+def test_query_negation() -> None:
+    """Test the negated terms, the songs with unknown values match neither a comparison nor its negation."""
+    table = _table()
+
+    assert_that(_matches(table, '-dur>5m')).is_equal_to([1, 2])
+    assert_that(_matches(table, '-size>10mb')).is_equal_to([1, 2])
+    assert_that(_matches(table, '-ext:flac')).is_equal_to([1, 2, 3])
+    assert_that(_matches(table, '-intro')).is_equal_to([2, 3])
+    assert_that(_matches(table, '-dir:studio -intro')).is_equal_to([3])
+
+
+def test_table_swap() -> None:
+    """Test that swapping two songs of different name lengths moves their names and their metadata."""
+    table = _table()
+    table.swap(3, 0)
+
+    assert_that(_matches(table, 'intro')).is_equal_to([1, 3])
+    assert_that(_matches(table, 'x.wav')).is_equal_to([0])
+    assert_that(_matches(table, 'ext:flac')).is_equal_to([3])
+    assert_that(_matches(table, 'dur>5m')).is_equal_to([3])
+    assert_that(_matches(table, 'dir:live')).is_equal_to([3])
+    assert_that(_matches(table, '"o.o"')).is_equal_to([2])
+    assert_that(table.take([3, 1, 2, 0]).names.tobytes()).is_equal_to(_table().names.tobytes())
+
+
+class _TracklistApp(App[None]):
+    """Application hosting only a tracklist, which records its changes."""
+
+    def __init__(self, paths: list[Path]) -> None:
+        """Initializes the _TracklistApp object.
+
+        :param paths: The songs of the tracklist.
+        """
+        super().__init__()
+        self.paths = paths
+        self.changes: list[TracklistChange] = []
+        self.tracklist = TracklistWidget(
+            on_select=lambda _: None,
+            on_cursor_left=lambda: None,
+            on_cursor_right=lambda: None,
+            on_change_position=lambda _, __: None,
+            on_change=self.changes.append,
+        )
+
+    def compose(self) -> ComposeResult:
+        """Composes the application."""
+        yield self.tracklist
+
+    def on_mount(self) -> None:
+        """Sets the songs of the tracklist."""
+        self.tracklist.set_songs(self.paths)
+
+
+def _songs(directory: Path, names: list[str]) -> list[Path]:
+    """Writes tiny WAV files with the given names, in this order."""
+    paths = generate_songs(directory, len(names))
+    return [path.rename(directory.joinpath(f'{name}.wav')) for path, name in zip(paths, names, strict=True)]
+
+
+def _names(songs: list[Song]) -> list[str]:
+    """Gets the names of songs, without their extension."""
+    return [song.stem for song in songs]
+
+
+def _assert_table(tracklist: TracklistWidget) -> None:
+    """Asserts that the rows of the metadata table are the songs of the tracklist."""
+    names = _names(tracklist.items_unfilter)
+    for name in set(names):
+        rows = [index for index, other in enumerate(names) if other == name]
+        assert_that(_matches(tracklist.table, name)).described_as(name).is_equal_to(rows)
+
+
+def _run(directory: Path, scenario: Callable[[TracklistWidget, list[TracklistChange]], Awaitable[None] | None]) -> None:
+    """Runs a scenario (a function or a coroutine function) on a headless tracklist of five checked songs."""
+    paths = _songs(directory, ['alpha', 'bravo', 'charlie', 'delta', 'echo'])
+
+    async def run() -> None:
+        app = _TracklistApp(paths)
+        async with app.run_test(headless=True, size=(80, 20)) as pilot:
+            while app.tracklist.table is None or not app.tracklist._check_worker.is_finished:  # noqa: SLF001
+                await pilot.pause()
+            result = scenario(app.tracklist, app.changes)
+            if result is not None:
+                await result
+
+    asyncio.run(run())
+
+
+def test_move(tmp_path: Path) -> None:
+    """Test that marked songs are moved as a block, and that the highlighted song follows them."""
+
+    def scenario(tracklist: TracklistWidget, changes: list[TracklistChange]) -> None:
+        tracklist.index = 3
+        tracklist.move([1, 3], 3)
+
+        assert_that(_names(tracklist.items)).is_equal_to(['alpha', 'charlie', 'echo', 'bravo', 'delta'])
+        assert_that(_names(tracklist.items_unfilter)).is_equal_to(_names(tracklist.items))
+        assert_that(tracklist.index).is_equal_to(4)
+        assert_that(changes[-1].kind).is_equal_to(ChangeKind.MOVE)
+        assert_that(changes[-1].start).is_equal_to(1)
+        assert_that(_names(changes[-1].inserted)).is_equal_to(['bravo', 'delta'])
+
+        tracklist.move([4], -10)
+        assert_that(_names(tracklist.items)).is_equal_to(['delta', 'alpha', 'charlie', 'echo', 'bravo'])
+        assert_that(tracklist.index).is_equal_to(0)
+        _assert_table(tracklist)
+
+    _run(tmp_path, scenario)
+
+
+def test_remove_and_insert(tmp_path: Path) -> None:
+    """Test that removed songs are returned, and that inserted songs keep the highlighted song."""
+
+    def scenario(tracklist: TracklistWidget, changes: list[TracklistChange]) -> None:
+        removed = tracklist.remove([0, 2])
+
+        assert_that([path.stem for path in removed]).is_equal_to(['alpha', 'charlie'])
+        assert_that(_names(tracklist.items)).is_equal_to(['bravo', 'delta', 'echo'])
+        assert_that(changes[-1].kind).is_equal_to(ChangeKind.REMOVE)
+        assert_that(_names(changes[-1].removed)).is_equal_to(['alpha', 'charlie'])
+
+        tracklist.index = 1
+        tracklist.insert(1, removed)
+
+        assert_that(_names(tracklist.items)).is_equal_to(['bravo', 'alpha', 'charlie', 'delta', 'echo'])
+        assert_that(tracklist.items[tracklist.index].stem).is_equal_to('delta')
+        assert_that(changes[-1].kind).is_equal_to(ChangeKind.INSERT)
+        assert_that(changes[-1].start).is_equal_to(1)
+        _assert_table(tracklist)
+
+    _run(tmp_path, scenario)
+
+
+def test_replace(tmp_path: Path) -> None:
+    """Test that a range of songs is replaced, the kept songs being the same objects."""
+
+    def scenario(tracklist: TracklistWidget, changes: list[TracklistChange]) -> None:
+        kept = tracklist.items[2]
+        tracklist.replace(1, 4, [tracklist.items[4].path, kept.path])
+
+        assert_that(_names(tracklist.items)).is_equal_to(['alpha', 'echo', 'charlie', 'echo'])
+        assert_that(tracklist.items[2]).is_same_as(kept)
+        assert_that(changes[-1].kind).is_equal_to(ChangeKind.REPLACE)
+        assert_that(_names(changes[-1].removed)).is_equal_to(['bravo', 'charlie', 'delta'])
+        assert_that(_names(changes[-1].inserted)).is_equal_to(['echo', 'charlie'])
+
+    _run(tmp_path, scenario)
+
+
+def test_reorder(tmp_path: Path) -> None:
+    """Test that the songs are sorted again, keeping the highlighted song."""
+
+    def scenario(tracklist: TracklistWidget, changes: list[TracklistChange]) -> None:
+        tracklist.move([0, 1], 3)
+        tracklist.index = 2
+        tracklist.order = PlaylistOrder.DESCENDANT
+        tracklist.reorder()
+
+        assert_that(_names(tracklist.items)).is_equal_to(['echo', 'delta', 'charlie', 'bravo', 'alpha'])
+        assert_that(tracklist.items[tracklist.index].stem).is_equal_to('echo')
+        assert_that(changes[-1].kind).is_equal_to(ChangeKind.REORDER)
+
+    _run(tmp_path, scenario)
+
+
+def test_mutations_filtered(tmp_path: Path) -> None:
+    """Test that the mutations of a filtered tracklist keep the hidden songs in place."""
+
+    def scenario(tracklist: TracklistWidget, _: list[TracklistChange]) -> None:
+        tracklist.filter('-bravo -delta')
+        assert_that(_names(tracklist.items)).is_equal_to(['alpha', 'charlie', 'echo'])
+
+        tracklist.move([2], 0)
+        assert_that(_names(tracklist.items)).is_equal_to(['echo', 'alpha', 'charlie'])
+        assert_that(_names(tracklist.items_unfilter)).is_equal_to(['echo', 'bravo', 'alpha', 'delta', 'charlie'])
+
+        tracklist.remove([1])
+        assert_that(_names(tracklist.items_unfilter)).is_equal_to(['echo', 'bravo', 'delta', 'charlie'])
+
+        tracklist.insert(1, [tracklist.items_unfilter[1].path])
+        assert_that(_names(tracklist.items)).is_equal_to(['echo', 'bravo', 'charlie'])
+        assert_that(_names(tracklist.items_unfilter)).is_equal_to(['echo', 'bravo', 'delta', 'bravo', 'charlie'])
+
+        tracklist.filter('')
+        assert_that(_names(tracklist.items)).is_equal_to(['echo', 'bravo', 'delta', 'bravo', 'charlie'])
+        _assert_table(tracklist)
+
+    _run(tmp_path, scenario)
+
+
+def test_swap(tmp_path: Path) -> None:
+    """Test that the highlighted song is swapped in place with the next or the previous one, filtered or not."""
+
+    async def scenario(tracklist: TracklistWidget, changes: list[TracklistChange]) -> None:
+        table = tracklist.table
+        tracklist.index = 1
+        await tracklist.swap(2)
+
+        assert_that(_names(tracklist.items)).is_equal_to(['alpha', 'charlie', 'bravo', 'delta', 'echo'])
+        assert_that(_names(tracklist.items_unfilter)).is_equal_to(_names(tracklist.items))
+        assert_that(tracklist.index).is_equal_to(2)
+        assert_that(tracklist.table).is_same_as(table)
+        assert_that(changes[-1].kind).is_equal_to(ChangeKind.MOVE)
+        assert_that(_names(changes[-1].removed)).is_equal_to(['charlie', 'bravo'])
+        _assert_table(tracklist)
+
+        tracklist.filter('-charlie')
+        tracklist.index = 2
+        await tracklist.swap(1)
+
+        assert_that(_names(tracklist.items)).is_equal_to(['alpha', 'delta', 'bravo', 'echo'])
+        assert_that(_names(tracklist.items_unfilter)).is_equal_to(['alpha', 'charlie', 'delta', 'bravo', 'echo'])
+        assert_that(tracklist.index).is_equal_to(1)
+        _assert_table(tracklist)
+
+    _run(tmp_path, scenario)
@@ -0,0 +1,51 @@
+"""Tests for the event loop stall watchdog."""
+
+import time
+
+from assertpy import assert_that
+from cplayer.src.elements.watchdog import StallWatchdog
+
+
+def test_stall_detection() -> None:
+    """Test that a blocked event loop is recorded with its duration and the location of the blocking code."""
+    watchdog = StallWatchdog(0.05)
+    watchdog.start()
+    try:
+        time.sleep(0.3)
+        watchdog.tick()
+        time.sleep(0.02)
+        watchdog.tick()
+    finally:
+        watchdog.stop()
+
+    assert_that(watchdog.running).is_false()
+    assert_that(watchdog.stalls).is_length(1)
+    assert_that(watchdog.stalls[0].duration).is_greater_than_or_equal_to(0.3)
+    assert_that(watchdog.stalls[0].location).contains('test_stall_detection', __file__)
+    assert_that(watchdog.summary()).starts_with('1 event loop stalls longer than 0.050 seconds').contains(
+        'test_stall_detection'
+    )
+
+
+def test_stall_in_progress() -> None:
+    """Test that a stall still in progress is recorded when the watchdog is stopped."""
+    watchdog = StallWatchdog(0.05)
+    watchdog.start()
+    time.sleep(0.2)
+    watchdog.stop()
+
+    assert_that(watchdog.stalls).is_length(1)
+    assert_that(watchdog.stalls[0].duration).is_greater_than_or_equal_to(0.2)
+
+
+def test_no_stall() -> None:
+    """Test that an event loop ticking more often than the threshold is never reported as stalled."""
+    watchdog = StallWatchdog(0.2)
+    watchdog.start()
+    for _ in range(10):
+        time.sleep(0.01)
+        watchdog.tick()
+    watchdog.stop()
+
+    assert_that(watchdog.stalls).is_empty()
+    assert_that(watchdog.summary()).is_equal_to('no event loop stall longer than 0.200 seconds')